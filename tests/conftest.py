@@ -0,0 +1,7 @@
+# Las pruebas importan los módulos de treeos-control/ y los scripts de la raíz
+# sin instalar nada; solo los módulos que no necesitan gi (GTK/GLib).
+import os, sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "treeos-control"))
+sys.path.insert(0, ROOT)
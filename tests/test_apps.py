@@ -0,0 +1,88 @@
+import os
+
+import pytest
+
+import treeos_apps
+from treeos_apps import (APPS_DESKTOP, AppIndex, build_batch_install_script, build_uninstall_script, image_files,
+                         merge_apps)
+
+
+class FakeContainer:
+    name = "treeossecure"
+
+    def exists(self):
+        return True
+
+    def is_running(self):
+        return True
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    """Índice con todos los paquetes presentes, como en la imagen preconstruida."""
+    monkeypatch.setattr(treeos_apps, "USER_DESKTOP_DIR", str(tmp_path / "applications"))
+    index = AppIndex(state=FakeContainer(), index_file=str(tmp_path / "index.json"),
+                     chosen_file=str(tmp_path / "state" / "apps.json"))
+    index.query_installed_packages = lambda: {data["package"] for data in APPS_DESKTOP.values()}
+    return index
+
+
+def test_merge_apps_deduplicates_packages():
+    _, _, packages, _ = merge_apps(["pycharm", "anaconda"])
+    assert packages.count("libXtst") == 1
+    assert len(packages) == len(set(packages))
+
+
+def test_batch_install_is_a_single_transaction():
+    script = build_batch_install_script(["pycharm", "vscode", "anaconda"])
+    assert script.count("dnf install") == 1
+    assert "/etc/yum.repos.d/phracek-pycharm.repo" in script
+    assert "/etc/yum.repos.d/vscode.repo" in script
+    assert script.rstrip().endswith(APPS_DESKTOP["anaconda"]["post_install"][-1])
+
+
+def test_uninstall_keeps_packages_of_other_apps():
+    script = build_uninstall_script("pycharm", keep_packages={"libXtst"})
+    remove = next(line for line in script.splitlines() if "dnf remove" in line)
+    assert "pycharm-community" in remove and "libXtst" not in remove
+    assert "sudo rm -f /etc/yum.repos.d/phracek-pycharm.repo" in script
+
+
+def test_image_files_cover_every_app():
+    files = image_files()
+    packages = files["packages"].split()
+    for data in APPS_DESKTOP.values():
+        assert data["package"] in packages
+        for filename, content in data["repos"].items():
+            assert files[f"yum.repos.d/{filename}"] == content
+
+
+def test_image_packages_alone_do_not_create_launchers(index):
+    index.refresh(lambda line: None)
+    assert not any(index.is_installed(key) for key in APPS_DESKTOP)
+    assert not os.path.exists(treeos_apps.USER_DESKTOP_DIR)
+
+
+def test_launchers_follow_the_chosen_apps(index):
+    index.set_chosen(["vscode"])
+    index.refresh(lambda line: None)
+    assert index.is_installed("vscode") and not index.is_installed("pycharm")
+    assert os.listdir(treeos_apps.USER_DESKTOP_DIR) == [APPS_DESKTOP["vscode"]["desktop_file"]]
+
+    index.set_chosen(["vscode"], chosen=False)
+    index.refresh(lambda line: None)
+    assert os.listdir(treeos_apps.USER_DESKTOP_DIR) == []
+    reloaded = AppIndex(state=FakeContainer(), index_file=index.index_file, chosen_file=index.chosen_file)
+    assert not reloaded.is_chosen("vscode")
+
+
+def test_existing_launchers_count_as_chosen_without_state_file(index, tmp_path):
+    treeos_apps.write_launcher("pycharm")
+    migrated = AppIndex(state=FakeContainer(), index_file=index.index_file,
+                        chosen_file=str(tmp_path / "missing.json"))
+    assert migrated.is_chosen("pycharm") and not migrated.is_chosen("vscode")
+
+
+def test_uninstall_keeps_image_conda_env():
+    script = build_uninstall_script("anaconda")
+    assert "/opt/conda/envs/basenv" in script and "conda env remove -y -n basenv" in script
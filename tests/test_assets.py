@@ -0,0 +1,69 @@
+import json, os
+
+import pytest
+
+from treeos_assets import AssetStore, build_manifest, serialize_manifest, validate_manifest
+
+SHA = "0" * 64
+
+
+def entry(sha=SHA, size=1, executable=False):
+    return {"sha256": sha, "size": size, "executable": executable}
+
+
+def test_repository_manifest_is_valid():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    validate_manifest(build_manifest(root))
+
+
+@pytest.mark.parametrize("rel_path", [
+    "", "/etc/passwd", "../../etc/passwd", "treeos-control/../../etc/passwd", "treeos-control//x",
+    "treeos-control/./x", "otro/archivo", "treeos-control.desktop/x", "treeos-control\\..\\x",
+])
+def test_rejects_paths_outside_entry_points(rel_path):
+    with pytest.raises(ValueError):
+        validate_manifest({"files": {rel_path: entry()}})
+
+
+@pytest.mark.parametrize("info", [
+    entry(sha="../../../etc/shadow"), entry(sha="A" * 64), entry(sha=SHA[:-1]), entry(size=-1),
+    entry(executable="yes"), "no es un diccionario",
+])
+def test_rejects_bad_entries(info):
+    with pytest.raises(ValueError):
+        validate_manifest({"files": {"treeos-control/x": info}})
+
+
+def make_source(tmp_path):
+    source = tmp_path / "repo"
+    (source / "treeos-control").mkdir(parents=True)
+    (source / "treeos-control" / "panel.py").write_text("print('hola')\n")
+    script = source / "treeos-control" / "run.sh"
+    script.write_text("#!/bin/sh\n")
+    script.chmod(0o755)
+    (source / "treeos-control.desktop").write_text("[Desktop Entry]\nIcon=TEMPATH/logo.gif\n")
+    (source / "assets-manifest.json").write_text(serialize_manifest(build_manifest(str(source))))
+    return source
+
+
+def test_update_builds_tree_from_file_url(tmp_path):
+    source = make_source(tmp_path)
+    store = AssetStore(str(tmp_path / "store"), f"file://{source}")
+    assert store.update() == 0
+    current = tmp_path / "store" / "current"
+    assert (current / "treeos-control" / "panel.py").read_text() == "print('hola')\n"
+    assert os.access(current / "treeos-control" / "run.sh", os.X_OK)
+    assert f"Icon={store.current}/treeos-control/logo.gif" in (current / "treeos-control.desktop").read_text()
+    assert store.update() == 0  # sin cambios: no se descarga nada
+
+
+def test_update_rejects_traversal_before_writing(tmp_path):
+    source = make_source(tmp_path)
+    manifest = json.loads((source / "assets-manifest.json").read_text())
+    manifest["files"]["treeos-control/../../escape"] = manifest["files"].pop("treeos-control/panel.py")
+    (source / "assets-manifest.json").write_text(json.dumps(manifest))
+    store = AssetStore(str(tmp_path / "store"), f"file://{source}")
+    with pytest.raises(ValueError):
+        store.update()
+    assert not (tmp_path / "escape").exists()
+    assert os.listdir(tmp_path / "store" / "trees") == []
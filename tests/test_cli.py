@@ -0,0 +1,42 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Intérprete aparte con "gi" bloqueado, como en un equipo sin el entorno gráfico.
+NO_GI = """
+import sys
+sys.modules["gi"] = None
+sys.path.insert(0, {path!r})
+"""
+
+
+def run_without_gi(code, tmp_path):
+    env = dict(os.environ, HOME=str(tmp_path), XDG_STATE_HOME=str(tmp_path / "state"),
+               XDG_CACHE_HOME=str(tmp_path / "cache"))
+    source = NO_GI.format(path=os.path.join(ROOT, "treeos-control")) + textwrap.dedent(code)
+    return subprocess.run([sys.executable, "-c", source], capture_output=True, text=True, env=env)
+
+
+def test_cli_imports_without_gi(tmp_path):
+    result = run_without_gi("""
+        import treeos_cli, treeos_updates
+        assert treeos_cli.build_parser().parse_args(["theme", "modern"]).theme == "modern"
+        assert not treeos_updates.update_engine.available()
+        assert not any(name == "gi" or name.startswith("gi.") for name, module in sys.modules.items() if module)
+    """, tmp_path)
+    assert result.returncode == 0, result.stderr
+
+
+def test_theme_without_gi_reports_error(tmp_path):
+    result = run_without_gi("""
+        import json, io, contextlib, treeos_cli
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            rcode = treeos_cli.main(["-q", "theme", "modern"])
+        report = json.loads(out.getvalue())
+        assert rcode != 0 and not report["ok"], report
+    """, tmp_path)
+    assert result.returncode == 0, result.stderr
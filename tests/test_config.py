@@ -0,0 +1,79 @@
+import os
+
+from treeos_config import ConfigStore, DEFAULT_CONFIG, parse_config, serialize_config
+
+
+def test_parse_config_types_and_defaults():
+    config = parse_config("# comentario\nAUTO_UPDATES_ENABLED=False\nLAST_UPDATE_CHECK=123\n"
+                          "CHECK_FREQUENCY= weekly \nOTRA=valor\nsin igual\n")
+    assert config["AUTO_UPDATES_ENABLED"] is False
+    assert config["LAST_UPDATE_CHECK"] == 123
+    assert config["CHECK_FREQUENCY"] == "weekly"
+    assert config["OTRA"] == "valor"
+    assert config["STAGE_UPDATES"] is DEFAULT_CONFIG["STAGE_UPDATES"]
+
+
+def test_parse_config_malformed_int_keeps_default():
+    assert parse_config("SYNC_INTERVAL=pronto\n")["SYNC_INTERVAL"] == DEFAULT_CONFIG["SYNC_INTERVAL"]
+
+
+def test_serialize_round_trip():
+    config = dict(DEFAULT_CONFIG, CHECK_FREQUENCY="monthly", EXTRA="x")
+    text = serialize_config(config)
+    assert text.splitlines()[0] == "AUTO_UPDATES_ENABLED=true"
+    assert text.endswith("EXTRA=x\n")
+    assert parse_config(text) == config
+
+
+def test_update_writes_atomically_and_keeps_mode(tmp_path):
+    path = tmp_path / "update_config.conf"
+    path.write_text("CHECK_FREQUENCY=hourly\n")
+    os.chmod(path, 0o600)
+    store = ConfigStore(str(path))
+    store.update(LAST_UPDATE_CHECK=42)
+    assert parse_config(path.read_text())["LAST_UPDATE_CHECK"] == 42
+    assert parse_config(path.read_text())["CHECK_FREQUENCY"] == "hourly"
+    assert os.stat(path).st_mode & 0o777 == 0o600
+    assert [p.name for p in tmp_path.iterdir()] == ["update_config.conf"]
+
+
+def test_read_sees_external_changes_without_monitor(tmp_path):
+    path = tmp_path / "update_config.conf"
+    path.write_text("CHECK_FREQUENCY=hourly\n")
+    store = ConfigStore(str(path))
+    assert store.get("CHECK_FREQUENCY") == "hourly"
+    path.write_text("CHECK_FREQUENCY=weekly\nSTORED_VERSION=41\n")
+    assert store.get("CHECK_FREQUENCY") == "weekly"
+    assert store.get("STORED_VERSION") == "41"
+
+
+def test_read_returns_a_copy(tmp_path):
+    store = ConfigStore(str(tmp_path / "missing.conf"))
+    store.read()["CHECK_FREQUENCY"] = "hourly"
+    assert store.get("CHECK_FREQUENCY") == DEFAULT_CONFIG["CHECK_FREQUENCY"]
+
+
+def test_state_keys_go_to_the_user_state_file(tmp_path, monkeypatch):
+    import treeos_config
+    config_path, state_path = tmp_path / "etc" / "update_config.conf", tmp_path / "state" / "update_state.conf"
+    config_path.parent.mkdir()
+    config_path.write_text("CHECK_FREQUENCY=weekly\n")
+    monkeypatch.setattr(treeos_config, "config_store", ConfigStore(str(config_path)))
+    monkeypatch.setattr(treeos_config, "state_store",
+                        ConfigStore(str(state_path), treeos_config.STATE_DEFAULTS))
+
+    assert treeos_config.write_config(last_update_check=100, stored_version=" fedora:41 ")
+    assert state_path.read_text() == "LAST_UPDATE_CHECK=100\nSTORED_VERSION=fedora:41\n"
+    assert "LAST_UPDATE_CHECK" not in config_path.read_text()
+    config = treeos_config.read_config()
+    assert (config["CHECK_FREQUENCY"], config["LAST_UPDATE_CHECK"]) == ("weekly", 100)
+
+
+def test_write_config_reports_failures(tmp_path, monkeypatch, capsys):
+    import treeos_config
+    not_a_dir = tmp_path / "archivo"
+    not_a_dir.write_text("")
+    monkeypatch.setattr(treeos_config, "state_store",
+                        ConfigStore(str(not_a_dir / "update_state.conf"), treeos_config.STATE_DEFAULTS))
+    assert treeos_config.write_config(last_update_check=1) is False
+    assert "Error al guardar" in capsys.readouterr().err
@@ -0,0 +1,45 @@
+import pytest
+
+from treeos_extensions import THEMES, detect_theme, parse_extensions
+
+
+class Reply:
+    """Respuesta de ListExtensions ya desempaquetada: (a{sa{sv}},)."""
+
+    def __init__(self, extensions):
+        self.extensions = extensions
+
+    def unpack(self):
+        return (self.extensions,)
+
+
+def theme_states(theme):
+    disable, enable = THEMES[theme]
+    return {**{uuid: False for uuid in disable}, **{uuid: True for uuid in enable}}
+
+
+def test_parse_extensions_enabled_key_and_state():
+    states = parse_extensions(Reply({
+        "a@x": {"enabled": True, "state": 2},      # "enabled" manda sobre "state"
+        "b@x": {"enabled": False, "state": 1},
+        "c@x": {"state": 1},                       # GNOME < 45: solo "state"
+        "d@x": {"state": 2},
+        "e@x": {},
+    }))
+    assert states == {"a@x": True, "b@x": False, "c@x": True, "d@x": False, "e@x": False}
+
+
+@pytest.mark.parametrize("theme", sorted(THEMES))
+def test_detect_theme_matches_each_theme(theme):
+    assert detect_theme(theme_states(theme)) == theme
+    assert detect_theme({**theme_states(theme), "otra@x": True}) == theme
+
+
+def test_detect_theme_mixed_or_missing_is_none():
+    assert detect_theme({}) is None
+    states = theme_states("modern")
+    states["dash-to-panel@jderose9.github.com"] = True  # ambos paneles activos
+    assert detect_theme(states) is None
+    states = theme_states("traditional")
+    del states["blur-my-shell@aunetx"]
+    assert detect_theme(states) is None
@@ -0,0 +1,60 @@
+import os
+import sys
+
+import pytest
+
+from treeos_fleet import FAILED, LOCKED, OK, SKIPPED, plan_waves, run_rollout, ssh_argv
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKE_SSH = f"{sys.executable} {os.path.join(ROOT, 'tools', 'fake_ssh.py')}"
+
+
+@pytest.fixture(autouse=True)
+def no_delay(monkeypatch):
+    monkeypatch.setenv("FAKE_SSH_DELAY", "0")
+    monkeypatch.delenv("FAKE_SSH_FAIL", raising=False)
+
+
+def rollout(hosts, **options):
+    return run_rollout(hosts, ssh_command=FAKE_SSH, parallel=4, **options)
+
+
+def test_plan_waves_canary_then_fixed_size():
+    hosts = list("abcdef")
+    assert plan_waves(hosts, canary=1, wave_size=2) == [["a"], ["b", "c"], ["d", "e"], ["f"]]
+    assert plan_waves(hosts, canary=0, wave_size=4) == [["a", "b", "c", "d"], ["e", "f"]]
+    assert plan_waves(hosts, canary=10, wave_size=2) == [hosts]
+    assert plan_waves([], canary=1, wave_size=2) == []
+
+
+def test_ssh_argv_port_and_placeholder():
+    assert ssh_argv("ssh -o BatchMode=yes", "root@pc1:2222", "cmd") == \
+        ["ssh", "-o", "BatchMode=yes", "-p", "2222", "root@pc1", "cmd"]
+    assert ssh_argv("podman exec {host} sh -c", "pc1", "cmd") == ["podman", "exec", "pc1", "sh", "-c", "cmd"]
+
+
+def test_rollout_halts_when_a_wave_fails_too_much():
+    hosts = ["pc1", "pc2", "pc3-fail", "pc4", "pc5"]
+    report = rollout(hosts, canary=1, wave_size=2, max_failure_rate=0.2)
+    status = {r["host"]: r["status"] for r in report["results"]}
+    assert status == {"pc1": OK, "pc2": OK, "pc3-fail": FAILED, "pc4": SKIPPED, "pc5": SKIPPED}
+    assert report["halted"] == {"wave": 2, "failure_rate": 0.5}
+    assert [w["wave"] for w in report["waves"]] == [1, 2]
+
+
+def test_rollout_continues_at_the_failure_limit():
+    hosts = ["pc0"] + [f"pc{i}" for i in range(1, 5)] + ["pc5-fail", "pc6"]
+    report = rollout(hosts, canary=1, wave_size=5, max_failure_rate=0.2)
+    assert report["halted"] is None
+    assert report["counts"] == {OK: 6, FAILED: 1}
+
+
+def test_locked_hosts_do_not_count_as_failures():
+    report = rollout(["pc1", "pc2-busy", "pc3-busy"], canary=1, wave_size=2, max_failure_rate=0.0)
+    assert report["halted"] is None
+    assert report["counts"] == {OK: 1, LOCKED: 2}
+
+
+def test_report_keeps_unknown_upgrades_apart():
+    report = rollout(["pc1", "pc2-current", "pc3-unknown"], canary=0, wave_size=3)
+    assert (report["upgraded"], report["up_to_date"], report["upgrade_unknown"]) == (1, 1, 1)
@@ -0,0 +1,41 @@
+import subprocess
+
+import treeos_provision
+from treeos_provision import Provisioner
+
+
+def test_rollback_removes_units_and_reloads_systemd(tmp_path, monkeypatch):
+    commands = []
+
+    def fake_run(*command):
+        commands.append(command)
+        if command[:2] == ("systemctl", "enable"):
+            raise subprocess.CalledProcessError(1, command, stderr="unidad rota")
+    monkeypatch.setattr(treeos_provision, "run", fake_run)
+
+    events = []
+    provisioner = Provisioner(events.append, str(tmp_path))
+    unit = "/etc/systemd/system/prueba.service"
+    ok = provisioner.apply([
+        {"action": "write_file", "path": unit, "content": "[Unit]\n", "mode": 0o644},
+        {"action": "daemon_reload"},
+        {"action": "enable_unit", "unit": "prueba.service"},
+    ])
+
+    assert not ok
+    assert not (tmp_path / unit.lstrip("/")).exists()
+    assert commands[-1] == ("systemctl", "daemon-reload")
+    assert [e["status"] for e in events if e["event"] == "rollback"] == ["done"]
+    assert events[-1] == {"event": "finished", "success": False, "error": "unidad rota"}
+
+
+def test_no_reload_when_no_unit_was_written(tmp_path, monkeypatch):
+    commands = []
+    monkeypatch.setattr(treeos_provision, "run", lambda *command: commands.append(command))
+    provisioner = Provisioner(lambda event: None, str(tmp_path))
+    ok = provisioner.apply([
+        {"action": "write_file", "path": "/etc/profile.d/x.sh", "content": "", "mode": 0o644},
+        {"action": "no_existe"},
+    ])
+    assert not ok
+    assert commands == []
@@ -0,0 +1,86 @@
+import json
+import os
+import threading
+
+from treeos_runlog import RunLog
+
+
+def write_run(log, kind, lines, exit_code=0):
+    run = log.start_run(kind)
+    for text in lines:
+        run.line(text)
+    run.finish(exit_code)
+    return run
+
+
+def test_tail_returns_last_run_of_kind(tmp_path):
+    log = RunLog(str(tmp_path / "runs.jsonl"))
+    write_run(log, "update", ["primera"])
+    write_run(log, "update", ["a", "b"], exit_code=1)
+    write_run(log, "install", ["otra"])
+    start, end, lines = log.tail("update")
+    assert start["kind"] == "update"
+    assert end["exit_code"] == 1
+    assert [text for _, text in lines] == ["a", "b"]
+    assert log.tail(("rebase",)) is None
+
+
+def test_tail_keeps_the_newest_lines(tmp_path):
+    log = RunLog(str(tmp_path / "runs.jsonl"))
+    write_run(log, "update", [f"línea {i}" for i in range(10)])
+    _, _, lines = log.tail("update", max_lines=3)
+    assert [text for _, text in lines] == ["línea 7", "línea 8", "línea 9"]
+
+
+def test_tail_of_unfinished_run(tmp_path):
+    log = RunLog(str(tmp_path / "runs.jsonl"))
+    run = log.start_run("update")
+    run.line("descargando")
+    run.flush()
+    start, end, lines = log.tail("update")
+    assert start["run"] == run.id and end is None
+    assert [text for _, text in lines] == ["descargando"]
+
+
+def test_rotation_keeps_backups(tmp_path):
+    path = str(tmp_path / "runs.jsonl")
+    log = RunLog(path, max_bytes=400, backups=2)
+    for i in range(20):
+        write_run(log, "update", [f"ejecución {i}"])
+    assert os.path.exists(f"{path}.1") and os.path.exists(f"{path}.2")
+    assert not os.path.exists(f"{path}.3")
+    for name in (path, f"{path}.1", f"{path}.2"):
+        assert os.path.getsize(name) <= 400
+        with open(name) as f:
+            assert all(json.loads(line) for line in f)
+    _, end, lines = log.tail("update")
+    assert [text for _, text in lines] == ["ejecución 19"] and end["exit_code"] == 0
+
+
+def test_tail_reads_runs_split_by_rotation(tmp_path):
+    path = str(tmp_path / "runs.jsonl")
+    log = RunLog(path, max_bytes=300, backups=3)
+    run = log.start_run("update")
+    for i in range(6):
+        run.line(f"paso {i} " + "x" * 40)
+        run.flush()
+    run.finish(0)
+    assert os.path.exists(f"{path}.1")
+    _, end, lines = log.tail("update")
+    assert len(lines) == 6 and end is not None
+
+
+def test_start_does_not_write_on_calling_thread(tmp_path):
+    log = RunLog(str(tmp_path / "runs.jsonl"))
+    writers = []
+    write = log.write
+
+    def recording_write(data, fd=None):
+        writers.append(threading.current_thread())
+        return write(data, fd)
+
+    log.write = recording_write
+    run = log.start_run("update")
+    assert threading.current_thread() not in writers
+    run.finish(0)
+    assert log.tail("update")[1]["exit_code"] == 0
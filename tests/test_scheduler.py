@@ -0,0 +1,36 @@
+from datetime import datetime
+
+import pytest
+
+from treeos_scheduler import INTERVALS, add_month, next_due
+
+
+def ts(*args):
+    return datetime(*args).timestamp()
+
+
+def test_never_checked_is_due_now():
+    assert next_due(0, "monthly") == 0
+    assert next_due(0, "daily") == 0
+
+
+@pytest.mark.parametrize("last, due", [
+    ((2026, 1, 15, 9, 30), (2026, 2, 15, 9, 30)),
+    ((2026, 1, 31, 9, 30), (2026, 2, 28, 9, 30)),
+    ((2028, 1, 31, 9, 30), (2028, 2, 29, 9, 30)),
+    ((2026, 3, 31, 0, 0), (2026, 4, 30, 0, 0)),
+    ((2026, 12, 20, 23, 59), (2027, 1, 20, 23, 59)),
+])
+def test_monthly_keeps_day_and_time(last, due):
+    assert next_due(ts(*last), "monthly") == ts(*due)
+
+
+def test_add_month_chains_from_the_clamped_day():
+    first = add_month(ts(2026, 1, 31))
+    assert add_month(first) == ts(2026, 3, 28)
+
+
+def test_fixed_intervals_and_unknown_frequency():
+    assert next_due(1000, "hourly") == 1000 + INTERVALS["hourly"]
+    assert next_due(1000, "weekly") == 1000 + INTERVALS["weekly"]
+    assert next_due(1000, "yearly") == 1000 + INTERVALS["daily"]
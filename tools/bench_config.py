@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# Micro-benchmark de lectura/escritura de update_config.conf:
+#   antes   -> releer y parsear el archivo en cada lectura; un "sed -i" por clave al escribir
+#   después -> ConfigStore (caché en memoria, escritura atómica única)
+#
+# Uso: python3 tools/bench_config.py [iteraciones]
+import os, sys, subprocess, tempfile, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "treeos-control"))
+
+from treeos_config import ConfigStore, DEFAULT_CONFIG, parse_config, serialize_config
+
+
+def read_antes(path):
+    with open(path) as f:
+        return parse_config(f.read())
+
+
+def write_antes(path, changes):
+    for key, value in changes.items():
+        subprocess.run(f"sed -i 's|^{key}=.*|{key}={value}|' {path}", shell=True)
+
+
+def medir(func, iteraciones):
+    inicio = time.perf_counter()
+    for i in range(iteraciones):
+        func(i)
+    return (time.perf_counter() - inicio) / iteraciones * 1e6
+
+
+def main(iteraciones):
+    with tempfile.TemporaryDirectory(prefix="treeos-config-") as tmp:
+        path = os.path.join(tmp, "update_config.conf")
+        with open(path, "w") as f:
+            f.write(serialize_config(DEFAULT_CONFIG))
+        store = ConfigStore(path)
+
+        cambios = lambda i: {"CHECK_FREQUENCY": ("daily", "weekly")[i % 2], "AUTO_UPDATES_ENABLED": "true"}
+        resultados = [
+            ("lectura antes", medir(lambda i: read_antes(path), iteraciones)),
+            ("lectura después", medir(lambda i: store.read(), iteraciones)),
+            ("escritura antes (2 claves)", medir(lambda i: write_antes(path, cambios(i)), max(iteraciones // 20, 5))),
+            ("escritura después (2 claves)", medir(lambda i: store.update(**cambios(i)), max(iteraciones // 20, 5))),
+        ]
+        for nombre, us in resultados:
+            print(f"{nombre:30} {us:10.1f} µs/op")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# Tiempos de arranque del panel de control (requiere una sesión gráfica):
+#   import GTK -> lo que pagaba antes una segunda instancia solo para salir
+#   frío       -> proceso nuevo hasta registrar org.treeoscontrol.app en el bus
+#   caliente   -> segundo lanzamiento con una instancia residente (--resident):
+#                 activación por D-Bus sin importar GTK, hasta que el proceso termina
+#
+# Uso: python3 tools/bench_launch.py [repeticiones]
+import os, statistics, subprocess, sys, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "treeos-control"))
+
+from gi.repository import Gio, GLib
+from treeos_launch import APP_ID
+
+PANEL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "treeos-control", "treeos-control.py")
+TIMEOUT = 30
+
+
+def name_has_owner(bus):
+    owned, = bus.call_sync("org.freedesktop.DBus", "/org/freedesktop/DBus", "org.freedesktop.DBus",
+                           "NameHasOwner", GLib.Variant("(s)", (APP_ID,)), GLib.VariantType("(b)"),
+                           Gio.DBusCallFlags.NONE, -1, None).unpack()
+    return owned
+
+
+def wait_for_name(bus, owned):
+    deadline = time.monotonic() + TIMEOUT
+    while name_has_owner(bus) != owned:
+        if time.monotonic() > deadline:
+            sys.exit(f"Tiempo de espera agotado esperando a {APP_ID}")
+        time.sleep(0.005)
+
+
+def medir_import_gtk():
+    inicio = time.perf_counter()
+    subprocess.run([sys.executable, "-c",
+                    "import gi; gi.require_version('Gtk', '4.0'); from gi.repository import Gtk"], check=True)
+    return time.perf_counter() - inicio
+
+
+def medir_frio(bus):
+    inicio = time.perf_counter()
+    process = subprocess.Popen([sys.executable, PANEL])
+    wait_for_name(bus, True)
+    elapsed = time.perf_counter() - inicio
+    process.terminate()
+    process.wait()
+    wait_for_name(bus, False)
+    return elapsed
+
+
+def medir_caliente():
+    inicio = time.perf_counter()
+    subprocess.run([sys.executable, PANEL], check=True)
+    return time.perf_counter() - inicio
+
+
+def main(repeticiones):
+    bus = Gio.bus_get_sync(Gio.BusType.SESSION, None)
+    if name_has_owner(bus):
+        sys.exit("Cierre el panel de control antes de medir.")
+
+    import_gtk = [medir_import_gtk() for _ in range(repeticiones)]
+    frio = [medir_frio(bus) for _ in range(repeticiones)]
+
+    residente = subprocess.Popen([sys.executable, PANEL, "--resident"])
+    try:
+        wait_for_name(bus, True)
+        caliente = [medir_caliente() for _ in range(repeticiones)]
+    finally:
+        residente.terminate()
+        residente.wait()
+
+    for nombre, valores in (("import GTK 4", import_gtk), ("arranque en frío", frio),
+                            ("segundo lanzamiento (residente)", caliente)):
+        print(f"{nombre:34} {statistics.median(valores) * 1000:8.1f} ms (mediana de {repeticiones})")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
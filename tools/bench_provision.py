@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# Banco de pruebas del aprovisionamiento del primer arranque (treeosinstall.py)
+# sin máquina virtual ni privilegios: ejecuta el mismo flujo que
+# SetupWindow._apply_configuration (SystemConfigurator.build_plan + apply_plan)
+# contra binarios simulados de sudo/useradd/localectl/systemctl... en una raíz
+# temporal, y resume el informe JSON de tiempos por paso.
+#
+# Uso: python3 tools/bench_provision.py [--runs N] [--delay S] [--fail-at "systemctl enable"] [--json]
+import argparse, json, os, statistics, sys, tempfile, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import treeos_provision
+from treeos_provision import SystemConfigurator
+
+STUB_TOOLS = ["useradd", "userdel", "passwd", "chage", "usermod", "localectl", "systemctl"]
+
+SUDO_STUB = """#!/bin/bash
+exec "$@"
+"""
+
+# Registra la llamada, simula la latencia y falla si coincide con TREEOS_STUB_FAIL.
+TOOL_STUB = """#!/bin/bash
+name="$(basename "$0")"
+echo "$name $*" >> "$TREEOS_STUB_LOG"
+sleep "${TREEOS_STUB_DELAY:-0}"
+if [[ -n "$TREEOS_STUB_FAIL" && "$name $*" == "$TREEOS_STUB_FAIL"* ]]; then
+  echo "$name: fallo simulado" >&2
+  exit 1
+fi
+if [[ "$name $1" == "localectl status" ]]; then
+  echo "   System Locale: LANG=en_US.UTF-8"
+  echo "       VC Keymap: us"
+  echo "      X11 Layout: us"
+fi
+"""
+
+
+def make_root(base):
+    root = tempfile.mkdtemp(prefix="root-", dir=base)
+    for directory in ("etc/profile.d", "etc/systemd/system", "var/log"):
+        os.makedirs(os.path.join(root, directory))
+    return root
+
+
+def make_stubs(base):
+    bin_dir = os.path.join(base, "bin")
+    os.makedirs(bin_dir)
+    stubs = {"sudo": SUDO_STUB, **{tool: TOOL_STUB for tool in STUB_TOOLS}}
+    for name, content in stubs.items():
+        path = os.path.join(bin_dir, name)
+        with open(path, "w") as f:
+            f.write(content)
+        os.chmod(path, 0o755)
+    return bin_dir
+
+
+def run_once(root):
+    treeos_provision.PROVISION_ROOT = root
+    steps = SystemConfigurator.build_plan("treeosbench", "es_ES.utf8", "es")
+    start = time.perf_counter()
+    success, error = SystemConfigurator.apply_plan(steps, lambda event: None)
+    wall = time.perf_counter() - start
+    with open(os.path.join(root, treeos_provision.REPORT_FILE.lstrip("/"))) as f:
+        report = json.load(f)
+    return success, error, wall, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempos del aprovisionamiento con herramientas simuladas")
+    parser.add_argument("--runs", type=int, default=5, help="repeticiones (por defecto 5)")
+    parser.add_argument("--delay", type=float, default=0.0, help="latencia simulada por comando, en segundos")
+    parser.add_argument("--fail-at", default="", help='prefijo de comando que debe fallar, p. ej. "systemctl enable"')
+    parser.add_argument("--json", action="store_true", help="imprimir el resumen en JSON (para CI)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="treeos-provision-") as base:
+        os.environ["PATH"] = make_stubs(base) + os.pathsep + os.environ["PATH"]
+        os.environ["TREEOS_STUB_LOG"] = os.path.join(base, "calls.log")
+        os.environ["TREEOS_STUB_DELAY"] = str(args.delay)
+        os.environ["TREEOS_STUB_FAIL"] = args.fail_at
+
+        walls, totals, per_step, results = [], [], {}, []
+        for _ in range(args.runs):
+            success, error, wall, report = run_once(make_root(base))
+            results.append(success)
+            walls.append(wall)
+            totals.append(report["total_seconds"])
+            for step in report["steps"]:
+                per_step.setdefault(step["description"], []).append(step["seconds"])
+        with open(os.environ["TREEOS_STUB_LOG"]) as f:
+            calls = sum(1 for _ in f) // args.runs
+
+    summary = {
+        "runs": args.runs,
+        "success": all(results),
+        "last_error": error,
+        "commands_per_run": calls,
+        "wall_seconds_median": statistics.median(walls),
+        "helper_seconds_median": statistics.median(totals),
+        "steps_median": {name: statistics.median(values) for name, values in per_step.items()},
+        "rollback_seconds": report["rollback_seconds"],
+    }
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+    for name, seconds in summary["steps_median"].items():
+        print(f"{name:66} {seconds * 1000:9.2f} ms")
+    print(f"{'asistente (total)':66} {summary['helper_seconds_median'] * 1000:9.2f} ms")
+    print(f"{'flujo completo (incluido sudo)':66} {summary['wall_seconds_median'] * 1000:9.2f} ms")
+    print(f"Comandos externos por ejecución: {calls}")
+    if not summary["success"]:
+        print(f"Fallo: {error} (deshecho en {summary['rollback_seconds'] * 1000:.2f} ms)")
+
+
+if __name__ == "__main__":
+    main()
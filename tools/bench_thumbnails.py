@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# Compara el coste de cargar las vistas previas de la página Apariencia:
+#   directo -> decodificar el archivo original completo (comportamiento anterior)
+#   frío    -> caché vacía: generar la miniatura y cargarla
+#   caliente-> cargar la miniatura ya cacheada
+#
+# Uso: python3 tools/bench_thumbnails.py [imagen ...]
+import os, sys, tempfile, time, glob, shutil
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "treeos-control"))
+
+from gi.repository import GdkPixbuf
+from treeos_thumbnails import ThumbnailCache
+
+SIZE = 300  # SMALL_IMAGE_SIZE * THUMBNAIL_SCALE
+
+
+def medir(func, repeticiones=5):
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        func()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor * 1000
+
+
+def main(paths):
+    if not paths:
+        base = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "treeos-control")
+        paths = sorted(glob.glob(os.path.join(base, "*.webp")) + glob.glob(os.path.join(base, "*.png")))
+
+    cache_dir = tempfile.mkdtemp(prefix="treeos-thumbs-")
+    try:
+        cache = ThumbnailCache(SIZE, cache_dir)
+        total = {"directo": 0.0, "frio": 0.0, "caliente": 0.0}
+        print(f"{'imagen':32} {'directo ms':>11} {'frío ms':>9} {'caliente ms':>12}")
+        for path in paths:
+            def frio():
+                shutil.rmtree(cache_dir, ignore_errors=True)
+                GdkPixbuf.Pixbuf.new_from_file(cache.generate(path))
+
+            directo = medir(lambda: GdkPixbuf.Pixbuf.new_from_file(path))
+            frio_ms = medir(frio)
+            caliente = medir(lambda: GdkPixbuf.Pixbuf.new_from_file(cache.lookup(path)))
+            total["directo"] += directo
+            total["frio"] += frio_ms
+            total["caliente"] += caliente
+            print(f"{os.path.basename(path):32} {directo:11.1f} {frio_ms:9.1f} {caliente:12.1f}")
+        print(f"{'TOTAL':32} {total['directo']:11.1f} {total['frio']:9.1f} {total['caliente']:12.1f}")
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
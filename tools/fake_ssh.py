@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# Sustituto de ssh para probar treeos_fleet.py sin equipos reales:
+#
+#   python3 treeos_fleet.py aula.txt --ssh-command "python3 tools/fake_ssh.py"
+#
+# Acepta las opciones de ssh que usa treeos_fleet (-o X, -p N), espera DELAY
+# segundos y responde como "treeos-control.py --cli update". El comportamiento de
+# cada equipo se elige por su nombre:
+#
+#   *fail*     la actualización falla (código 1)
+#   *down*     no se puede conectar (código 255, como ssh)
+#   *busy*     ya hay una actualización en curso (código 75)
+#   *hang*     no responde (duerme FAKE_SSH_HANG segundos)
+#   *current*  el equipo ya está al día
+#   *unknown*  no se pudo comprobar si hay actualización (se actualiza igualmente)
+#
+# FAKE_SSH_DELAY (segundos, por defecto 0.2) y FAKE_SSH_FAIL (lista de equipos
+# separados por comas que deben fallar) permiten variar el escenario. Con
+# FAKE_SSH_EXEC=1 la orden remota se ejecuta de verdad en local con "sh -c".
+import json, os, random, subprocess, sys, time
+
+
+def parse_args(argv):
+    args = list(argv)
+    while args and args[0].startswith("-"):
+        option = args.pop(0)
+        if option in ("-o", "-p", "-i", "-l") and args:
+            args.pop(0)
+    if len(args) < 2:
+        sys.exit("uso: fake_ssh.py [opciones] equipo orden")
+    return args[0], " ".join(args[1:])
+
+
+def main():
+    host, command = parse_args(sys.argv[1:])
+    name = host.rsplit("@", 1)[-1]
+    delay = float(os.environ.get("FAKE_SSH_DELAY", "0.2"))
+    forced_failures = [h for h in os.environ.get("FAKE_SSH_FAIL", "").split(",") if h]
+
+    if "down" in name:
+        print(f"ssh: connect to host {name} port 22: No route to host", file=sys.stderr)
+        return 255
+    if os.environ.get("FAKE_SSH_EXEC") == "1":
+        return subprocess.run(["sh", "-c", command]).returncode
+    time.sleep(delay * random.uniform(0.5, 1.5))
+    if "hang" in name:
+        time.sleep(float(os.environ.get("FAKE_SSH_HANG", "3600")))
+
+    failed = "fail" in name or name in forced_failures
+    busy = "busy" in name
+    current = "current" in name
+    upgrade = None if "unknown" in name else not current
+    changes = {"version": "41.20241018.0", "diff": "12 upgraded, 1 added"} if upgrade else {}
+    if busy:
+        rcode, log = 75, ["Ya se está ejecutando una actualización."]
+    elif failed:
+        rcode, log = 1, ["Aplicando rebase a la imagen: fedora:fedora/41/x86_64/silverblue",
+                         "error: Transaction failed (simulado)"]
+    elif current:
+        rcode, log = 0, ["El sistema está al día; no hay nada que descargar."]
+    elif upgrade is None:
+        rcode, log = 0, ["Pendiente: no se pudo comprobar si hay actualización (se intentará igualmente)."]
+    else:
+        rcode, log = 0, [f"Pendiente: actualización a {changes['version']}, {changes['diff']}."]
+    plan = {"upgrade": upgrade, "rebase": None, "changes": changes, "download": None}
+    for line in log:
+        print(line, file=sys.stderr)
+    report = {"command": "update", "ok": rcode == 0, "exit_code": rcode, "duration": delay, "log": log}
+    if not busy:
+        report["plan"] = plan
+    print(json.dumps(report, ensure_ascii=False))
+    return rcode
+
+
+if __name__ == "__main__":
+    sys.exit(main())
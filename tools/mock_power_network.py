@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# Imitación de UPower, NetworkManager y del IdleMonitor de Mutter en el bus de
+# sesión, para probar la descarga anticipada (treeos_staging.py) sin cambiar de
+# batería, de red ni esperar minutos de inactividad.
+#
+#   python3 tools/mock_power_network.py [--on-battery] [--metered N] [--idle S]
+#   TREEOS_STAGING_BUS=session python3 treeos-control/treeos_staging.py
+#
+# --metered sigue NMMetered: 0 desconocido, 1 sí, 2 no, 3 probablemente sí, 4 probablemente no.
+# Con --no-idle-monitor no se suplanta a Mutter (p. ej. dentro de una sesión GNOME real).
+import argparse, sys
+from gi.repository import Gio, GLib
+
+INTROSPECTION = Gio.DBusNodeInfo.new_for_xml("""
+<node>
+  <interface name="org.freedesktop.UPower">
+    <property name="OnBattery" type="b" access="read"/>
+  </interface>
+  <interface name="org.freedesktop.NetworkManager">
+    <property name="Metered" type="u" access="read"/>
+  </interface>
+  <interface name="org.gnome.Mutter.IdleMonitor">
+    <method name="GetIdletime"><arg type="t" direction="out"/></method>
+  </interface>
+</node>
+""")
+UPOWER_INFO, NM_INFO, IDLE_INFO = INTROSPECTION.interfaces
+
+SERVICES = [
+    ("org.freedesktop.UPower", "/org/freedesktop/UPower", UPOWER_INFO),
+    ("org.freedesktop.NetworkManager", "/org/freedesktop/NetworkManager", NM_INFO),
+    ("org.gnome.Mutter.IdleMonitor", "/org/gnome/Mutter/IdleMonitor/Core", IDLE_INFO),
+]
+
+
+class MockServices:
+    def __init__(self, args):
+        self.args = args
+
+    def on_get_property(self, connection, sender, path, iface, name):
+        if name == "OnBattery":
+            return GLib.Variant("b", self.args.on_battery)
+        if name == "Metered":
+            return GLib.Variant("u", self.args.metered)
+        return None
+
+    def on_method_call(self, connection, sender, path, iface, method, params, invocation):
+        if method == "GetIdletime":
+            invocation.return_value(GLib.Variant("(t)", (self.args.idle * 1000,)))
+
+    def own(self, bus_name, path, info):
+        def on_bus_acquired(connection, name):
+            connection.register_object(path, info, self.on_method_call, self.on_get_property, None)
+        Gio.bus_own_name(Gio.BusType.SESSION, bus_name, Gio.BusNameOwnerFlags.NONE,
+                         on_bus_acquired, None, lambda *a: sys.exit("No se pudo obtener " + bus_name))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="UPower/NetworkManager/IdleMonitor simulados")
+    parser.add_argument("--on-battery", action="store_true", help="simular funcionamiento con batería")
+    parser.add_argument("--metered", type=int, default=2, help="valor NMMetered (por defecto 2: no medida)")
+    parser.add_argument("--idle", type=int, default=600, help="segundos de inactividad (por defecto 600)")
+    parser.add_argument("--no-idle-monitor", action="store_true", help="no suplantar a Mutter")
+    args = parser.parse_args()
+
+    services = MockServices(args)
+    for bus_name, path, info in SERVICES:
+        if info is IDLE_INFO and args.no_idle_monitor:
+            continue
+        services.own(bus_name, path, info)
+    GLib.MainLoop().run()
+
+
+if __name__ == "__main__":
+    main()
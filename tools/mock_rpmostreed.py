@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# Imitación mínima de rpmostreed en el bus de sesión para probar el motor D-Bus
+# de actualizaciones sin un sistema Silverblue.
+#
+#   python3 tools/mock_rpmostreed.py [--steps N] [--interval MS] [--fail]
+#   TREEOS_RPMOSTREE_BUS=session python3 treeos-control/treeos-control.py
+#
+# Cada UpdateDeployment abre un servidor D-Bus privado (como el demonio real),
+# devuelve su dirección y, tras Start(), emite Message/DownloadProgress/
+# PercentProgress hasta Finished. Cancel() termina con Finished(false, ...).
+import argparse, sys, tempfile
+from gi.repository import Gio, GLib
+
+BUS_NAME = "org.projectatomic.rpmostree1"
+SYSROOT_PATH = "/org/projectatomic/rpmostree1/Sysroot"
+OS_PATH = "/org/projectatomic/rpmostree1/fedora"
+
+INTROSPECTION = Gio.DBusNodeInfo.new_for_xml("""
+<node>
+  <interface name="org.projectatomic.rpmostree1.Sysroot">
+    <method name="RegisterClient"><arg type="a{sv}" direction="in"/></method>
+    <method name="UnregisterClient"><arg type="a{sv}" direction="in"/></method>
+    <method name="GetOS">
+      <arg type="s" direction="in"/><arg type="o" direction="out"/>
+    </method>
+    <property name="Booted" type="o" access="read"/>
+  </interface>
+  <interface name="org.projectatomic.rpmostree1.OS">
+    <method name="UpdateDeployment">
+      <arg type="a{sv}" name="modifiers" direction="in"/>
+      <arg type="a{sv}" name="options" direction="in"/>
+      <arg type="s" name="transaction_address" direction="out"/>
+    </method>
+  </interface>
+  <interface name="org.projectatomic.rpmostree1.Transaction">
+    <method name="Start"><arg type="b" direction="out"/></method>
+    <method name="Cancel"/>
+    <signal name="Message"><arg type="s"/></signal>
+    <signal name="TaskBegin"><arg type="s"/></signal>
+    <signal name="TaskEnd"><arg type="s"/></signal>
+    <signal name="PercentProgress"><arg type="s"/><arg type="u"/></signal>
+    <signal name="DownloadProgress">
+      <arg type="(tt)"/><arg type="(uu)"/><arg type="(uuu)"/>
+      <arg type="(uuut)"/><arg type="(uu)"/><arg type="(tt)"/>
+    </signal>
+    <signal name="ProgressEnd"/>
+    <signal name="Finished"><arg type="b"/><arg type="s"/></signal>
+  </interface>
+</node>
+""")
+SYSROOT_INFO, OS_INFO, TRANSACTION_INFO = INTROSPECTION.interfaces
+
+
+class MockTransaction:
+    def __init__(self, args, modifiers, options):
+        self.args = args
+        self.modifiers = modifiers
+        self.options = options
+        self.connections = []
+        self.step = 0
+        self.timeout_id = None
+        self.server = Gio.DBusServer.new_sync(
+            f"unix:tmpdir={tempfile.gettempdir()}", Gio.DBusServerFlags.NONE,
+            Gio.dbus_generate_guid(), None, None)
+        self.server.connect("new-connection", self.on_new_connection)
+        self.server.start()
+
+    @property
+    def address(self):
+        return self.server.get_client_address()
+
+    def on_new_connection(self, server, connection):
+        connection.register_object("/", TRANSACTION_INFO, self.on_method_call, None, None)
+        self.connections.append(connection)
+        return True
+
+    def emit(self, name, signature=None, values=None):
+        params = GLib.Variant(signature, values) if signature else None
+        for connection in self.connections:
+            if not connection.is_closed():
+                connection.emit_signal(None, "/", TRANSACTION_INFO.name, name, params)
+
+    def on_method_call(self, connection, sender, path, iface, method, params, invocation):
+        if method == "Start":
+            started = self.timeout_id is None and self.step == 0
+            if started:
+                refspec = self.modifiers.get("set-refspec")
+                self.emit("Message", "(s)", (f"Rebasing to {refspec}" if refspec else "Checking for updates",))
+                self.emit("TaskBegin", "(s)", ("Receiving objects",))
+                self.timeout_id = GLib.timeout_add(self.args.interval, self.on_tick)
+            invocation.return_value(GLib.Variant("(b)", (started,)))
+        elif method == "Cancel":
+            invocation.return_value(None)
+            self.finish(False, "Operation was cancelled")
+
+    def on_tick(self):
+        self.step += 1
+        total_bytes = self.args.steps * 4 * 1024 * 1024
+        transferred = total_bytes * self.step // self.args.steps
+        self.emit("DownloadProgress", "((tt)(uu)(uuu)(uuut)(uu)(tt))", (
+            (0, self.step), (self.args.steps - self.step, 0), (0, 0, 0),
+            (0, 0, 0, 0), (self.step, self.args.steps), (transferred, 4 * 1024 * 1024)))
+        if self.step < self.args.steps:
+            return GLib.SOURCE_CONTINUE
+        self.emit("ProgressEnd")
+        self.emit("PercentProgress", "(su)", ("Writing objects", 100))
+        self.timeout_id = None
+        if self.args.fail:
+            self.finish(False, "Simulated failure")
+        else:
+            self.emit("Message", "(s)", ("Staging deployment...done",))
+            self.finish(True, "")
+        return GLib.SOURCE_REMOVE
+
+    def finish(self, success, message):
+        if self.timeout_id is not None:
+            GLib.source_remove(self.timeout_id)
+            self.timeout_id = None
+        self.emit("Finished", "(bs)", (success, message))
+        GLib.timeout_add(500, self.close)
+
+    def close(self):
+        for connection in self.connections:
+            connection.close(None, None, None)
+        self.server.stop()
+        return GLib.SOURCE_REMOVE
+
+
+class MockDaemon:
+    def __init__(self, args):
+        self.args = args
+        self.transactions = []
+
+    def on_bus_acquired(self, connection, name):
+        connection.register_object(SYSROOT_PATH, SYSROOT_INFO, self.on_sysroot_call, self.on_get_property, None)
+        connection.register_object(OS_PATH, OS_INFO, self.on_os_call, None, None)
+
+    def on_get_property(self, connection, sender, path, iface, name):
+        if name == "Booted":
+            return GLib.Variant("o", OS_PATH)
+        return None
+
+    def on_sysroot_call(self, connection, sender, path, iface, method, params, invocation):
+        if method == "GetOS":
+            invocation.return_value(GLib.Variant("(o)", (OS_PATH,)))
+        else:
+            invocation.return_value(None)
+
+    def on_os_call(self, connection, sender, path, iface, method, params, invocation):
+        modifiers, options = params.unpack()
+        print(f"{method} modifiers={modifiers} options={options}", flush=True)
+        transaction = MockTransaction(self.args, modifiers, options)
+        self.transactions.append(transaction)
+        invocation.return_value(GLib.Variant("(s)", (transaction.address,)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="rpmostreed simulado en el bus de sesión")
+    parser.add_argument("--steps", type=int, default=20, help="pasos de descarga simulados")
+    parser.add_argument("--interval", type=int, default=250, help="milisegundos entre pasos")
+    parser.add_argument("--fail", action="store_true", help="terminar las transacciones con error")
+    args = parser.parse_args()
+
+    daemon = MockDaemon(args)
+    Gio.bus_own_name(Gio.BusType.SESSION, BUS_NAME, Gio.BusNameOwnerFlags.NONE,
+                     daemon.on_bus_acquired, None, lambda *a: sys.exit("No se pudo obtener " + BUS_NAME))
+    GLib.MainLoop().run()
+
+
+if __name__ == "__main__":
+    main()
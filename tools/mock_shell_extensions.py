@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# Imitación de org.gnome.Shell.Extensions en el bus de sesión, para probar el
+# cambio de tema (treeos_extensions.py) sin GNOME Shell:
+#
+#   dbus-run-session -- sh -c '
+#     python3 tools/mock_shell_extensions.py --theme modern --latency 20 &
+#     sleep 0.5; python3 tools/mock_shell_extensions.py --bench 20'
+#
+# --latency simula lo que tarda la shell en habilitar o deshabilitar una
+# extensión. Con --bench (en otro proceso) se compara el lote por D-Bus con las
+# tres órdenes "gnome-extensions" de antes; para éstas se usa un sustituto que
+# hace la misma llamada D-Bus, así que la diferencia es el coste de los procesos.
+import argparse, os, statistics, subprocess, sys, tempfile, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "treeos-control"))
+
+from gi.repository import Gio, GLib
+from treeos_extensions import (THEMES, SHELL_EXTENSIONS_BUS, SHELL_EXTENSIONS_PATH, STATE_ENABLED,
+                               apply_theme, detect_theme, parse_extensions)
+
+STATE_DISABLED = 2
+
+INTROSPECTION = Gio.DBusNodeInfo.new_for_xml("""
+<node>
+  <interface name="org.gnome.Shell.Extensions">
+    <method name="ListExtensions"><arg type="a{sa{sv}}" direction="out"/></method>
+    <method name="EnableExtension"><arg type="s" direction="in"/><arg type="b" direction="out"/></method>
+    <method name="DisableExtension"><arg type="s" direction="in"/><arg type="b" direction="out"/></method>
+    <signal name="ExtensionStateChanged"><arg type="s"/><arg type="a{sv}"/></signal>
+  </interface>
+</node>
+""")
+EXTENSIONS_INFO = INTROSPECTION.interfaces[0]
+
+# Equivalente de "gnome-extensions enable|disable UUID" para la comparación.
+CLI_STUB = f"""#!/usr/bin/env python3
+import sys
+from gi.repository import Gio, GLib
+action, uuid = sys.argv[1], sys.argv[2]
+bus = Gio.bus_get_sync(Gio.BusType.SESSION, None)
+bus.call_sync("{SHELL_EXTENSIONS_BUS}", "{SHELL_EXTENSIONS_PATH}", "{SHELL_EXTENSIONS_BUS}",
+              action.capitalize() + "Extension", GLib.Variant("(s)", (uuid,)), None,
+              Gio.DBusCallFlags.NONE, -1, None)
+"""
+
+
+class MockShellExtensions:
+    def __init__(self, enabled, latency_ms):
+        uuids = {uuid for disable, enable in THEMES.values() for uuid in disable + enable}
+        self.enabled = {uuid: uuid in enabled for uuid in uuids}
+        self.latency_ms = latency_ms
+        self.connection = None
+
+    def info(self, uuid):
+        enabled = self.enabled[uuid]
+        return {"uuid": GLib.Variant("s", uuid), "enabled": GLib.Variant("b", enabled),
+                "state": GLib.Variant("d", STATE_ENABLED if enabled else STATE_DISABLED)}
+
+    def on_method_call(self, connection, sender, path, iface, method, params, invocation):
+        if method == "ListExtensions":
+            extensions = {uuid: self.info(uuid) for uuid in self.enabled}
+            invocation.return_value(GLib.Variant("(a{sa{sv}})", (extensions,)))
+            return
+        uuid, = params.unpack()
+        if uuid not in self.enabled:
+            invocation.return_value(GLib.Variant("(b)", (False,)))
+            return
+
+        def reply():
+            self.enabled[uuid] = method == "EnableExtension"
+            connection.emit_signal(None, SHELL_EXTENSIONS_PATH, SHELL_EXTENSIONS_BUS, "ExtensionStateChanged",
+                                   GLib.Variant("(sa{sv})", (uuid, self.info(uuid))))
+            invocation.return_value(GLib.Variant("(b)", (True,)))
+            return GLib.SOURCE_REMOVE
+        GLib.timeout_add(self.latency_ms, reply)
+
+    def own(self):
+        def on_bus_acquired(connection, name):
+            self.connection = connection
+            connection.register_object(SHELL_EXTENSIONS_PATH, EXTENSIONS_INFO, self.on_method_call, None, None)
+        Gio.bus_own_name(Gio.BusType.SESSION, SHELL_EXTENSIONS_BUS, Gio.BusNameOwnerFlags.NONE,
+                         on_bus_acquired, None, lambda *a: sys.exit("No se pudo obtener " + SHELL_EXTENSIONS_BUS))
+
+
+def current_theme():
+    bus = Gio.bus_get_sync(Gio.BusType.SESSION, None)
+    reply = bus.call_sync(SHELL_EXTENSIONS_BUS, SHELL_EXTENSIONS_PATH, SHELL_EXTENSIONS_BUS, "ListExtensions",
+                          None, GLib.VariantType("(a{sa{sv}})"), Gio.DBusCallFlags.NONE, -1, None)
+    return detect_theme(parse_extensions(reply))
+
+
+def bench(repeticiones):
+    with tempfile.TemporaryDirectory() as tmp:
+        stub = os.path.join(tmp, "gnome-extensions")
+        with open(stub, "w") as f:
+            f.write(CLI_STUB)
+        os.chmod(stub, 0o755)
+        env = dict(os.environ, PATH=f"{tmp}:{os.environ['PATH']}")
+        shell, dbus = [], []
+        for i in range(repeticiones):
+            theme = ("traditional", "modern")[i % 2]
+            disable, enable = THEMES[theme]
+            comando = " && ".join([f"gnome-extensions disable {uuid} || true" for uuid in disable] +
+                                  [f"gnome-extensions enable {uuid} || true" for uuid in enable])
+            inicio = time.perf_counter()
+            subprocess.run(comando, shell=True, env=env, check=True)
+            shell.append(time.perf_counter() - inicio)
+            assert current_theme() == theme
+
+            theme = ("modern", "traditional")[i % 2]
+            inicio = time.perf_counter()
+            errors = apply_theme(theme)
+            dbus.append(time.perf_counter() - inicio)
+            assert not errors and current_theme() == theme, errors
+    for nombre, valores in (("gnome-extensions (3 procesos)", shell), ("lote D-Bus", dbus)):
+        print(f"{nombre:32} {statistics.median(valores) * 1000:8.1f} ms (mediana de {repeticiones})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="org.gnome.Shell.Extensions simulado")
+    parser.add_argument("--theme", choices=sorted(THEMES), help="tema habilitado al arrancar")
+    parser.add_argument("--latency", type=int, default=10, help="ms por cada habilitar/deshabilitar")
+    parser.add_argument("--bench", type=int, metavar="N", help="medir contra un servicio ya en marcha")
+    args = parser.parse_args()
+
+    if args.bench:
+        bench(args.bench)
+        return
+    enabled = THEMES[args.theme][1] if args.theme else []
+    MockShellExtensions(enabled, args.latency).own()
+    GLib.MainLoop().run()
+
+
+if __name__ == "__main__":
+    main()
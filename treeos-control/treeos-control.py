@@ -1,10 +1,35 @@
 #!/usr/bin/env python3
+import sys
+from treeos_trace import tracer, now_us, StallWatchdog  # primero: marca el inicio del proceso
+
+# Modo sin interfaz gráfica: treeos-control.py --cli <orden> (ver treeos_cli.py).
+if __name__ == "__main__" and sys.argv[1:2] == ["--cli"]:
+    from treeos_cli import main
+    sys.exit(main(sys.argv[2:]))
+
+from treeos_launch import APP_ID, forward_to_running_instance
+
+# Segunda instancia: se activa la ventana existente antes de importar GTK.
+if __name__ == "__main__" and forward_to_running_instance(APP_ID):
+    sys.exit(0)
+
 import gi
 gi.require_version("Gtk", "4.0")
 gi.require_version("GdkPixbuf", "2.0")
-from gi.repository import Gtk, GLib, GdkPixbuf
-import subprocess, os, threading, sys, fcntl, re, shutil
-from datetime import datetime
+from gi.repository import Gtk, Gio, GLib, GdkPixbuf
+import subprocess, os, threading
+from treeos_thumbnails import ThumbnailCache
+from treeos_log import LogSink
+from treeos_config import config_store, read_config, write_config
+from treeos_updates import acquire_update_lock, release_update_lock, update_engine
+from treeos_rpmostree import RESULT_CANCELLED
+from treeos_toolbox import container_state, ensure_toolbox_exists
+from treeos_apps import APPS_DESKTOP, app_index
+from treeos_core import update_system, install_app, uninstall_app, install_apps, restore_toolbox
+import treeos_wallpapers
+from treeos_extensions import apply_theme_async, list_extensions_async, detect_theme
+
+tracer.complete("importar módulos", "startup", 0, now_us())
 
 # ========================================
 # RUTAS, CONFIGURACIONES Y VARIABLES
@@ -12,10 +37,7 @@ from datetime import datetime
 
 # Directorios est�ndar para un RPM instalable
 RESOURCE_DIR = "/usr/share/treeos-control"   # Recursos de solo lectura (im�genes, manual, wallpapers, etc.)
-CONFIG_DIR = "/etc/treeos-control"             # Configuraci�n global (archivos modificables)
-DESKTOP_DIR  = "/usr/share/applications"        # Ubicaci�n global para archivos .desktop
 
-CONFIG_FILE   = os.path.join(CONFIG_DIR, "update_config.conf")
 MANUAL_FILE   = os.path.join(RESOURCE_DIR, "treeosmanual.pdf")
 APP_ICON      = os.path.join(RESOURCE_DIR, "logo.gif")
 WALLPAPERS_DIR= os.path.join(RESOURCE_DIR, "wallpapers")
@@ -24,177 +46,30 @@ WINDOW_WIDTH = 750
 WINDOW_HEIGHT = 600
 SMALL_IMAGE_SIZE = 150
 WALLPAPER_IMAGE_SIZE = 150
+WALLPAPER_COLUMNS = 3
+WALLPAPER_EXTENSIONS = (".webp", ".png", ".jpg", ".jpeg")
+THUMBNAIL_SCALE = 2  # Miniaturas al doble de resolución para pantallas HiDPI
 MARGIN = 10
 
-LOCK_FILE = "/tmp/treeos_update.lock"  # usado para actualizaciones
-
-DEFAULT_CONFIG = {
-    "AUTO_UPDATES_ENABLED": True,
-    "CHECK_FREQUENCY": "daily",  # daily, weekly, monthly
-    "EXTENSIONES_HABILITADAS": False,
-    "FIRST_BOOT": True,
-    "LAST_UPDATE_CHECK": 0,
-    "STORED_VERSION": ""
-}
-
-# Diccionario de apps para .desktop:
-APPS_DESKTOP = {
-    "pycharm": {
-        "package": "pycharm-community",
-        "desktop_file": "pycharm-treeossecure.desktop",
-        "name": "PyCharm (Toolbox)",
-        "comment": "IDE for Python Development",
-        "icon": "pycharm"
-    },
-    "vscode": {
-        "package": "code",
-        "desktop_file": "vscode-treeossecure.desktop",
-        "name": "VS Code (Toolbox)",
-        "comment": "Code Editor",
-        "icon": "code"
-    },
-    "anaconda": {
-        "package": "anaconda",
-        "desktop_file": "anaconda-treeossecure.desktop",
-        "name": "Anaconda (Toolbox)",
-        "comment": "Python Distribution",
-        "icon": "anaconda"
-    }
-}
+DETAILS_MAX_LINES = 5000  # Líneas máximas en las vistas de progreso
+UPDATE_RUN_KINDS = ("update", "scheduled-update", "rebase", "stage")  # Historial mostrado en Actualizaciones
+SECURE_RUN_KINDS = ("install", "uninstall", "batch-install", "restore")  # Historial mostrado en TreeOS Secure
+LOG_STATS = bool(os.environ.get("TREEOS_LOG_STATS"))  # Mostrar métricas del registro al terminar cada tarea
+PREBUILD_PAGES_ON_IDLE = True  # Construir las páginas restantes tras mostrar la ventana
+
 
 # ----------------------------------------
-# Funci�n auxiliar para detectar instalaci�n
+# Funci�n auxiliar para listar los fondos disponibles
 # ----------------------------------------
-def is_app_installed(app_key):
-    data = APPS_DESKTOP[app_key]
-    desktop_path = os.path.join(DESKTOP_DIR, data['desktop_file'])
-    return os.path.exists(desktop_path)
-
-# ========================================
-# FUNCIONES DE CONFIGURACI�N
-# ========================================
-def read_config():
-    config = DEFAULT_CONFIG.copy()
-    if os.path.isfile(CONFIG_FILE) and os.path.getsize(CONFIG_FILE) > 0:
-        with open(CONFIG_FILE) as f:
-            for line in f:
-                line = line.strip()
-                if "=" in line and line:
-                    try:
-                        key, value = line.split("=", 1)
-                        key, value = key.strip(), value.strip()
-                        if key in ["AUTO_UPDATES_ENABLED", "EXTENSIONES_HABILITADAS", "FIRST_BOOT"]:
-                            config[key] = (value.lower() == "true")
-                        elif key == "LAST_UPDATE_CHECK":
-                            config[key] = int(value)
-                        else:
-                            config[key] = value
-                    except ValueError:
-                        print(f"L�nea malformada: {line}")
-    else:
-        print("Archivo de configuraci�n no encontrado o vac�o. Usando valores por defecto.")
-    return config
-
-def write_config(auto_updates_enabled=None, check_frequency=None, extensiones_habilitadas=None,
-                 first_boot=None, last_update_check=None, stored_version=None):
-    def sed_replace(key, val):
-        return f"sed -i 's|^{key}=.*|{key}={val}|' {CONFIG_FILE}"
-    if not os.path.isfile(CONFIG_FILE) or os.path.getsize(CONFIG_FILE) == 0:
-        with open(CONFIG_FILE, 'w') as f:
-            f.write(f"AUTO_UPDATES_ENABLED={str(auto_updates_enabled if auto_updates_enabled is not None else DEFAULT_CONFIG['AUTO_UPDATES_ENABLED']).lower()}\n")
-            f.write(f"CHECK_FREQUENCY={check_frequency if check_frequency is not None else DEFAULT_CONFIG['CHECK_FREQUENCY']}\n")
-            f.write(f"EXTENSIONES_HABILITADAS={str(extensiones_habilitadas if extensiones_habilitadas is not None else DEFAULT_CONFIG['EXTENSIONES_HABILITADAS']).lower()}\n")
-            f.write(f"FIRST_BOOT={str(first_boot if first_boot is not None else DEFAULT_CONFIG['FIRST_BOOT']).lower()}\n")
-            f.write(f"LAST_UPDATE_CHECK={last_update_check if last_update_check is not None else DEFAULT_CONFIG['LAST_UPDATE_CHECK']}\n")
-            f.write(f"STORED_VERSION={stored_version.strip() if stored_version is not None else DEFAULT_CONFIG['STORED_VERSION']}\n")
-        print("Archivo de configuraci�n creado con valores por defecto.")
-        return
-    if auto_updates_enabled is not None:
-        subprocess.run(sed_replace("AUTO_UPDATES_ENABLED", str(auto_updates_enabled).lower()), shell=True)
-    if check_frequency is not None:
-        subprocess.run(sed_replace("CHECK_FREQUENCY", check_frequency), shell=True)
-    if extensiones_habilitadas is not None:
-        subprocess.run(sed_replace("EXTENSIONES_HABILITADAS", str(extensiones_habilitadas).lower()), shell=True)
-    if first_boot is not None:
-        subprocess.run(sed_replace("FIRST_BOOT", str(first_boot).lower()), shell=True)
-    if last_update_check is not None:
-        subprocess.run(sed_replace("LAST_UPDATE_CHECK", str(last_update_check)), shell=True)
-    if stored_version is not None:
-        subprocess.run(sed_replace("STORED_VERSION", stored_version.strip()), shell=True)
-    print("Configuraci�n guardada.")
-
-# ========================================
-# FUNCIONES DE SUBPROCESOS Y EJECUCI�N
-# ========================================
-def ejecutar_comando_captura(comando, callback_line=None):
-    process = subprocess.Popen(comando, shell=True,
-                               stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-                               text=True)
-    for line in iter(process.stdout.readline, ''):
-        if callback_line:
-            callback_line(line.rstrip())
-    process.stdout.close()
-    process.wait()
-    return process.returncode
-
-def apply_updates_py(callback_line):
-    return ejecutar_comando_captura("rpm-ostree upgrade", callback_line)
-
-def check_silverblue_version_py(callback_line):
-    latest_release_path = os.path.join(RESOURCE_DIR, "latest-release")
-    if os.path.isfile(latest_release_path):
-        with open(latest_release_path) as f:
-            latest_release = f.read().strip()
-    else:
-        latest_release = ""
-    
-    extracted_version = None
-    if latest_release:
-        m = re.search(r'/(\d+)/', latest_release)
-        if m:
-            extracted_version = m.group(1)
-    
-    current_version = ""
-    try:
-        with open("/etc/os-release") as f:
-            for line in f:
-                if line.startswith("VERSION_ID="):
-                    current_version = line.split("=")[1].strip().strip('"')
-                    break
-    except Exception as e:
-        callback_line(f"Error al obtener la versi�n actual de Fedora: {e}")
-    
-    config = read_config()
-    stored_version = config.get("STORED_VERSION", "").strip()
-    
-    if latest_release and latest_release != stored_version:
-        if extracted_version is not None:
-            if extracted_version == current_version:
-                callback_line("No hay nuevas versiones de Silverblue disponibles.")
-                return
-        callback_line(f"Aplicando rebase a la imagen: {latest_release}")
-        rcode = ejecutar_comando_captura(f"rpm-ostree rebase {latest_release}", callback_line)
-        if rcode == 0:
-            callback_line(f"Rebase completado a la imagen: {latest_release}")
-            write_config(stored_version=latest_release)
-        else:
-            callback_line(f"Error al aplicar rebase a {latest_release}.")
-    else:
-        callback_line("No hay nuevas versiones de Silverblue disponibles.")
-
-def ensure_toolbox_exists(callback_line=None):
+def list_wallpapers(directory=WALLPAPERS_DIR):
     try:
-        output = subprocess.check_output("toolbox list", shell=True, text=True)
-        if "treeossecure" not in output:
-            if callback_line:
-                callback_line("Contenedor 'treeossecure' no encontrado. Cre�ndolo autom�ticamente...")
-            subprocess.run("podman pull --quiet registry.fedoraproject.org/fedora-toolbox", shell=True, check=True)
-            subprocess.run("echo y | toolbox create -c treeossecure --image fedora-toolbox", shell=True, check=True)
-            if callback_line:
-                callback_line("Contenedor 'treeossecure' creado exitosamente.")
-    except subprocess.CalledProcessError as e:
-        if callback_line:
-            callback_line(f"Error al verificar/crear contenedor: {e}")
+        with os.scandir(directory) as entries:
+            paths = [entry.path for entry in entries
+                     if entry.is_file() and entry.name.lower().endswith(WALLPAPER_EXTENSIONS)]
+    except OSError as e:
+        print(f"No se pudo leer el directorio de fondos {directory}: {e}")
+        return []
+    return sorted(paths)
 
 # ========================================
 # CLASE DE LA VENTANA PRINCIPAL
@@ -205,6 +80,14 @@ class ControlPanelWindow(Gtk.ApplicationWindow):
         self.set_title("TreeOS Control Panel")
         self.set_default_size(WINDOW_WIDTH, WINDOW_HEIGHT)
         self.changing_theme = False
+        self.theme_switches_pending = 0
+        config_store.watch()
+        container_state.warm()
+        app_index.add_listener(lambda: GLib.idle_add(self.update_all_app_button_labels))
+        app_index.refresh_async()
+        self.details_log = LogSink(DETAILS_MAX_LINES)
+        self.secure_log = LogSink(DETAILS_MAX_LINES)
+        self.thumbnails = ThumbnailCache(max(SMALL_IMAGE_SIZE, WALLPAPER_IMAGE_SIZE) * THUMBNAIL_SCALE)
 
         if not os.path.isfile(APP_ICON):
             print(f"Icono no encontrado: {APP_ICON}")
@@ -229,12 +112,50 @@ class ControlPanelWindow(Gtk.ApplicationWindow):
         main_box.append(switcher)
         main_box.append(self.stack)
 
-        self.build_apariencia_page()
-        self.build_actualizaciones_page()
-        self.build_treeos_ayuda_page()
-        self.build_treeos_secure_page()
+        # Cada página se construye la primera vez que se muestra; hasta entonces
+        # el Gtk.Stack solo contiene un contenedor vacío.
+        self.pages = {}
+        self.add_lazy_page("Apariencia", self.build_apariencia_page)
+        self.add_lazy_page("Actualizaciones", self.build_actualizaciones_page)
+        self.add_lazy_page("TreeOS Ayuda", self.build_treeos_ayuda_page)
+        self.add_lazy_page("TreeOS Secure", self.build_treeos_secure_page)
+        self.stack.connect("notify::visible-child-name", self.on_visible_page_changed)
 
         self.stack.set_visible_child_name("Apariencia")
+        self.ensure_page_built("Apariencia")
+
+        if PREBUILD_PAGES_ON_IDLE:
+            self.connect("map", self.on_map_prebuild_pages)
+
+    def add_lazy_page(self, name, builder):
+        placeholder = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
+        placeholder.set_hexpand(True)
+        placeholder.set_vexpand(True)
+        self.pages[name] = {"placeholder": placeholder, "builder": builder, "built": False}
+        self.stack.add_titled(placeholder, name, name)
+
+    def ensure_page_built(self, name):
+        page = self.pages.get(name)
+        if page is None or page["built"]:
+            return
+        page["built"] = True
+        with tracer.span(f"construir página: {name}", "ui"):
+            page["placeholder"].append(page["builder"]())
+
+    def on_visible_page_changed(self, stack, pspec):
+        self.ensure_page_built(stack.get_visible_child_name())
+
+    def on_map_prebuild_pages(self, widget):
+        # Prioridad baja: se ejecuta cuando el bucle principal no tiene nada que
+        # dibujar, una página por iteración para no bloquear la interfaz.
+        GLib.idle_add(self._prebuild_next_page, priority=GLib.PRIORITY_LOW)
+
+    def _prebuild_next_page(self):
+        for name, page in self.pages.items():
+            if not page["built"]:
+                self.ensure_page_built(name)
+                return GLib.SOURCE_CONTINUE
+        return GLib.SOURCE_REMOVE
 
     def build_apariencia_page(self):
         box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=MARGIN)
@@ -256,8 +177,7 @@ class ControlPanelWindow(Gtk.ApplicationWindow):
         vbox_traditional = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=5)
         img_traditional_path = os.path.join(RESOURCE_DIR, "traditional.png")
         if os.path.isfile(img_traditional_path):
-            img_traditional = Gtk.Image.new_from_file(img_traditional_path)
-            img_traditional.set_pixel_size(SMALL_IMAGE_SIZE)
+            img_traditional = self.crear_miniatura(img_traditional_path, SMALL_IMAGE_SIZE)
             vbox_traditional.append(img_traditional)
         label_traditional = Gtk.Label(label="Traditional")
         vbox_traditional.append(label_traditional)
@@ -269,50 +189,103 @@ class ControlPanelWindow(Gtk.ApplicationWindow):
         vbox_modern = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=5)
         img_modern_path = os.path.join(RESOURCE_DIR, "modern.png")
         if os.path.isfile(img_modern_path):
-            img_modern = Gtk.Image.new_from_file(img_modern_path)
-            img_modern.set_pixel_size(SMALL_IMAGE_SIZE)
+            img_modern = self.crear_miniatura(img_modern_path, SMALL_IMAGE_SIZE)
             vbox_modern.append(img_modern)
         label_modern = Gtk.Label(label="Modern")
         vbox_modern.append(label_modern)
         self.toggle_modern.set_child(vbox_modern)
         self.toggle_modern.connect("toggled", self.on_modern_toggled)
         theme_box.append(self.toggle_modern)
+        list_extensions_async(self.on_extensions_listed)
 
         box.append(theme_frame)
 
         wallpaper_frame = Gtk.Frame(label="Fondos Oficiales de TreeOS")
-        wallpaper_box = Gtk.Grid()
-        wallpaper_box.set_row_spacing(MARGIN)
-        wallpaper_box.set_column_spacing(MARGIN)
-        wallpaper_box.set_margin_top(MARGIN)
-        wallpaper_box.set_margin_bottom(MARGIN)
-        wallpaper_box.set_margin_start(MARGIN)
-        wallpaper_box.set_margin_end(MARGIN)
-        wallpaper_box.set_halign(Gtk.Align.CENTER)
-
-        num_wallpapers = 6
-        cols = 3
-        for i in range(1, num_wallpapers + 1):
-            btn = Gtk.Button()
-            wallpaper_path = os.path.join(WALLPAPERS_DIR, f"treeoswallpaper{i:02d}.webp")
-            if not os.path.isfile(wallpaper_path):
-                continue
-            img_wallpaper = Gtk.Image.new_from_file(wallpaper_path)
-            img_wallpaper.set_pixel_size(WALLPAPER_IMAGE_SIZE)
-            btn.set_child(img_wallpaper)
-            btn.set_tooltip_text(f"Fondo {i}")
-            btn.connect("clicked", self.seleccionar_fondo, wallpaper_path)
-            col = (i - 1) % cols
-            row = (i - 1) // cols
-            wallpaper_box.attach(btn, col, row, 1, 1)
-        wallpaper_frame.set_child(wallpaper_box)
+        # Galería virtualizada: Gtk.GridView solo crea (y recicla) las celdas
+        # visibles, así que únicamente se cargan las miniaturas en pantalla.
+        wallpapers = list_wallpapers()
+        self.wallpaper_model = Gtk.StringList.new(wallpapers)
+        self.wallpaper_requests = {}
+        factory = Gtk.SignalListItemFactory()
+        factory.connect("setup", self.on_wallpaper_item_setup)
+        factory.connect("bind", self.on_wallpaper_item_bind)
+        factory.connect("unbind", self.on_wallpaper_item_unbind)
+        wallpaper_grid = Gtk.GridView(model=Gtk.NoSelection(model=self.wallpaper_model), factory=factory)
+        wallpaper_grid.set_min_columns(1)
+        wallpaper_grid.set_max_columns(WALLPAPER_COLUMNS)
+        wallpaper_grid.set_single_click_activate(True)
+        wallpaper_grid.connect("activate", self.on_wallpaper_activated)
+
+        wallpaper_scrolled = Gtk.ScrolledWindow()
+        wallpaper_scrolled.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
+        wallpaper_scrolled.set_vexpand(True)
+        wallpaper_scrolled.set_min_content_height(2 * (WALLPAPER_IMAGE_SIZE + MARGIN))
+        wallpaper_scrolled.set_margin_top(MARGIN)
+        wallpaper_scrolled.set_margin_bottom(MARGIN)
+        wallpaper_scrolled.set_margin_start(MARGIN)
+        wallpaper_scrolled.set_margin_end(MARGIN)
+        wallpaper_scrolled.set_child(wallpaper_grid)
+        wallpaper_frame.set_child(wallpaper_scrolled)
         box.append(wallpaper_frame)
+        self.background_settings = Gio.Settings.new(treeos_wallpapers.BACKGROUND_SCHEMA)
 
         more_options_btn = Gtk.Button(label="Para m�s opciones de apariencia")
         more_options_btn.connect("clicked", lambda w: subprocess.Popen("gnome-control-center background", shell=True))
         box.append(more_options_btn)
 
-        self.stack.add_titled(box, "Apariencia", "Apariencia")
+        return box
+
+    def crear_miniatura(self, path, size):
+        image = Gtk.Image()
+        image.set_pixel_size(size)
+        self.cargar_miniatura(image, path)
+        return image
+
+    def cargar_miniatura(self, image, path):
+        # Las miniaturas en caché se cargan al momento; las que faltan se generan
+        # en segundo plano y sustituyen al icono provisional cuando están listas.
+        # Devuelve el callback pendiente (o None) para poder cancelarlo.
+        # image.miniatura_path indica qué ruta muestra la imagen: si la celda se
+        # recicla antes de que llegue la miniatura, la respuesta se descarta.
+        image.miniatura_path = path
+        cached = self.thumbnails.lookup(path)
+        if cached:
+            image.set_from_file(cached)
+            return None
+        image.set_from_icon_name("image-loading-symbolic")
+
+        def on_thumbnail_ready(thumb):
+            if thumb and getattr(image, "miniatura_path", None) == path:
+                image.set_from_file(thumb)
+
+        self.thumbnails.request(path, on_thumbnail_ready)
+        return on_thumbnail_ready
+
+    def on_wallpaper_item_setup(self, factory, list_item):
+        image = Gtk.Image()
+        image.set_pixel_size(WALLPAPER_IMAGE_SIZE)
+        image.set_margin_top(MARGIN // 2)
+        image.set_margin_bottom(MARGIN // 2)
+        list_item.set_child(image)
+
+    def on_wallpaper_item_bind(self, factory, list_item):
+        image = list_item.get_child()
+        path = list_item.get_item().get_string()
+        image.set_tooltip_text(os.path.splitext(os.path.basename(path))[0])
+        callback = self.cargar_miniatura(image, path)
+        if callback is not None:
+            self.wallpaper_requests[list_item] = (path, callback)
+
+    def on_wallpaper_item_unbind(self, factory, list_item):
+        pending = self.wallpaper_requests.pop(list_item, None)
+        if pending is not None:
+            self.thumbnails.cancel(*pending)
+        image = list_item.get_child()
+        image.miniatura_path = None  # la miniatura que aún esté en camino ya no es de esta celda
+        image.clear()
+
+    def on_wallpaper_activated(self, grid, position):
+        self.seleccionar_fondo(grid, self.wallpaper_model.get_string(position))
 
     def on_traditional_toggled(self, button):
         if self.changing_theme:
@@ -341,24 +314,45 @@ class ControlPanelWindow(Gtk.ApplicationWindow):
         self.changing_theme = False
 
     def activar_traditional(self):
-        comando = (
-            "gnome-extensions disable dash-to-dock@micxgx.gmail.com || true && "
-            "gnome-extensions enable blur-my-shell@aunetx || true && "
-            "gnome-extensions enable dash-to-panel@jderose9.github.com || true"
-        )
-        threading.Thread(target=ejecutar_comando_captura, args=(comando, None), daemon=True).start()
+        self.aplicar_tema("traditional")
 
     def activar_modern(self):
-        comando = (
-            "gnome-extensions disable dash-to-panel@jderose9.github.com || true && "
-            "gnome-extensions enable blur-my-shell@aunetx || true && "
-            "gnome-extensions enable dash-to-dock@micxgx.gmail.com || true"
-        )
-        threading.Thread(target=ejecutar_comando_captura, args=(comando, None), daemon=True).start()
+        self.aplicar_tema("modern")
+
+    def aplicar_tema(self, theme):
+        # Todas las llamadas del tema salen a la vez; las respuestas llegan al bucle principal.
+        start = now_us()
+        self.theme_switches_pending += 1
+
+        def on_done(errors):
+            self.theme_switches_pending -= 1
+            tracer.complete(f"aplicar tema {theme}", "ui", start, now_us() - start, {"errors": errors})
+            for error in errors:
+                print(f"Error al cambiar el tema: {error}")
+        apply_theme_async(theme, on_done)
+
+    def on_extensions_listed(self, states):
+        # Estado inicial de los botones según las extensiones habilitadas; si el
+        # usuario ya está cambiando de tema, la lista es anterior a su elección.
+        if self.theme_switches_pending:
+            return
+        theme = detect_theme(states) if states else None
+        self.changing_theme = True
+        self.toggle_traditional.set_active(theme == "traditional")
+        self.toggle_modern.set_active(theme == "modern")
+        self.changing_theme = False
 
     def seleccionar_fondo(self, button, wallpaper_path):
-        comando = f"gsettings set org.gnome.desktop.background picture-uri 'file://{wallpaper_path}'"
-        threading.Thread(target=ejecutar_comando_captura, args=(comando, None), daemon=True).start()
+        # El escalado (si no está ya en caché) en segundo plano; GSettings en el hilo principal.
+        def worker():
+            rendered = treeos_wallpapers.prepare(wallpaper_path)
+            GLib.idle_add(self.aplicar_fondo, rendered)
+        threading.Thread(target=worker, daemon=True).start()
+
+    def aplicar_fondo(self, rendered):
+        with tracer.span("aplicar fondo", "ui", {"path": rendered}):
+            treeos_wallpapers.apply(rendered, self.background_settings)
+        return GLib.SOURCE_REMOVE
 
     def build_actualizaciones_page(self):
         box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=6)
@@ -405,9 +399,19 @@ class ControlPanelWindow(Gtk.ApplicationWindow):
         self.btn_update_now.connect("clicked", self.on_actualizar_sistema)
         box.append(self.btn_update_now)
 
+        self.btn_cancel_update = Gtk.Button(label="Cancelar Actualizaci�n")
+        self.btn_cancel_update.set_sensitive(False)
+        self.btn_cancel_update.connect("clicked", self.on_cancelar_actualizacion)
+        box.append(self.btn_cancel_update)
+
         self.spinner = Gtk.Spinner()
         box.append(self.spinner)
 
+        self.update_progress = Gtk.ProgressBar()
+        self.update_progress.set_show_text(True)
+        self.update_progress.set_visible(False)
+        box.append(self.update_progress)
+
         self.img_complete = Gtk.Image.new_from_icon_name("emblem-default")
         self.img_complete.set_pixel_size(48)
         self.img_complete.set_visible(False)
@@ -425,9 +429,11 @@ class ControlPanelWindow(Gtk.ApplicationWindow):
         self.details_textview.set_editable(False)
         self.details_textview.set_wrap_mode(Gtk.WrapMode.WORD)
         self.details_scrolled.set_child(self.details_textview)
+        self.details_log.attach(self.details_textview)
+        self.details_log.load_history(UPDATE_RUN_KINDS)
         box.append(self.details_scrolled)
 
-        self.stack.add_titled(box, "Actualizaciones", "Actualizaciones")
+        return box
 
     def on_details_clicked(self, button):
         visible = not self.details_scrolled.get_visible()
@@ -435,46 +441,67 @@ class ControlPanelWindow(Gtk.ApplicationWindow):
         button.set_label("Ocultar Detalles" if visible else "Ver Detalles")
 
     def on_actualizar_sistema(self, button):
-        if os.path.exists(LOCK_FILE):
+        if not acquire_update_lock():
             self.append_details_text("�Ya se est� ejecutando una actualizaci�n! Espere a que finalice.")
             return
-        with open(LOCK_FILE, "w") as f:
-            f.write(str(os.getpid()))
         self.btn_update_now.set_sensitive(False)
+        self.btn_cancel_update.set_sensitive(True)
         self.spinner.start()
         self.img_complete.set_visible(False)
-        self.clear_details_text()
+        self.update_progress.set_fraction(0)
+        self.update_progress.set_text("")
+        self.update_progress.set_visible(False)
+        self.start_details_run("update")
         self.append_details_text("Iniciando actualizaci�n manual...")
         t = threading.Thread(target=self.procesar_actualacion, daemon=True)
         t.start()
 
     def procesar_actualacion(self):
+        rcode = None
         try:
-            apply_updates_py(self.append_details_text)
-            check_silverblue_version_py(self.append_details_text)
+            # Comprobaci�n previa: sin novedades no se abre ninguna transacci�n.
+            rcode, _ = update_system(self.append_details_text, self.on_update_progress)
+            if rcode == RESULT_CANCELLED:
+                self.append_details_text("Actualizaci�n manual cancelada.")
+                return
             self.append_details_text("Actualizaci�n manual completada.")
         finally:
-            if os.path.exists(LOCK_FILE):
-                os.remove(LOCK_FILE)
+            self.details_log.finish_run(rcode)
+            if LOG_STATS:
+                print(f"Registro de actualizaciones: {self.details_log.format_stats()}")
+            release_update_lock()
             GLib.idle_add(self.mostrar_imagen_completa)
 
+    def on_update_progress(self, fraction, text):
+        # Llamado desde el hilo de la transacción de rpm-ostree.
+        GLib.idle_add(self._set_update_progress, fraction, text)
+
+    def _set_update_progress(self, fraction, text):
+        self.update_progress.set_visible(True)
+        if fraction is None:
+            self.update_progress.pulse()
+        else:
+            self.update_progress.set_fraction(min(max(fraction, 0.0), 1.0))
+        self.update_progress.set_text(text or None)
+        return GLib.SOURCE_REMOVE
+
+    def on_cancelar_actualizacion(self, button):
+        if update_engine.cancel():
+            button.set_sensitive(False)
+            self.append_details_text("Cancelando la transacci�n en curso...")
+
     def mostrar_imagen_completa(self):
         self.spinner.stop()
         self.img_complete.set_visible(True)
         self.btn_update_now.set_sensitive(True)
+        self.btn_cancel_update.set_sensitive(False)
 
     def append_details_text(self, line):
-        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        GLib.idle_add(self._append_details_text_idle, f"[{now}] {line}")
-
-    def _append_details_text_idle(self, line):
-        buffer = self.details_textview.get_buffer()
-        end_iter = buffer.get_end_iter()
-        buffer.insert(end_iter, line + "\n")
+        self.details_log.append(line)
 
-    def clear_details_text(self):
-        buffer = self.details_textview.get_buffer()
-        buffer.set_text("")
+    def start_details_run(self, kind):
+        self.details_log.start_run(kind)
+        self.details_log.reset_stats()
 
     def build_treeos_ayuda_page(self):
         box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=MARGIN)
@@ -491,7 +518,7 @@ class ControlPanelWindow(Gtk.ApplicationWindow):
         manual_btn = Gtk.Button(label="Abrir Manual de Usuario")
         manual_btn.connect("clicked", self.abrir_manual)
         box.append(manual_btn)
-        self.stack.add_titled(box, "TreeOS Ayuda", "TreeOS Ayuda")
+        return box
 
     def abrir_manual(self, button):
         if os.path.isfile(MANUAL_FILE):
@@ -519,6 +546,22 @@ class ControlPanelWindow(Gtk.ApplicationWindow):
         self.btn_anaconda.connect("clicked", self.on_toggle_app, "anaconda")
         toolbox_buttons.append(self.btn_anaconda)
         box.append(toolbox_buttons)
+
+        # Instalaci�n m�ltiple: las apps marcadas se instalan en una sola transacci�n de dnf.
+        batch_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=MARGIN)
+        self.batch_checks = {}
+        for app_key, data in APPS_DESKTOP.items():
+            check = Gtk.CheckButton(label=data['name'])
+            check.connect("toggled", self.on_batch_selection_changed)
+            self.batch_checks[app_key] = check
+            batch_box.append(check)
+        self.btn_batch_install = Gtk.Button(label="Instalar seleccionadas")
+        self.btn_batch_install.set_sensitive(False)
+        self.btn_batch_install.connect("clicked", self.on_batch_install)
+        batch_box.append(self.btn_batch_install)
+        box.append(batch_box)
+        self.update_batch_checks()
+
         terminal_btn = Gtk.Button(label="Abrir Terminal en Toolbox")
         terminal_btn.connect("clicked", self.abrir_terminal_toolbox)
         box.append(terminal_btn)
@@ -533,6 +576,8 @@ class ControlPanelWindow(Gtk.ApplicationWindow):
         self.secure_details_textview.set_editable(False)
         self.secure_details_textview.set_wrap_mode(Gtk.WrapMode.WORD)
         self.secure_details_scrolled.set_child(self.secure_details_textview)
+        self.secure_log.attach(self.secure_details_textview)
+        self.secure_log.load_history(SECURE_RUN_KINDS)
         box.append(self.secure_details_scrolled)
         self.secure_spinner = Gtk.Spinner()
         box.append(self.secure_spinner)
@@ -543,10 +588,10 @@ class ControlPanelWindow(Gtk.ApplicationWindow):
         restore_btn = Gtk.Button(label="Restaurar TreeOS Secure")
         restore_btn.connect("clicked", self.on_restaurar_treeossecure)
         box.append(restore_btn)
-        self.stack.add_titled(box, "TreeOS Secure", "TreeOS Secure")
+        return box
 
     def get_app_button_label(self, app_key):
-        if is_app_installed(app_key):
+        if app_index.is_installed(app_key):
             return "Desinstalar " + APPS_DESKTOP[app_key]['name']
         else:
             return "Instalar " + APPS_DESKTOP[app_key]['name']
@@ -560,9 +605,48 @@ class ControlPanelWindow(Gtk.ApplicationWindow):
         elif app_key == "anaconda":
             self.btn_anaconda.set_label(label)
 
+    def update_all_app_button_labels(self):
+        if self.pages["TreeOS Secure"]["built"]:
+            for app_key in APPS_DESKTOP:
+                self.update_app_button_label(app_key)
+            self.update_batch_checks()
+        return GLib.SOURCE_REMOVE
+
+    def update_batch_checks(self):
+        # Solo se pueden marcar las apps que a�n no est�n instaladas.
+        for app_key, check in self.batch_checks.items():
+            installed = app_index.is_installed(app_key)
+            if installed:
+                check.set_active(False)
+            check.set_sensitive(not installed)
+
+    def selected_batch_apps(self):
+        return [app_key for app_key, check in self.batch_checks.items() if check.get_active()]
+
+    def on_batch_selection_changed(self, check):
+        self.btn_batch_install.set_sensitive(bool(self.selected_batch_apps()))
+
+    def on_batch_install(self, button):
+        app_keys = self.selected_batch_apps()
+        if not app_keys:
+            return
+        button.set_sensitive(False)
+        for check in self.batch_checks.values():
+            check.set_sensitive(False)
+        threading.Thread(target=self.instalar_lote_background, args=(app_keys,), daemon=True).start()
+
+    def instalar_lote_background(self, app_keys):
+        GLib.idle_add(self.secure_spinner.start)
+        GLib.idle_add(self.secure_img_complete.set_visible, False)
+        self.start_secure_run("batch-install")
+        rcode, _ = install_apps(app_keys, self.append_secure_details_text)
+        self.secure_log.finish_run(rcode)
+        GLib.idle_add(self.mostrar_secure_imagen_completa)
+        GLib.idle_add(self.update_all_app_button_labels)
+
     def on_toggle_app(self, button, app_key):
         button.set_sensitive(False)
-        if is_app_installed(app_key):
+        if app_index.is_installed(app_key):
             t = threading.Thread(target=self.desinstalar_app_background, args=(app_key, button), daemon=True)
             t.start()
         else:
@@ -572,58 +656,9 @@ class ControlPanelWindow(Gtk.ApplicationWindow):
     def desinstalar_app_background(self, app_key, btn):
         GLib.idle_add(self.secure_spinner.start)
         GLib.idle_add(self.secure_img_complete.set_visible, False)
-        self.clear_secure_details_text()
-        self.append_secure_details_text("Verificando contenedor 'treeossecure' para desinstalaci�n...")
-        ensure_toolbox_exists(self.append_secure_details_text)
-        # Usamos la ruta fija para los scripts:
-        script_dir = "/usr/share/treeos-control"
-        if app_key == "pycharm":
-            script_file = "uninstall_pycharm.sh"
-        elif app_key == "vscode":
-            script_file = "uninstall_vscode.sh"
-        elif app_key == "anaconda":
-            script_file = "uninstall_anaconda.sh"
-        else:
-            script_file = ""
-        if script_file:
-            script_path = os.path.join(script_dir, script_file)
-            # Copiamos el script al directorio $HOME/.local en el host
-            host_local_dir = os.path.join(os.environ["HOME"], ".local")
-            os.makedirs(host_local_dir, exist_ok=True)
-            target_path = os.path.join(host_local_dir, script_file)
-            try:
-                shutil.copy(script_path, target_path)
-                self.append_secure_details_text(f"Script {script_file} copiado a {target_path}.")
-            except Exception as e:
-                self.append_secure_details_text(f"Error al copiar el script: {e}")
-                GLib.idle_add(self.secure_spinner.stop)
-                GLib.idle_add(btn.set_sensitive, True)
-                return
-            uninstall_cmd = f"toolbox run --container treeossecure bash -c 'bash $HOME/.local/{script_file}'"
-        else:
-            uninstall_cmd = ""
-        if uninstall_cmd:
-            self.append_secure_details_text(f"Iniciando desinstalaci�n de {APPS_DESKTOP[app_key]['name']}...")
-            ejecutar_comando_captura(uninstall_cmd, self.append_secure_details_text)
-            self.append_secure_details_text(f"Desinstalaci�n de {APPS_DESKTOP[app_key]['name']} completada.")
-        else:
-            self.append_secure_details_text("Error: no se defini� comando para desinstalar la app.")
-        data = APPS_DESKTOP[app_key]
-        desktop_path = os.path.join(DESKTOP_DIR, data['desktop_file'])
-        if os.path.exists(desktop_path):
-            try:
-                os.remove(desktop_path)
-                self.append_secure_details_text(f"Se elimin� el archivo {desktop_path}.")
-            except Exception as e:
-                self.append_secure_details_text(f"Error al eliminar el archivo {desktop_path}: {e}")
-        else:
-            self.append_secure_details_text("No se encontr� el archivo de escritorio para eliminar.")
-        # Eliminamos el script copiado del host
-        try:
-            os.remove(target_path)
-            self.append_secure_details_text(f"Script {target_path} eliminado.")
-        except Exception as e:
-            self.append_secure_details_text(f"Error al eliminar el script {target_path}: {e}")
+        self.start_secure_run("uninstall")
+        rcode = uninstall_app(app_key, self.append_secure_details_text)
+        self.secure_log.finish_run(rcode)
         GLib.idle_add(self.mostrar_secure_imagen_completa)
         GLib.idle_add(self.update_app_button_label, app_key)
         GLib.idle_add(btn.set_sensitive, True)
@@ -631,48 +666,9 @@ class ControlPanelWindow(Gtk.ApplicationWindow):
     def instalar_app_background(self, app_key, btn):
         GLib.idle_add(self.secure_spinner.start)
         GLib.idle_add(self.secure_img_complete.set_visible, False)
-        self.clear_secure_details_text()
-        self.append_secure_details_text("Verificando contenedor 'treeossecure' para instalaci�n...")
-        ensure_toolbox_exists(self.append_secure_details_text)
-        # Usamos la ruta fija para los scripts:
-        script_dir = "/usr/share/treeos-control"
-        if app_key == "pycharm":
-            script_file = "install_pycharm.sh"
-        elif app_key == "vscode":
-            script_file = "install_vscode.sh"
-        elif app_key == "anaconda":
-            script_file = "install_anaconda.sh"
-        else:
-            script_file = ""
-        if script_file:
-            script_path = os.path.join(script_dir, script_file)
-            # Copiamos el script al directorio $HOME/.local en el host
-            host_local_dir = os.path.join(os.environ["HOME"], ".local")
-            os.makedirs(host_local_dir, exist_ok=True)
-            target_path = os.path.join(host_local_dir, script_file)
-            try:
-                shutil.copy(script_path, target_path)
-                self.append_secure_details_text(f"Script {script_file} copiado a {target_path}.")
-            except Exception as e:
-                self.append_secure_details_text(f"Error al copiar el script: {e}")
-                GLib.idle_add(self.secure_spinner.stop)
-                GLib.idle_add(btn.set_sensitive, True)
-                return
-            install_cmd = f"toolbox run --container treeossecure bash -c 'bash $HOME/.local/{script_file}'"
-        else:
-            install_cmd = ""
-        if install_cmd:
-            self.append_secure_details_text(f"Iniciando instalaci�n de {APPS_DESKTOP[app_key]['name']}...")
-            ejecutar_comando_captura(install_cmd, self.append_secure_details_text)
-            self.append_secure_details_text(f"Instalaci�n de {APPS_DESKTOP[app_key]['name']} completada.")
-        else:
-            self.append_secure_details_text("Error: no se defini� comando para instalar la app.")
-        # Eliminamos el script copiado del host
-        try:
-            os.remove(target_path)
-            self.append_secure_details_text(f"Script {target_path} eliminado.")
-        except Exception as e:
-            self.append_secure_details_text(f"Error al eliminar el script {target_path}: {e}")
+        self.start_secure_run("install")
+        rcode = install_app(app_key, self.append_secure_details_text)
+        self.secure_log.finish_run(rcode)
         GLib.idle_add(self.mostrar_secure_imagen_completa)
         GLib.idle_add(self.update_app_button_label, app_key)
         GLib.idle_add(btn.set_sensitive, True)
@@ -689,8 +685,7 @@ class ControlPanelWindow(Gtk.ApplicationWindow):
     def abrir_terminal_thread(self):
         ensure_toolbox_exists()
         try:
-            anaconda_desktop = os.path.join(DESKTOP_DIR, "anaconda-treeossecure.desktop")
-            if os.path.exists(anaconda_desktop):
+            if app_index.is_installed("anaconda"):
                 subprocess.Popen("ptyxis -- toolbox run --container treeossecure conda activate basenv", shell=True)
             else:
                 subprocess.Popen("ptyxis -- toolbox enter treeossecure", shell=True)
@@ -712,64 +707,76 @@ class ControlPanelWindow(Gtk.ApplicationWindow):
 
     def on_restore_response(self, dialog, response):
         if response == Gtk.ResponseType.OK:
-            try:
-                output = subprocess.check_output("toolbox list", shell=True, text=True)
-                if "treeossecure" not in output:
-                    self.append_secure_details_text("No se encontr� el contenedor 'treeossecure'.")
-                else:
-                    result = subprocess.run("toolbox rm -f treeossecure", shell=True, capture_output=True, text=True)
-                    if result.returncode == 0:
-                        self.append_secure_details_text("TreeOS Secure ha sido restaurado (toolbox eliminado).")
-                        for app_key, data in APPS_DESKTOP.items():
-                            desktop_path = os.path.join(DESKTOP_DIR, data['desktop_file'])
-                            if os.path.exists(desktop_path):
-                                try:
-                                    os.remove(desktop_path)
-                                    self.append_secure_details_text(f"Icono para {data['name']} eliminado.")
-                                except Exception as e:
-                                    self.append_secure_details_text(f"Error eliminando icono para {data['name']}: {e}")
-                        GLib.idle_add(self.update_app_button_label, "pycharm")
-                        GLib.idle_add(self.update_app_button_label, "vscode")
-                        GLib.idle_add(self.update_app_button_label, "anaconda")
-                    else:
-                        self.append_secure_details_text(f"Error al restaurar TreeOS Secure: {result.stderr}")
-            except subprocess.CalledProcessError as e:
-                self.append_secure_details_text(f"Error al verificar contenedor: {e}")
+            # restore_toolbox comprueba en el hilo si existe el contenedor (puede tardar).
+            self.secure_spinner.start()
+            threading.Thread(target=self.restaurar_treeossecure_background, daemon=True).start()
         dialog.destroy()
 
-    def clear_secure_details_text(self):
-        buffer = self.secure_details_textview.get_buffer()
-        buffer.set_text("")
+    def restaurar_treeossecure_background(self):
+        self.start_secure_run("restore")
+        self.secure_log.finish_run(restore_toolbox(self.append_secure_details_text))
+        GLib.idle_add(self.secure_spinner.stop)
 
-    def _append_secure_details_text_idle(self, line):
-        buffer = self.secure_details_textview.get_buffer()
-        end_iter = buffer.get_end_iter()
-        buffer.insert(end_iter, line + "\n")
+    def start_secure_run(self, kind):
+        self.secure_log.start_run(kind)
+        self.secure_log.reset_stats()
 
     def append_secure_details_text(self, line):
-        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        GLib.idle_add(self._append_secure_details_text_idle, f"[{now}] {line}")
+        self.secure_log.append(line)
 
     def mostrar_secure_imagen_completa(self):
         self.secure_spinner.stop()
         self.secure_img_complete.set_visible(True)
+        if LOG_STATS:
+            print(f"Registro de TreeOS Secure: {self.secure_log.format_stats()}")
 
 class Aplicacion(Gtk.Application):
     def __init__(self):
-        super().__init__(application_id="org.treeoscontrol.app")
+        super().__init__(application_id=APP_ID)
+        self.window = None
+        self.resident = False
+        self.add_main_option("resident", 0, GLib.OptionFlags.NONE, GLib.OptionArg.NONE,
+                             "Mantener el panel en memoria al cerrar la ventana", None)
+        self.connect("handle-local-options", self.on_handle_local_options)
+        self.connect("startup", self.on_startup)
         self.connect("activate", self.on_activate)
 
+    def on_handle_local_options(self, app, options):
+        self.resident = options.contains("resident")
+        return -1  # continuar con el arranque normal
+
+    def on_startup(self, app):
+        quit_action = Gio.SimpleAction.new("quit", None)
+        quit_action.connect("activate", lambda *args: self.quit())
+        self.add_action(quit_action)
+        self.set_accels_for_action("app.quit", ["<Control>q"])
+        StallWatchdog(GLib).start()
+        if self.resident:
+            # Modo residente: cerrar solo oculta la ventana y reabrir es inmediato.
+            self.hold()
+
     def on_activate(self, app):
-        window = ControlPanelWindow(app)
-        window.present()
+        # Las activaciones posteriores (segundo clic en el lanzador) llegan por
+        # D-Bus a esta misma instancia: se reutiliza y eleva la ventana.
+        if self.window is None:
+            with tracer.span("crear ventana", "ui"):
+                self.window = ControlPanelWindow(app)
+            self.window.set_hide_on_close(self.resident)
+            self.window.connect("destroy", self.on_window_destroyed)
+            if tracer.enabled:
+                self.window.connect("map", self.on_window_mapped)
+        self.window.present()
+
+    def on_window_mapped(self, window):
+        def on_after_paint(clock):
+            clock.disconnect(handler_id)
+            tracer.complete("primer fotograma", "startup", 0, now_us())
+        clock = window.get_frame_clock()
+        handler_id = clock.connect("after-paint", on_after_paint)
+
+    def on_window_destroyed(self, window):
+        self.window = None
 
 if __name__ == "__main__":
-    instance_lock_file = "/tmp/treeos_control_instance.lock"
-    lock_file = open(instance_lock_file, "w")
-    try:
-        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
-    except IOError:
-        print("Otra instancia de TreeOS Control Panel ya est� corriendo.")
-        sys.exit(0)
     app = Aplicacion()
-    app.run()
+    sys.exit(app.run(sys.argv))
@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+# Índice de aplicaciones instaladas en el toolbox "treeossecure", sin GTK.
+#
+# El estado real vive en la base de datos RPM del contenedor: se consulta con un
+# único "rpm -q" para todos los paquetes de APPS_DESKTOP, se guarda con marca de
+# tiempo en $XDG_CACHE_HOME/treeos-control/apps-index.json y se corrigen los
+# lanzadores .desktop que no coincidan con lo instalado.
+#
+# La imagen preconstruida trae todos los paquetes, así que "instalado" no basta:
+# una app cuenta como instalada si además el usuario la eligió desde el panel.
+# Esas elecciones se guardan en $XDG_STATE_HOME/treeos-control/apps.json.
+import argparse, json, os, re, shlex, subprocess, sys, threading, time
+from treeos_config import STATE_DIR
+from treeos_toolbox import container_state
+from treeos_trace import tracer
+
+USER_DESKTOP_DIR = os.path.join(os.path.expanduser("~"), ".local", "share", "applications")
+CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "treeos-control")
+INDEX_FILE = os.path.join(CACHE_DIR, "apps-index.json")
+CHOSEN_FILE = os.path.join(STATE_DIR, "apps.json")
+IMAGE_FILES_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "treeossecure"))
+RPM_NOT_INSTALLED = re.compile(r"^package \S+ is not installed$")
+
+PYCHARM_REPO = """[copr:copr.fedorainfracloud.org:phracek:PyCharm]
+name=Copr repo for PyCharm owned by phracek
+baseurl=https://download.copr.fedorainfracloud.org/results/phracek/PyCharm/fedora-$releasever-$basearch/
+type=rpm-md
+skip_if_unavailable=True
+gpgcheck=1
+gpgkey=https://download.copr.fedorainfracloud.org/results/phracek/PyCharm/pubkey.gpg
+repo_gpgcheck=0
+enabled=1
+enabled_metadata=1
+"""
+
+VSCODE_REPO = """[vscode]
+name=Visual Studio Code
+baseurl=https://packages.microsoft.com/yumrepos/vscode/
+enabled=1
+gpgcheck=1
+repo_gpgcheck=1
+gpgkey=https://packages.microsoft.com/keys/microsoft.asc
+metadata_expire=1h
+"""
+
+# Diccionario de apps para .desktop. Las claves "repos", "gpg_keys",
+# "packages", "post_install" y "pre_uninstall" son la única definición de cómo se
+# instala y desinstala cada app: de ellas salen los scripts de instalación (una
+# app o varias en una sola transacción) y desinstalación, y los archivos de la
+# imagen treeossecure (ver image_files).
+APPS_DESKTOP = {
+    "pycharm": {
+        "package": "pycharm-community",
+        "desktop_file": "pycharm-treeossecure.desktop",
+        "name": "PyCharm (Toolbox)",
+        "comment": "IDE for Python Development",
+        "icon": "pycharm",
+        "exec": "pycharm-community",
+        "repos": {"phracek-pycharm.repo": PYCHARM_REPO},
+        "gpg_keys": [],
+        "packages": ["python3-tkinter", "pycharm-community", "libXtst", "xorg-x11-server-Xvfb"],
+        "post_install": [],
+        "pre_uninstall": []
+    },
+    "vscode": {
+        "package": "code",
+        "desktop_file": "vscode-treeossecure.desktop",
+        "name": "VS Code (Toolbox)",
+        "comment": "Code Editor",
+        "icon": "code",
+        "exec": "code",
+        "repos": {"vscode.repo": VSCODE_REPO},
+        "gpg_keys": ["https://packages.microsoft.com/keys/microsoft.asc"],
+        "packages": ["code"],
+        "post_install": [],
+        "pre_uninstall": []
+    },
+    "anaconda": {
+        "package": "conda",
+        "desktop_file": "anaconda-treeossecure.desktop",
+        "name": "Anaconda (Toolbox)",
+        "comment": "Python Distribution",
+        "icon": "anaconda",
+        "exec": "conda run -n basenv anaconda-navigator",
+        "repos": {},
+        "gpg_keys": [],
+        "packages": ["conda", "qt5-qtbase", "qt5-qtbase-gui", "xcb-util", "xcb-util-wm", "xcb-util-image",
+                     "xcb-util-keysyms", "xcb-util-renderutil", "pciutils-libs", "libXrandr",
+                     "alsa-lib.x86_64", "libXdamage", "libXtst"],
+        "post_install": [
+            "conda config --set channel_priority strict",
+            "conda config --append channels defaults",
+            "conda create -y -n basenv -c default anaconda-navigator",
+        ],
+        "pre_uninstall": [
+            # El entorno de la imagen preconstruida es de root y vuelve con ella:
+            # solo se elimina el que creó post_install.
+            "if [ -d /opt/conda/envs/basenv ] && [ ! -w /opt/conda/envs/basenv ]; then"
+            " echo 'El entorno basenv pertenece a la imagen treeossecure y se conserva.';"
+            " else conda env remove -y -n basenv; fi",
+        ]
+    }
+}
+
+
+def launcher_path(app_key):
+    return os.path.join(USER_DESKTOP_DIR, APPS_DESKTOP[app_key]["desktop_file"])
+
+
+def write_launcher(app_key, container=container_state.name):
+    data = APPS_DESKTOP[app_key]
+    os.makedirs(USER_DESKTOP_DIR, exist_ok=True)
+    path = launcher_path(app_key)
+    with open(path, "w") as f:
+        f.write("[Desktop Entry]\n"
+                f"Name={data['name']}\n"
+                f"Comment={data['comment']}\n"
+                f"Exec=toolbox run --container {container} {data['exec']}\n"
+                f"Icon={data['icon']}\n"
+                "Terminal=false\n"
+                "Type=Application\n"
+                "Categories=Development;IDE;\n")
+    os.chmod(path, 0o755)
+    return path
+
+
+class AppIndex:
+    def __init__(self, apps=APPS_DESKTOP, state=container_state, index_file=INDEX_FILE,
+                 chosen_file=CHOSEN_FILE):
+        self.apps = apps
+        self.state = state
+        self.index_file = index_file
+        self.chosen_file = chosen_file
+        self._lock = threading.Lock()
+        self._installed = {}
+        self._chosen = set()
+        self.timestamp = 0
+        self._listeners = []
+        self._load_cached()
+        self._load_chosen()
+
+    def add_listener(self, listener):
+        """listener() se llama (desde el hilo del indexador) tras cada actualización."""
+        self._listeners.append(listener)
+
+    def _load_cached(self):
+        try:
+            with open(self.index_file) as f:
+                data = json.load(f)
+            self._installed = {k: bool(v) for k, v in data.get("installed", {}).items() if k in self.apps}
+            self.timestamp = data.get("timestamp", 0)
+        except (OSError, ValueError):
+            pass
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.index_file), exist_ok=True)
+        tmp_path = f"{self.index_file}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"timestamp": self.timestamp, "installed": self._installed}, f)
+        os.replace(tmp_path, self.index_file)
+
+    def _load_chosen(self):
+        try:
+            with open(self.chosen_file) as f:
+                self._chosen = {k for k in json.load(f).get("chosen", []) if k in self.apps}
+        except FileNotFoundError:
+            # Versiones anteriores no guardaban la elección: cada lanzador existente
+            # lo creó el usuario al instalar la app.
+            self._chosen = {k for k in self.apps if os.path.exists(launcher_path(k))}
+        except (OSError, ValueError):
+            pass
+
+    def set_chosen(self, app_keys, chosen=True):
+        """Registra (o retira) la elección del usuario; la guarda en chosen_file."""
+        with self._lock:
+            if chosen:
+                self._chosen |= set(app_keys)
+            else:
+                self._chosen -= set(app_keys)
+            data = {"chosen": sorted(self._chosen)}
+        try:
+            os.makedirs(os.path.dirname(self.chosen_file), exist_ok=True)
+            tmp_path = f"{self.chosen_file}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.chosen_file)
+        except OSError as e:
+            print(f"No se pudo guardar la selección de aplicaciones: {e}", file=sys.stderr)
+
+    def is_chosen(self, app_key):
+        with self._lock:
+            return app_key in self._chosen
+
+    def is_installed(self, app_key):
+        """Elegida por el usuario y con su paquete en el contenedor."""
+        with self._lock:
+            if app_key not in self._chosen:
+                return False
+            if app_key in self._installed:
+                return self._installed[app_key]
+        # Sin índice todavía: el lanzador es la mejor pista disponible.
+        return os.path.exists(launcher_path(app_key))
+
+    def query_installed_packages(self):
+        """Paquetes de APPS_DESKTOP instalados en el contenedor, en una sola consulta."""
+        if not self.state.exists():
+            return set()
+        packages = sorted({data["package"] for data in self.apps.values()})
+        rpm_query = ["env", "LC_ALL=C", "rpm", "-q", "--queryformat", "%{NAME}\\n", *packages]
+        if self.state.is_running():
+            command = ["podman", "exec", self.state.name, *rpm_query]
+        else:
+            command = ["toolbox", "run", "--container", self.state.name, *rpm_query]
+        result = subprocess.run(command, capture_output=True, text=True)
+        # rpm -q devuelve distinto de cero si falta algún paquete y lo indica en
+        # stderr; cualquier otro error (podman 125-127, contenedor parado, fallo de
+        # toolbox) no debe leerse como "nada instalado".
+        errors = [line for line in result.stderr.splitlines()
+                  if line.strip() and not RPM_NOT_INSTALLED.match(line.strip())]
+        if result.returncode >= 125 or errors:
+            detail = errors[-1] if errors else f"código {result.returncode}"
+            raise OSError(f"{' '.join(command[:2])} falló: {detail}")
+        return {line.strip() for line in result.stdout.splitlines()} & set(packages)
+
+    def refresh(self, callback_line=None):
+        try:
+            installed_packages = self.query_installed_packages()
+        except OSError as e:
+            if callback_line:
+                callback_line(f"No se pudo consultar el contenedor: {e}")
+            return
+        installed = {key: data["package"] in installed_packages for key, data in self.apps.items()}
+        with self._lock:
+            self._installed = installed
+            self.timestamp = int(time.time())
+        try:
+            self._save()
+        except OSError as e:
+            print(f"No se pudo guardar el índice de aplicaciones: {e}")
+        self.fix_launchers(callback_line)
+        for listener in self._listeners:
+            listener()
+
+    def refresh_async(self):
+        threading.Thread(target=self.refresh, daemon=True).start()
+
+    def fix_launchers(self, callback_line=None):
+        """Crea o elimina lanzadores para que coincidan con las apps elegidas e instaladas."""
+        for app_key in self.apps:
+            path = launcher_path(app_key)
+            installed = self.is_installed(app_key)
+            try:
+                if installed and not os.path.exists(path):
+                    write_launcher(app_key, self.state.name)
+                    message = f"Lanzador creado para {self.apps[app_key]['name']}."
+                elif not installed and os.path.exists(path):
+                    os.remove(path)
+                    message = f"Lanzador huérfano eliminado: {path}."
+                else:
+                    continue
+            except OSError as e:
+                message = f"Error al corregir el lanzador {path}: {e}"
+            if callback_line:
+                callback_line(message)
+            else:
+                print(message)
+
+
+app_index = AppIndex()
+
+
+# ========================================
+# INSTALACIÓN POR LOTES
+# ========================================
+def merge_apps(app_keys):
+    """Repositorios, llaves, paquetes y pasos posteriores de varias apps, sin repetidos."""
+    repos, keys, packages, post_install = {}, [], [], []
+    for app_key in app_keys:
+        data = APPS_DESKTOP[app_key]
+        repos.update(data["repos"])
+        keys += [k for k in data["gpg_keys"] if k not in keys]
+        packages += [p for p in data["packages"] if p not in packages]
+        post_install += data["post_install"]
+    return repos, keys, packages, post_install
+
+
+def build_batch_install_script(app_keys):
+    """
+    Fusiona las apps seleccionadas en un único script: una fase de repositorios,
+    un único refresco de metadatos y una sola transacción "dnf install".
+    """
+    repos, keys, packages, post_install = merge_apps(app_keys)
+
+    lines = ["#!/bin/bash", "set -e", "", "# Fase 1: repositorios y llaves GPG"]
+    for key in keys:
+        lines.append(f"sudo rpm --import {shlex.quote(key)}")
+    for filename, content in repos.items():
+        lines.append(f"printf '%s' {shlex.quote(content)} | sudo tee /etc/yum.repos.d/{filename} >/dev/null")
+    lines += ["", "# Fase 2: una sola transacción (un solo refresco de metadatos)",
+              f"sudo dnf install -y --refresh {' '.join(shlex.quote(p) for p in packages)}"]
+    if post_install:
+        lines += ["", "# Fase 3: configuración posterior"] + post_install
+    return "\n".join(lines) + "\n"
+
+
+def build_uninstall_script(app_key, keep_packages=()):
+    """
+    Script de desinstalación de una app: sus pasos previos, un "dnf remove" de
+    sus paquetes (salvo keep_packages, que otras apps instaladas necesitan) y
+    la retirada de sus repositorios. Sigue aunque falle un paso y devuelve el
+    código del último que falló.
+    """
+    data = APPS_DESKTOP[app_key]
+    packages = [p for p in data["packages"] if p not in keep_packages]
+    lines = ["#!/bin/bash", "rcode=0"]
+    if data["pre_uninstall"]:
+        lines += ["", "# Fase 1: pasos previos"] + [f"{step} || rcode=$?" for step in data["pre_uninstall"]]
+    if packages:
+        lines += ["", "# Fase 2: paquetes",
+                  f"sudo dnf remove -y {' '.join(shlex.quote(p) for p in packages)} || rcode=$?"]
+    if data["repos"]:
+        lines += ["", "# Fase 3: repositorios"]
+        lines += [f"sudo rm -f /etc/yum.repos.d/{filename}" for filename in data["repos"]]
+    lines += ["", "exit $rcode"]
+    return "\n".join(lines) + "\n"
+
+
+def run_script_in_container(script, filename, callback_line, container=container_state.name):
+    """Escribe script en ~/.local (visible desde el contenedor) y lo ejecuta con bash dentro."""
+    host_local_dir = os.path.join(os.path.expanduser("~"), ".local")
+    os.makedirs(host_local_dir, exist_ok=True)
+    script_path = os.path.join(host_local_dir, filename)
+    with open(script_path, "w") as f:
+        f.write(script)
+    command = ["toolbox", "run", "--container", container, "bash", script_path]
+    try:
+        with tracer.span("subproceso", "subprocess", {"command": " ".join(command)}) as trace_args:
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+            for line in process.stdout:
+                callback_line(line.rstrip())
+            process.stdout.close()
+            trace_args["returncode"] = process.wait()
+        return process.returncode
+    finally:
+        os.remove(script_path)
+
+
+def install_apps_batch(app_keys, callback_line, container=container_state.name, index=app_index):
+    """Instala varias apps en una sola transacción; devuelve (código, segundos)."""
+    start = time.monotonic()
+    # Con la imagen preconstruida (toolbox-image) las apps pueden venir ya
+    # instaladas: para esas basta con crear el lanzador.
+    try:
+        present = index.query_installed_packages()
+    except OSError:
+        present = set()
+    already = [k for k in app_keys if APPS_DESKTOP[k]["package"] in present]
+    index.set_chosen(already)
+    for app_key in already:
+        callback_line(f"{APPS_DESKTOP[app_key]['name']} ya está en el contenedor; "
+                      f"lanzador creado: {write_launcher(app_key, container)}")
+    app_keys = [k for k in app_keys if k not in already]
+    if not app_keys:
+        return 0, time.monotonic() - start
+    names = ", ".join(APPS_DESKTOP[k]["name"] for k in app_keys)
+    callback_line(f"Instalando en una sola transacción: {names}")
+    rcode = run_script_in_container(build_batch_install_script(app_keys), "treeos-batch-install.sh",
+                                    callback_line, container)
+    if rcode == 0:
+        # Lanzadores al final, una vez que todos los paquetes están instalados.
+        index.set_chosen(app_keys)
+        for app_key in app_keys:
+            callback_line(f"Lanzador creado: {write_launcher(app_key, container)}")
+    return rcode, time.monotonic() - start
+
+
+def uninstall_app_packages(app_key, callback_line, container=container_state.name, index=app_index):
+    """Desinstala una app sin quitar los paquetes que necesitan otras apps instaladas."""
+    # Deja de estar elegida aunque falle algún paso: su lanzador se elimina igualmente.
+    index.set_chosen([app_key], chosen=False)
+    keep = {package for key, data in APPS_DESKTOP.items()
+            if key != app_key and index.is_installed(key) for package in data["packages"]}
+    return run_script_in_container(build_uninstall_script(app_key, keep), "treeos-uninstall.sh",
+                                   callback_line, container)
+
+
+# ========================================
+# ARCHIVOS DE LA IMAGEN TREEOSSECURE
+# ========================================
+def image_files(app_keys=None):
+    """Archivos que usa treeossecure/Containerfile, generados desde APPS_DESKTOP."""
+    repos, keys, packages, _ = merge_apps(list(APPS_DESKTOP) if app_keys is None else app_keys)
+    files = {os.path.join("yum.repos.d", filename): content for filename, content in repos.items()}
+    files["gpg-keys"] = "".join(f"{key}\n" for key in keys)
+    files["packages"] = "".join(f"{package}\n" for package in packages)
+    return files
+
+
+def write_image_files(directory=IMAGE_FILES_DIR, check=False):
+    """Escribe (o con check, compara) los archivos de la imagen; devuelve los que no estaban al día."""
+    stale = []
+    for name, content in image_files().items():
+        path = os.path.join(directory, name)
+        try:
+            with open(path) as f:
+                if f.read() == content:
+                    continue
+        except OSError:
+            pass
+        stale.append(name)
+        if not check:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write(content)
+    return stale
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera los archivos de la imagen treeossecure desde APPS_DESKTOP")
+    parser.add_argument("directory", nargs="?", default=IMAGE_FILES_DIR, help="contexto de construcción de la imagen")
+    parser.add_argument("--check", action="store_true", help="fallar si los archivos no están al día")
+    args = parser.parse_args()
+    stale = write_image_files(args.directory, args.check)
+    for name in stale:
+        print(f"{'Desactualizado' if args.check else 'Escrito'}: {os.path.join(args.directory, name)}")
+    return 1 if args.check and stale else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
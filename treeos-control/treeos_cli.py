@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# Interfaz de línea de órdenes del panel de control, sin GTK.
+#
+#   treeos-control.py --cli update [--check-only]
+#   treeos-control.py --cli rebase-check
+#   treeos-control.py --cli install pycharm vscode
+#   treeos-control.py --cli uninstall anaconda
+#   treeos-control.py --cli restore
+#   treeos-control.py --cli wallpaper /ruta/al/fondo.webp
+#   treeos-control.py --cli theme modern
+#   treeos-control.py --cli status
+#
+# El progreso se escribe en stderr y el resultado, como un único objeto JSON, en
+# stdout: {"command", "ok", "exit_code", "duration", "log", ...}. El código de
+# salida del proceso es el de la operación (EXIT_LOCKED si ya hay una
+# actualización en curso). Cada operación queda también en el historial de
+# ejecuciones, igual que las lanzadas desde la ventana.
+import argparse, contextlib, json, os, sys, time
+from treeos_updates import (acquire_update_lock, release_update_lock, plan_updates,
+                            rpmostree_deployments, staged_update_ready)
+from treeos_rpmostree import RESULT_OK
+from treeos_toolbox import container_state
+from treeos_apps import APPS_DESKTOP, app_index
+from treeos_runlog import runlog, run_logger
+from treeos_extensions import THEMES
+import treeos_core
+
+EXIT_LOCKED = 75  # EX_TEMPFAIL: se puede reintentar más tarde
+
+
+def _cmd_update(args, log):
+    if args.check_only:
+        plan = plan_updates(log)
+        return RESULT_OK, {"plan": plan}
+    if not acquire_update_lock():
+        log("Ya se está ejecutando una actualización.")
+        return EXIT_LOCKED, {}
+    try:
+        rcode, plan = treeos_core.update_system(log)
+    finally:
+        release_update_lock()
+    return rcode, {"plan": plan}
+
+
+def _cmd_rebase_check(args, log):
+    if not acquire_update_lock():
+        log("Ya se está ejecutando una actualización.")
+        return EXIT_LOCKED, {}
+    try:
+        return treeos_core.check_rebase(log), {}
+    finally:
+        release_update_lock()
+
+
+def _cmd_install(args, log):
+    if len(args.apps) == 1:
+        rcode = treeos_core.install_app(args.apps[0], log)
+    else:
+        rcode, _ = treeos_core.install_apps(args.apps, log)
+    return rcode, {"apps": _apps_state(args.apps)}
+
+
+def _cmd_uninstall(args, log):
+    rcode = RESULT_OK
+    for app_key in args.apps:
+        rcode = treeos_core.uninstall_app(app_key, log) or rcode
+    return rcode, {"apps": _apps_state(args.apps)}
+
+
+def _cmd_restore(args, log):
+    return treeos_core.restore_toolbox(log), {}
+
+
+def _cmd_wallpaper(args, log):
+    path = os.path.abspath(args.path)
+    if not os.path.isfile(path):
+        log(f"No existe el fondo {path}.")
+        return 1, {}
+    return treeos_core.set_wallpaper(path, log), {"wallpaper": path}
+
+
+def _cmd_theme(args, log):
+    return treeos_core.set_theme(args.theme, log), {"theme": args.theme}
+
+
+def _cmd_status(args, log):
+    deployments = rpmostree_deployments()
+    booted = next((d for d in deployments if d.get("booted")), {})
+    return RESULT_OK, {
+        "booted": {"version": booted.get("version"), "origin": booted.get("origin")},
+        "staged_update": staged_update_ready(),
+        "container": container_state.exists(),
+        "apps": _apps_state(APPS_DESKTOP),
+    }
+
+
+def _apps_state(app_keys):
+    return {app_key: app_index.is_installed(app_key) for app_key in app_keys}
+
+
+# (función, tipo de ejecución en el historial o None, necesita el estado del contenedor)
+COMMANDS = {
+    "update": (_cmd_update, "update", False),
+    "rebase-check": (_cmd_rebase_check, "rebase", False),
+    "install": (_cmd_install, "install", True),
+    "uninstall": (_cmd_uninstall, "uninstall", True),
+    "restore": (_cmd_restore, "restore", True),
+    "wallpaper": (_cmd_wallpaper, None, False),
+    "theme": (_cmd_theme, None, False),
+    "status": (_cmd_status, None, True),
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="treeos-control --cli",
+                                     description="Operaciones del panel de control de TreeOS sin interfaz gráfica")
+    parser.add_argument("-q", "--quiet", action="store_true", help="no mostrar el progreso en stderr")
+    sub = parser.add_subparsers(dest="command", required=True)
+    update = sub.add_parser("update", help="comprobar y aplicar actualizaciones y rebase")
+    update.add_argument("--check-only", action="store_true", help="solo comprobar qué hay pendiente")
+    sub.add_parser("rebase-check", help="rebase a la última versión publicada, si la hay")
+    install = sub.add_parser("install", help="instalar aplicaciones en TreeOS Secure")
+    install.add_argument("apps", nargs="+", choices=sorted(APPS_DESKTOP))
+    uninstall = sub.add_parser("uninstall", help="desinstalar aplicaciones de TreeOS Secure")
+    uninstall.add_argument("apps", nargs="+", choices=sorted(APPS_DESKTOP))
+    sub.add_parser("restore", help="eliminar el contenedor treeossecure y sus lanzadores")
+    wallpaper = sub.add_parser("wallpaper", help="cambiar el fondo de escritorio")
+    wallpaper.add_argument("path")
+    theme = sub.add_parser("theme", help="cambiar la disposición del escritorio")
+    theme.add_argument("theme", choices=sorted(THEMES))
+    sub.add_parser("status", help="estado del sistema y de TreeOS Secure")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    # stdout queda reservado para el JSON: los print() de los módulos van a stderr.
+    with contextlib.redirect_stdout(sys.stderr):
+        report = run_command(args)
+    json.dump(report, sys.stdout, ensure_ascii=False)
+    sys.stdout.write("\n")
+    rcode = report["exit_code"]
+    return rcode if 0 <= rcode < 256 else 1
+
+
+def run_command(args):
+    handler, kind, needs_container = COMMANDS[args.command]
+    if args.command == "install" and len(args.apps) > 1:
+        kind = "batch-install"
+    if needs_container:
+        container_state.refresh()  # sin el vigilante de "podman events" de la ventana
+
+    lines = []
+    run = runlog.start_run(kind) if kind else None
+
+    def collect(line):
+        lines.append(line)
+        if not args.quiet:
+            print(line, file=sys.stderr, flush=True)
+    log = run_logger(run, collect) if run else collect
+
+    start = time.monotonic()
+    rcode, result = 1, {}
+    try:
+        rcode, result = handler(args, log)
+    except Exception as e:
+        log(f"Error: {e}")
+    finally:
+        if run:
+            run.finish(rcode)
+    report = {"command": args.command, "ok": rcode == RESULT_OK, "exit_code": rcode,
+              "duration": round(time.monotonic() - start, 3), "log": lines}
+    if run:
+        report["run"] = run.id
+    report.update(result)
+    return report
+
+
+if __name__ == "__main__":
+    sys.exit(main())
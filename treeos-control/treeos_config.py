@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# Almacén de configuración de TreeOS Control.
+#
+# El archivo sigue siendo una lista de líneas CLAVE=valor, legible desde shell,
+# pero se lee una sola vez a memoria y se reescribe completo de forma atómica
+# (archivo temporal + rename) en lugar de lanzar un "sed -i" por clave.
+#
+# El estado que escribe el planificador de cada usuario (LAST_UPDATE_CHECK,
+# STORED_VERSION) no va en /etc, que es de root, sino en un archivo del mismo
+# formato en $XDG_STATE_HOME/treeos-control (state_store).
+import os, sys, tempfile, threading
+
+try:
+    from gi.repository import Gio
+except ImportError:  # Uso sin GLib (scripts, pruebas): se comprueba el mtime en cada lectura
+    Gio = None
+
+CONFIG_FILE = os.environ.get("TREEOS_CONFIG_FILE", "/etc/treeos-control/update_config.conf")
+STATE_DIR = os.path.join(os.environ.get("XDG_STATE_HOME") or os.path.expanduser("~/.local/state"), "treeos-control")
+STATE_FILE = os.environ.get("TREEOS_STATE_FILE", os.path.join(STATE_DIR, "update_state.conf"))
+
+DEFAULT_CONFIG = {
+    "AUTO_UPDATES_ENABLED": True,
+    "CHECK_FREQUENCY": "daily",  # hourly, daily, weekly, monthly
+    "EXTENSIONES_HABILITADAS": False,
+    "FIRST_BOOT": True,
+    "SYNC_INTERVAL": 21600,  # segundos entre comprobaciones del repositorio en treeos_init.sh
+    "STAGE_UPDATES": True  # descargar por adelantado en reposo, con corriente y red no medida
+}
+
+STATE_DEFAULTS = {
+    "LAST_UPDATE_CHECK": 0,
+    "STORED_VERSION": ""
+}
+
+BOOL_KEYS = ("AUTO_UPDATES_ENABLED", "EXTENSIONES_HABILITADAS", "FIRST_BOOT", "STAGE_UPDATES")
+INT_KEYS = ("LAST_UPDATE_CHECK", "SYNC_INTERVAL")
+
+
+def parse_config(text, defaults=DEFAULT_CONFIG):
+    config = defaults.copy()
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#") or "=" not in line:
+            continue
+        key, value = line.split("=", 1)
+        key, value = key.strip(), value.strip()
+        try:
+            if key in BOOL_KEYS:
+                config[key] = (value.lower() == "true")
+            elif key in INT_KEYS:
+                config[key] = int(value)
+            else:
+                config[key] = value
+        except ValueError:
+            print(f"Línea malformada: {line}")
+    return config
+
+
+def format_value(value):
+    if isinstance(value, bool):
+        return str(value).lower()
+    return str(value).strip()
+
+
+def serialize_config(config, defaults=DEFAULT_CONFIG):
+    keys = list(defaults) + sorted(k for k in config if k not in defaults)
+    return "".join(f"{key}={format_value(config[key])}\n" for key in keys if key in config)
+
+
+class ConfigStore:
+    def __init__(self, path=CONFIG_FILE, defaults=DEFAULT_CONFIG):
+        self.path = path
+        self.defaults = defaults
+        self._lock = threading.RLock()
+        self._cache = None
+        self._signature = None
+        self._monitor = None
+        self._listeners = []
+
+    def _stat_signature(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                text = f.read()
+        except OSError:
+            text = ""
+        if not text.strip():
+            print(f"{self.path} no encontrado o vacío. Usando valores por defecto.")
+        return parse_config(text, self.defaults)
+
+    def read(self):
+        """Devuelve una copia de la configuración actual."""
+        with self._lock:
+            # Con el monitor activo la caché solo se invalida por eventos; sin él,
+            # un stat() barato decide si hay que volver a leer el archivo.
+            if self._cache is None or self._monitor is None:
+                signature = self._stat_signature()
+                if self._cache is None or signature != self._signature:
+                    self._cache = self._load()
+                    self._signature = signature
+            return dict(self._cache)
+
+    def get(self, key, default=None):
+        return self.read().get(key, default)
+
+    def update(self, **changes):
+        """Aplica los cambios (CLAVE=valor) y reescribe el archivo de forma atómica."""
+        with self._lock:
+            config = self.read()
+            config.update(changes)
+            self._write_atomic(serialize_config(config, self.defaults))
+            self._cache = config
+            self._signature = self._stat_signature()
+            return dict(config)
+
+    def _write_atomic(self, text):
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        try:
+            mode = os.stat(self.path).st_mode & 0o7777
+        except OSError:
+            mode = 0o644
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".update_config.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp_path, mode)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def invalidate(self):
+        with self._lock:
+            self._cache = None
+
+    def watch(self, listener=None):
+        """
+        Vigila el archivo con Gio.FileMonitor para invalidar la caché cuando
+        otro proceso lo modifica. Necesita un bucle principal de GLib en marcha.
+        listener() se llama en el hilo principal tras cada cambio externo.
+        """
+        if listener is not None:
+            self._listeners.append(listener)
+        if self._monitor is not None or Gio is None:
+            return
+        monitor = Gio.File.new_for_path(self.path).monitor_file(Gio.FileMonitorFlags.WATCH_MOVES, None)
+        monitor.connect("changed", self._on_file_changed)
+        with self._lock:
+            self._monitor = monitor
+
+    def _on_file_changed(self, monitor, file, other_file, event_type):
+        with self._lock:
+            if self._stat_signature() == self._signature:
+                return  # Nuestra propia escritura
+            self._cache = None
+        for listener in self._listeners:
+            listener()
+
+
+# Almacén compartido por el panel de control, el planificador y la CLI.
+config_store = ConfigStore()
+# Estado por usuario del planificador (escribible sin privilegios).
+state_store = ConfigStore(STATE_FILE, STATE_DEFAULTS)
+
+
+def read_config():
+    """Configuración de /etc junto con el estado del usuario (LAST_UPDATE_CHECK, STORED_VERSION)."""
+    config = config_store.read()
+    config.update(state_store.read())
+    return config
+
+
+def _save(store, changes):
+    try:
+        store.update(**{k: v for k, v in changes.items() if v is not None})
+    except OSError as e:
+        print(f"Error al guardar {store.path}: {e}", file=sys.stderr, flush=True)
+        return False
+    return True
+
+
+def write_config(auto_updates_enabled=None, check_frequency=None, extensiones_habilitadas=None,
+                 first_boot=None, last_update_check=None, stored_version=None):
+    """Guarda los cambios en el archivo que corresponda; devuelve False si alguno falló."""
+    config_changes = {
+        "AUTO_UPDATES_ENABLED": auto_updates_enabled,
+        "CHECK_FREQUENCY": check_frequency,
+        "EXTENSIONES_HABILITADAS": extensiones_habilitadas,
+        "FIRST_BOOT": first_boot,
+    }
+    state_changes = {
+        "LAST_UPDATE_CHECK": last_update_check,
+        "STORED_VERSION": stored_version.strip() if stored_version is not None else None,
+    }
+    ok = True
+    if any(v is not None for v in config_changes.values()):
+        ok = _save(config_store, config_changes) and ok
+    if any(v is not None for v in state_changes.values()):
+        ok = _save(state_store, state_changes) and ok
+    if ok:
+        print("Configuración guardada.")
+    return ok
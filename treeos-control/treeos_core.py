@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# Operaciones del panel de control sin dependencias de GTK.
+#
+# Las usan tanto los manejadores de ControlPanelWindow como la interfaz de línea
+# de órdenes (treeos_cli.py). Cada operación informa del progreso con
+# callback_line y devuelve un código de salida (0 = correcto).
+import os
+from treeos_updates import (plan_updates, describe_plan, run_update_plan,
+                            check_silverblue_version_py)
+from treeos_rpmostree import RESULT_OK, RESULT_FAILED
+from treeos_toolbox import ensure_toolbox_exists, remove_toolbox, container_state, PACKAGE_CACHE_DIR
+from treeos_apps import APPS_DESKTOP, app_index, launcher_path, install_apps_batch, uninstall_app_packages
+from treeos_extensions import apply_theme
+
+
+def _log(callback_line, line):
+    if callback_line:
+        callback_line(line)
+
+
+# ========================================
+# ACTUALIZACIONES
+# ========================================
+def update_system(callback_line, progress=None):
+    """Comprueba y aplica lo pendiente; devuelve (código, plan). El bloqueo lo toma quien llama."""
+    plan = plan_updates(callback_line)
+    callback_line(describe_plan(plan))
+    return run_update_plan(plan, callback_line, progress), plan
+
+
+def check_rebase(callback_line, progress=None):
+    return check_silverblue_version_py(callback_line, progress)
+
+
+# ========================================
+# APLICACIONES DE TREEOS SECURE
+# ========================================
+def install_app(app_key, callback_line, index=app_index):
+    name = APPS_DESKTOP[app_key]["name"]
+    callback_line("Verificando contenedor 'treeossecure' para instalación...")
+    ensure_toolbox_exists(callback_line)
+    callback_line(f"Iniciando instalación de {name}...")
+    # Mismo camino que la instalación por lotes, con APPS_DESKTOP como única
+    # definición; si la app ya está en el contenedor solo se crea el lanzador.
+    try:
+        rcode, _ = install_apps_batch([app_key], callback_line, index=index)
+    except OSError as e:
+        callback_line(f"Error en la instalación de {name}: {e}")
+        rcode = RESULT_FAILED
+    if rcode == RESULT_OK:
+        callback_line(f"Instalación de {name} completada.")
+    else:
+        callback_line(f"La instalación de {name} falló (código {rcode}).")
+    index.refresh(callback_line)
+    return rcode
+
+
+def uninstall_app(app_key, callback_line, index=app_index):
+    name = APPS_DESKTOP[app_key]["name"]
+    callback_line("Verificando contenedor 'treeossecure' para desinstalación...")
+    ensure_toolbox_exists(callback_line)
+    callback_line(f"Iniciando desinstalación de {name}...")
+    try:
+        rcode = uninstall_app_packages(app_key, callback_line, index=index)
+    except OSError as e:
+        callback_line(f"Error en la desinstalación de {name}: {e}")
+        rcode = RESULT_FAILED
+    if rcode == RESULT_OK:
+        callback_line(f"Desinstalación de {name} completada.")
+    else:
+        callback_line(f"La desinstalación de {name} falló (código {rcode}).")
+    desktop_path = launcher_path(app_key)
+    if os.path.exists(desktop_path):
+        try:
+            os.remove(desktop_path)
+            callback_line(f"Se eliminó el archivo {desktop_path}.")
+        except OSError as e:
+            callback_line(f"Error al eliminar el archivo {desktop_path}: {e}")
+    index.refresh(callback_line)
+    return rcode
+
+
+def install_apps(app_keys, callback_line, index=app_index):
+    """Instalación por lotes; devuelve (código, segundos)."""
+    callback_line("Verificando contenedor 'treeossecure' para instalación...")
+    ensure_toolbox_exists(callback_line)
+    rcode, elapsed = RESULT_FAILED, 0.0
+    try:
+        rcode, elapsed = install_apps_batch(app_keys, callback_line, index=index)
+        if rcode == RESULT_OK:
+            callback_line(f"Instalación por lotes completada en {elapsed:.0f} s.")
+        else:
+            callback_line(f"La instalación por lotes falló (código {rcode}) tras {elapsed:.0f} s.")
+    except OSError as e:
+        callback_line(f"Error en la instalación por lotes: {e}")
+    index.refresh(callback_line)
+    return rcode, elapsed
+
+
+def restore_toolbox(callback_line, index=app_index):
+    """Elimina el contenedor y los lanzadores; las cachés de paquetes se conservan."""
+    if not container_state.exists():
+        callback_line("No se encontró el contenedor 'treeossecure'.")
+        return RESULT_OK
+    returncode, stderr = remove_toolbox()
+    if returncode != 0:
+        callback_line(f"Error al restaurar TreeOS Secure: {stderr}")
+        return returncode
+    callback_line("TreeOS Secure ha sido restaurado (toolbox eliminado).")
+    callback_line(f"Se conservan las cachés de paquetes en {PACKAGE_CACHE_DIR}.")
+    for app_key, data in APPS_DESKTOP.items():
+        desktop_path = launcher_path(app_key)
+        if os.path.exists(desktop_path):
+            try:
+                os.remove(desktop_path)
+                callback_line(f"Icono para {data['name']} eliminado.")
+            except OSError as e:
+                callback_line(f"Error eliminando icono para {data['name']}: {e}")
+    index.set_chosen(APPS_DESKTOP, chosen=False)
+    index.refresh(callback_line)
+    return RESULT_OK
+
+
+# ========================================
+# APARIENCIA
+# ========================================
+def set_wallpaper(wallpaper_path, callback_line=None):
+    """Prepara la versión a la resolución de los monitores y la aplica (modo claro y oscuro)."""
+    import treeos_wallpapers  # GdkPixbuf: solo cuando se cambia el fondo, no en "--cli status"
+    from gi.repository import Gio
+    rendered = treeos_wallpapers.prepare(wallpaper_path)
+    uri = treeos_wallpapers.apply(rendered)
+    Gio.Settings.sync()  # en la CLI el proceso termina justo después
+    _log(callback_line, f"Fondo aplicado: {uri}")
+    return RESULT_OK
+
+
+def set_theme(theme, callback_line=None):
+    errors = apply_theme(theme)
+    for error in errors:
+        _log(callback_line, error)
+    if errors:
+        return RESULT_FAILED
+    _log(callback_line, f"Tema {theme} aplicado.")
+    return RESULT_OK
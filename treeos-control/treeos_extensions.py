@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# Temas del escritorio mediante la API D-Bus de extensiones de GNOME Shell, sin GTK.
+#
+# Antes cada cambio de tema lanzaba un shell con tres "gnome-extensions
+# enable/disable" en serie (un proceso y una ida y vuelta por D-Bus cada uno).
+# Aquí se envían todas las llamadas EnableExtension/DisableExtension a
+# org.gnome.Shell.Extensions a la vez por la misma conexión y se espera a las
+# respuestas, sin crear procesos. ListExtensions permite saber qué tema está
+# activo para inicializar los botones.
+#
+# Para probar sin GNOME Shell: tools/mock_shell_extensions.py.
+try:
+    from gi.repository import Gio, GLib
+except ImportError:  # THEMES, parse_extensions y detect_theme no usan GLib (CLI, pruebas)
+    Gio = GLib = None
+
+SHELL_EXTENSIONS_BUS = "org.gnome.Shell.Extensions"
+SHELL_EXTENSIONS_PATH = "/org/gnome/Shell/Extensions"
+SHELL_EXTENSIONS_IFACE = "org.gnome.Shell.Extensions"
+DBUS_TIMEOUT_MS = 5000
+STATE_ENABLED = 1  # ExtensionState.ENABLED (ACTIVE desde GNOME 45)
+
+# Extensiones que definen cada tema: (deshabilitar, habilitar).
+THEMES = {
+    "traditional": (["dash-to-dock@micxgx.gmail.com"],
+                    ["blur-my-shell@aunetx", "dash-to-panel@jderose9.github.com"]),
+    "modern": (["dash-to-panel@jderose9.github.com"],
+               ["blur-my-shell@aunetx", "dash-to-dock@micxgx.gmail.com"]),
+}
+
+
+def _bus():
+    return Gio.bus_get_sync(Gio.BusType.SESSION, None)
+
+
+def parse_extensions(reply):
+    """{uuid: habilitada} a partir de la respuesta de ListExtensions."""
+    extensions, = reply.unpack()
+    states = {}
+    for uuid, info in extensions.items():
+        if "enabled" in info:
+            states[uuid] = bool(info["enabled"])
+        else:
+            states[uuid] = int(info.get("state", 0)) == STATE_ENABLED
+    return states
+
+
+def detect_theme(states):
+    """Tema cuyas extensiones coinciden con el estado actual, o None."""
+    for theme, (disable, enable) in THEMES.items():
+        if all(states.get(uuid) for uuid in enable) and not any(states.get(uuid) for uuid in disable):
+            return theme
+    return None
+
+
+def list_extensions_async(callback, bus=None):
+    """callback(estados o None) en el hilo principal cuando llega ListExtensions."""
+    def on_reply(connection, result):
+        try:
+            states = parse_extensions(connection.call_finish(result))
+        except GLib.Error as e:
+            print(f"No se pudo consultar las extensiones de GNOME Shell: {e.message}")
+            states = None
+        callback(states)
+    try:
+        bus = bus or _bus()
+    except GLib.Error as e:
+        print(f"No se pudo conectar al bus de sesión: {e.message}")
+        callback(None)
+        return
+    bus.call(SHELL_EXTENSIONS_BUS, SHELL_EXTENSIONS_PATH, SHELL_EXTENSIONS_IFACE, "ListExtensions",
+             None, GLib.VariantType("(a{sa{sv}})"), Gio.DBusCallFlags.NONE, DBUS_TIMEOUT_MS, None, on_reply)
+
+
+def apply_theme_async(theme, callback=None, bus=None):
+    """
+    Envía de una vez todas las llamadas del tema; callback(errores) cuando han
+    respondido todas (lista vacía si todo fue bien).
+    """
+    disable, enable = THEMES[theme]
+    calls = [("DisableExtension", uuid) for uuid in disable] + [("EnableExtension", uuid) for uuid in enable]
+    errors = []
+    pending = [len(calls)]
+
+    def on_reply(connection, result, call):
+        try:
+            ok, = connection.call_finish(result).unpack()
+            if not ok:
+                errors.append(f"{call[0]} {call[1]}: la extensión no está instalada")
+        except GLib.Error as e:
+            errors.append(f"{call[0]} {call[1]}: {e.message}")
+        pending[0] -= 1
+        if pending[0] == 0 and callback:
+            callback(errors)
+
+    try:
+        bus = bus or _bus()
+    except GLib.Error as e:
+        if callback:
+            callback([f"No se pudo conectar al bus de sesión: {e.message}"])
+        return
+    for call in calls:
+        bus.call(SHELL_EXTENSIONS_BUS, SHELL_EXTENSIONS_PATH, SHELL_EXTENSIONS_IFACE, call[0],
+                 GLib.Variant("(s)", (call[1],)), GLib.VariantType("(b)"), Gio.DBusCallFlags.NONE,
+                 DBUS_TIMEOUT_MS, None, on_reply, call)
+
+
+def apply_theme(theme):
+    """Versión bloqueante para la CLI: ejecuta el lote en un bucle propio y devuelve los errores."""
+    if GLib is None:
+        return ["PyGObject no está disponible: no se puede hablar con GNOME Shell."]
+    context = GLib.MainContext.new()
+    loop = GLib.MainLoop.new(context, False)
+    result = []
+    done = []
+
+    def on_done(errors):
+        result.extend(errors)
+        done.append(True)
+        loop.quit()
+
+    # Las respuestas llegan al contexto por defecto del hilo en el momento de la llamada.
+    context.push_thread_default()
+    try:
+        apply_theme_async(theme, on_done)
+        if not done:  # sin bus de sesión el callback ya se ha llamado
+            loop.run()
+    finally:
+        context.pop_thread_default()
+    return result
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# Arranque rápido de una segunda instancia del panel de control.
+#
+# Gtk.Application ya garantiza una sola instancia por D-Bus, pero para llegar a
+# esa comprobación hay que importar GTK 4. Aquí solo se usa Gio: si el nombre
+# de la aplicación ya tiene dueño en el bus de sesión, se le envía
+# org.freedesktop.Application.Activate (que muestra y eleva la ventana) y la
+# segunda instancia termina sin cargar GTK.
+import os
+from gi.repository import Gio, GLib
+
+APP_ID = "org.treeoscontrol.app"
+DBUS_TIMEOUT_MS = 2000
+
+
+def object_path(app_id):
+    return "/" + app_id.replace(".", "/").replace("-", "_")
+
+
+def platform_data():
+    """Token de activación para que el compositor permita dar el foco a la ventana."""
+    data = {}
+    token = os.environ.get("XDG_ACTIVATION_TOKEN")
+    if token:
+        data["activation-token"] = GLib.Variant("s", token)
+    startup_id = os.environ.get("DESKTOP_STARTUP_ID")
+    if startup_id:
+        data["desktop-startup-id"] = GLib.Variant("s", startup_id)
+    return data
+
+
+def forward_to_running_instance(app_id=APP_ID):
+    """True si ya había una instancia y se le pasó la activación."""
+    try:
+        bus = Gio.bus_get_sync(Gio.BusType.SESSION, None)
+        owned, = bus.call_sync("org.freedesktop.DBus", "/org/freedesktop/DBus", "org.freedesktop.DBus",
+                               "NameHasOwner", GLib.Variant("(s)", (app_id,)), GLib.VariantType("(b)"),
+                               Gio.DBusCallFlags.NONE, DBUS_TIMEOUT_MS, None).unpack()
+        if not owned:
+            return False
+        bus.call_sync(app_id, object_path(app_id), "org.freedesktop.Application", "Activate",
+                      GLib.Variant("(a{sv})", (platform_data(),)), None,
+                      Gio.DBusCallFlags.NONE, DBUS_TIMEOUT_MS, None)
+        return True
+    except GLib.Error:
+        # Sin bus de sesión o instancia que no responde: arranque normal.
+        return False
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# Registro compartido para las vistas de progreso (Actualizaciones y TreeOS Secure).
+#
+# Los hilos de trabajo escriben en un búfer circular sin tocar GTK. El volcado al
+# Gtk.TextView se hace en el hilo principal, como mucho una vez por fotograma, y
+# el TextBuffer se recorta para no superar max_lines.
+#
+# Entre start_run() y finish_run() cada línea se guarda además en el historial
+# persistente (treeos_runlog); load_history() rellena la vista al abrirla con la
+# cola de la última ejecución.
+from gi.repository import GLib
+import collections, threading, time
+from treeos_runlog import runlog
+
+DEFAULT_MAX_LINES = 5000
+
+
+class LogSink:
+    def __init__(self, max_lines=DEFAULT_MAX_LINES, store=runlog):
+        self.max_lines = max_lines
+        self.store = store
+        self._run = None
+        self._pending = collections.deque(maxlen=max_lines)
+        self._lock = threading.Lock()
+        self._clear_requested = False
+        self._flush_scheduled = False
+        self._view = None
+        self._stamp_second = None
+        self._stamp_text = ""
+        self.reset_stats()
+
+    # ----------------------------------------
+    # Lado de los hilos de trabajo
+    # ----------------------------------------
+    def start_run(self, kind):
+        """Limpia la vista y empieza a guardar las líneas como una ejecución de tipo kind."""
+        self.finish_run(None)
+        run = self.store.start_run(kind)
+        with self._lock:
+            self._run = run
+        self.clear()
+        return run
+
+    def finish_run(self, exit_code):
+        run, self._run = self._run, None
+        if run is not None:
+            run.finish(exit_code)
+
+    def append(self, line, stamp=None):
+        stamp = stamp or time.time()
+        run = self._run
+        if run is not None:
+            run.line(line)
+        with self._lock:
+            schedule = self._enqueue(stamp, line)
+        if schedule:
+            GLib.idle_add(self._schedule_flush)
+
+    def _enqueue(self, stamp, line):
+        # Se llama con _lock tomado.
+        if len(self._pending) == self._pending.maxlen:
+            self.lines_dropped += 1
+        self._pending.append((stamp, line))
+        self.lines_total += 1
+        return self._claim_flush()
+
+    def clear(self):
+        with self._lock:
+            self._pending.clear()
+            self._clear_requested = True
+            schedule = self._claim_flush()
+        if schedule:
+            GLib.idle_add(self._schedule_flush)
+
+    def load_history(self, kinds, max_lines=None):
+        """Muestra la última ejecución guardada de esos tipos (se lee en segundo plano)."""
+        def worker():
+            latest = self.store.tail(kinds, max_lines or self.max_lines)
+            if latest is None:
+                return
+            start, end, lines = latest
+            entries = [(start["t"], f"--- Última ejecución: {start['kind']} ---")] + lines
+            if end is None:
+                entries.append((start["t"], "--- Ejecución sin terminar ---"))
+            else:
+                code = end["exit_code"] if end["exit_code"] is not None else "desconocido"
+                entries.append((end["t"], f"--- Código de salida {code}, {end['duration']:.1f} s ---"))
+            # La comprobación y el volcado, bajo el mismo bloqueo que start_run: si
+            # ya empezó otra ejecución, el historial no se mezcla con ella.
+            with self._lock:
+                if self._run is not None:
+                    return
+                schedule = False
+                for stamp, line in entries:
+                    schedule = self._enqueue(stamp, line) or schedule
+            if schedule:
+                GLib.idle_add(self._schedule_flush)
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _claim_flush(self):
+        # Solo un volcado pendiente a la vez: el resto de líneas se acumulan en
+        # el búfer circular hasta que ese volcado se ejecute.
+        if self._flush_scheduled or self._view is None:
+            return False
+        self._flush_scheduled = True
+        return True
+
+    # ----------------------------------------
+    # Lado del hilo principal
+    # ----------------------------------------
+    def attach(self, textview):
+        with self._lock:
+            self._view = textview
+            schedule = self._claim_flush()
+        if schedule:
+            self._schedule_flush()
+
+    def _schedule_flush(self):
+        self._view.add_tick_callback(self._on_tick)
+        return GLib.SOURCE_REMOVE
+
+    def _on_tick(self, widget, frame_clock):
+        self.flush()
+        return GLib.SOURCE_REMOVE
+
+    def flush(self):
+        start = time.perf_counter()
+        with self._lock:
+            batch = list(self._pending)
+            self._pending.clear()
+            clear = self._clear_requested
+            self._clear_requested = False
+            self._flush_scheduled = False
+
+        buffer = self._view.get_buffer()
+        if clear:
+            buffer.set_text("")
+        if batch:
+            text = "".join(f"[{self._format_stamp(stamp)}] {line}\n" for stamp, line in batch)
+            buffer.insert(buffer.get_end_iter(), text)
+            # El búfer siempre termina en una línea vacía tras el último "\n".
+            excess = buffer.get_line_count() - 1 - self.max_lines
+            if excess > 0:
+                _, cut = buffer.get_iter_at_line(excess)
+                buffer.delete(buffer.get_start_iter(), cut)
+
+        elapsed = time.perf_counter() - start
+        self.flushes += 1
+        self.flush_time += elapsed
+        self.max_flush_time = max(self.max_flush_time, elapsed)
+
+    def _format_stamp(self, stamp):
+        second = int(stamp)
+        if second != self._stamp_second:
+            self._stamp_second = second
+            self._stamp_text = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(second))
+        return self._stamp_text
+
+    # ----------------------------------------
+    # Métricas
+    # ----------------------------------------
+    def reset_stats(self):
+        self.started = time.monotonic()
+        self.lines_total = 0
+        self.lines_dropped = 0
+        self.flushes = 0
+        self.flush_time = 0.0
+        self.max_flush_time = 0.0
+
+    def stats(self):
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        return {
+            "lines": self.lines_total,
+            "lines_dropped": self.lines_dropped,
+            "lines_per_second": self.lines_total / elapsed,
+            "flushes": self.flushes,
+            "stall_ms_total": self.flush_time * 1000,
+            "stall_ms_max": self.max_flush_time * 1000,
+        }
+
+    def format_stats(self):
+        s = self.stats()
+        return (f"{s['lines']} líneas ({s['lines_per_second']:.1f}/s, {s['lines_dropped']} descartadas), "
+                f"{s['flushes']} volcados, bloqueo del bucle principal {s['stall_ms_total']:.1f} ms "
+                f"(máx. {s['stall_ms_max']:.1f} ms)")
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# Cliente D-Bus de rpmostreed (org.projectatomic.rpmostree1).
+#
+# En lugar de lanzar "rpm-ostree upgrade/rebase" y leer su salida de texto, se
+# pide la transacción directamente al demonio, se siguen sus señales (mensajes,
+# porcentaje, bytes descargados) y se puede cancelar mientras está en curso.
+#
+# TREEOS_RPMOSTREE_BUS=session apunta el cliente al bus de sesión, donde puede
+# ejecutarse tools/mock_rpmostreed.py para pruebas sin un sistema Silverblue.
+#
+# Sin PyGObject (CLI en un equipo sin el entorno gráfico) el módulo se importa
+# igual: available() devuelve False y treeos_updates usa la orden rpm-ostree.
+try:
+    from gi.repository import Gio, GLib
+except ImportError:
+    Gio = GLib = None
+import os, threading
+
+BUS_NAME = "org.projectatomic.rpmostree1"
+SYSROOT_PATH = "/org/projectatomic/rpmostree1/Sysroot"
+SYSROOT_IFACE = "org.projectatomic.rpmostree1.Sysroot"
+OS_IFACE = "org.projectatomic.rpmostree1.OS"
+TRANSACTION_IFACE = "org.projectatomic.rpmostree1.Transaction"
+CLIENT_ID = "treeos-control"
+
+RESULT_OK = 0
+RESULT_FAILED = 1
+RESULT_CANCELLED = 130
+
+
+def _bus_type():
+    if os.environ.get("TREEOS_RPMOSTREE_BUS") == "session":
+        return Gio.BusType.SESSION
+    return Gio.BusType.SYSTEM
+
+
+def _vardict(values):
+    variants = {}
+    for key, value in values.items():
+        if isinstance(value, bool):
+            variants[key] = GLib.Variant("b", value)
+        elif isinstance(value, int):
+            variants[key] = GLib.Variant("i", value)
+        else:
+            variants[key] = GLib.Variant("s", str(value))
+    return variants
+
+
+def format_bytes(size):
+    if size < 1024:
+        return f"{size} B"
+    size /= 1024
+    for unit in ("KB", "MB"):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+class RpmOstreeEngine:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._transaction = None
+        self._cancel_requested = False
+
+    # ----------------------------------------
+    # Utilidades de bus
+    # ----------------------------------------
+    def _bus(self):
+        return Gio.bus_get_sync(_bus_type(), None)
+
+    def _call(self, bus, path, iface, method, args=None, reply_type=None, flags=None):
+        reply = bus.call_sync(BUS_NAME, path, iface, method, args,
+                              GLib.VariantType(reply_type) if reply_type else None,
+                              Gio.DBusCallFlags.NONE if flags is None else flags, -1, None)
+        return reply.unpack() if reply is not None else ()
+
+    def _get_property(self, bus, path, iface, name):
+        value, = self._call(bus, path, "org.freedesktop.DBus.Properties", "Get",
+                            GLib.Variant("(ss)", (iface, name)), "(v)")
+        return value
+
+    def available(self):
+        """True si rpmostreed responde en el bus configurado."""
+        if Gio is None:
+            return False
+        try:
+            self._get_property(self._bus(), SYSROOT_PATH, SYSROOT_IFACE, "Booted")
+            return True
+        except GLib.Error:
+            return False
+
+    def booted_os_path(self, bus):
+        return self._get_property(bus, SYSROOT_PATH, SYSROOT_IFACE, "Booted")
+
+    # ----------------------------------------
+    # Operaciones
+    # ----------------------------------------
+    def upgrade(self, callback_line, progress=None, **options):
+        """Equivalente a "rpm-ostree upgrade"; options son las del método UpdateDeployment."""
+        return self._run_transaction({}, options, callback_line, progress)
+
+    def rebase(self, refspec, callback_line, progress=None, **options):
+        return self._run_transaction({"set-refspec": refspec}, options, callback_line, progress)
+
+    def cancel(self):
+        """Cancela la transacción en curso (se puede llamar desde cualquier hilo)."""
+        with self._lock:
+            transaction = self._transaction
+            self._cancel_requested = transaction is not None
+        if transaction is None:
+            return False
+        transaction.call(None, "/", TRANSACTION_IFACE, "Cancel", None, None,
+                         Gio.DBusCallFlags.NONE, -1, None, None, None)
+        return True
+
+    def is_running(self):
+        with self._lock:
+            return self._transaction is not None
+
+    def _run_transaction(self, modifiers, options, callback_line, progress):
+        # Se ejecuta en un hilo de trabajo con su propio MainContext para recibir
+        # las señales de la transacción sin pasar por el bucle principal de GTK.
+        context = GLib.MainContext.new()
+        context.push_thread_default()
+        bus = None
+        try:
+            bus = self._bus()
+            self._call(bus, SYSROOT_PATH, SYSROOT_IFACE, "RegisterClient",
+                       GLib.Variant("(a{sv})", ({"id": GLib.Variant("s", CLIENT_ID)},)))
+            os_path = self.booted_os_path(bus)
+            address, = self._call(bus, os_path, OS_IFACE, "UpdateDeployment",
+                                  GLib.Variant("(a{sv}a{sv})", (_vardict(modifiers), _vardict(options))),
+                                  "(s)",
+                                  # Como "rpm-ostree upgrade": polkit puede pedir la contraseña.
+                                  Gio.DBusCallFlags.ALLOW_INTERACTIVE_AUTHORIZATION)
+            connection = Gio.DBusConnection.new_for_address_sync(
+                address, Gio.DBusConnectionFlags.AUTHENTICATION_CLIENT, None, None)
+            return self._follow_transaction(context, connection, callback_line, progress)
+        except GLib.Error as e:
+            callback_line(f"Error de rpm-ostree: {e.message}")
+            return RESULT_FAILED
+        finally:
+            with self._lock:
+                self._transaction = None
+                self._cancel_requested = False
+            if bus is not None:
+                try:
+                    self._call(bus, SYSROOT_PATH, SYSROOT_IFACE, "UnregisterClient",
+                               GLib.Variant("(a{sv})", ({},)))
+                except GLib.Error:
+                    pass
+            context.pop_thread_default()
+
+    def _follow_transaction(self, context, connection, callback_line, progress):
+        loop = GLib.MainLoop.new(context, False)
+        result = {"code": RESULT_FAILED}
+
+        def on_signal(conn, sender, path, iface, name, params, user_data=None):
+            args = params.unpack()
+            if name == "Message":
+                callback_line(args[0])
+            elif name == "TaskBegin":
+                callback_line(args[0])
+            elif name == "PercentProgress":
+                text, percentage = args
+                if progress:
+                    progress(percentage / 100.0, text)
+            elif name == "DownloadProgress":
+                _, _, _, _, (fetched, requested), (transferred, bytes_sec) = args
+                if progress:
+                    fraction = fetched / requested if requested else None
+                    progress(fraction, f"Descargando: {format_bytes(transferred)} ({format_bytes(bytes_sec)}/s)")
+            elif name == "ProgressEnd":
+                if progress:
+                    progress(None, "")
+            elif name == "Finished":
+                success, error_message = args
+                if success:
+                    result["code"] = RESULT_OK
+                elif self._cancel_requested:
+                    callback_line("Transacción cancelada.")
+                    result["code"] = RESULT_CANCELLED
+                else:
+                    callback_line(f"Error: {error_message}")
+                loop.quit()
+
+        def on_closed(conn, remote_peer_vanished, error):
+            if loop.is_running():
+                callback_line("La conexión con rpm-ostree se cerró inesperadamente.")
+                loop.quit()
+
+        connection.signal_subscribe(None, TRANSACTION_IFACE, None, "/", None,
+                                    Gio.DBusSignalFlags.NONE, on_signal, None)
+        connection.connect("closed", on_closed)
+        with self._lock:
+            self._transaction = connection
+
+        started, = connection.call_sync(None, "/", TRANSACTION_IFACE, "Start", None,
+                                        GLib.VariantType("(b)"), Gio.DBusCallFlags.NONE, -1, None).unpack()
+        if not started:
+            # Otro cliente ya la inició: se sigue igualmente hasta "Finished".
+            callback_line("Uniéndose a una transacción de rpm-ostree ya en curso.")
+        loop.run()
+        try:
+            connection.close_sync(None)
+        except GLib.Error:
+            pass
+        return result["code"]
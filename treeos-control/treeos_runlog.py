@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# Historial persistente de ejecuciones (actualizaciones, instalaciones...), sin GTK.
+#
+# Cada ejecución escribe líneas JSON en $XDG_STATE_HOME/treeos-control/runs.jsonl:
+#   {"run": id, "kind": "update", "event": "start", "t": epoch}
+#   {"run": id, "event": "line", "t": epoch, "text": "..."}
+#   {"run": id, "event": "end", "t": epoch, "exit_code": 0, "duration": 12.3}
+# Cada ejecución mantiene el archivo abierto y escribe sus líneas por lotes, cada
+# FLUSH_INTERVAL segundos y al terminar. Al escribir un lote, si se supera
+# MAX_BYTES el archivo rota (runs.jsonl.1 ... .BACKUPS). Para mostrar la última
+# ejecución se lee el archivo desde el final por bloques, sin recorrer todo el
+# historial.
+import fcntl, json, os, threading, time, uuid
+
+STATE_DIR = os.path.join(os.environ.get("XDG_STATE_HOME") or os.path.expanduser("~/.local/state"), "treeos-control")
+RUNLOG_FILE = os.path.join(STATE_DIR, "runs.jsonl")
+MAX_BYTES = 1024 * 1024
+BACKUPS = 3
+TAIL_BLOCK = 16 * 1024
+FLUSH_INTERVAL = 1.0  # segundos entre escrituras de una ejecución en curso
+
+
+class Run:
+    """
+    Una ejecución: el archivo se abre una vez y las líneas se acumulan en memoria;
+    se escriben por lotes cada FLUSH_INTERVAL segundos y al terminar. Toda la E/S
+    (abrir, flock, rotar) ocurre en el hilo del temporizador o en finish(), nunca
+    en el hilo que crea la ejecución (el de GTK).
+    """
+    def __init__(self, log, kind):
+        self.log = log
+        self.kind = kind
+        self.id = uuid.uuid4().hex[:12]
+        self.started = time.time()
+        self.finished = False
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._timer = None
+        self._fd = None
+        with self._lock:
+            self._buffer.append({"run": self.id, "kind": kind, "event": "start", "t": self.started})
+            self._schedule(0)  # el inicio se escribe en cuanto se pueda, pero en segundo plano
+
+    def _schedule(self, delay):
+        """Programa la escritura del lote; llamar con self._lock tomado."""
+        if self._timer is None:
+            self._timer = threading.Timer(delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def line(self, text):
+        with self._lock:
+            if self.finished:
+                return
+            self._buffer.append({"run": self.id, "event": "line", "t": time.time(), "text": text})
+            self._schedule(FLUSH_INTERVAL)
+
+    def flush(self):
+        with self._lock:
+            self._timer = None
+            records, self._buffer = self._buffer, []
+            if records:
+                data = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records).encode("utf-8")
+                self._fd = self.log.write(data, self._fd)
+
+    def finish(self, exit_code):
+        with self._lock:
+            if self.finished:
+                return
+            self.finished = True
+            if self._timer is not None:
+                self._timer.cancel()
+            now = time.time()
+            self._buffer.append({"run": self.id, "event": "end", "t": now, "exit_code": exit_code,
+                                 "duration": round(now - self.started, 3)})
+        self.flush()
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+
+class RunLog:
+    def __init__(self, path=RUNLOG_FILE, max_bytes=MAX_BYTES, backups=BACKUPS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._lock = threading.Lock()
+
+    def start_run(self, kind):
+        return Run(self, kind)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # O_APPEND + flock: el panel y el planificador escriben en el mismo archivo.
+        return os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+
+    def write(self, data, fd=None):
+        """
+        Añade un lote de líneas ya codificadas con un solo flock; la rotación se
+        comprueba aquí. Devuelve el descriptor a reutilizar (otro si el archivo rotó).
+        """
+        try:
+            with self._lock:
+                if fd is None:
+                    fd = self._open()
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                while True:
+                    current = self._is_current(fd)
+                    size = os.fstat(fd).st_size
+                    if current and size > 0 and size + len(data) > self.max_bytes:
+                        self._rotate()
+                        current = False
+                    if current:
+                        break
+                    # Rotado por nosotros o por otro proceso: se sigue en el archivo nuevo.
+                    os.close(fd)
+                    fd = None
+                    fd = self._open()
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                os.write(fd, data)
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        except OSError as e:
+            print(f"No se pudo escribir el historial de ejecuciones: {e}")
+            if fd is not None:
+                os.close(fd)  # libera el flock; el siguiente lote vuelve a abrir
+                fd = None
+        return fd
+
+    def _is_current(self, fd):
+        try:
+            return os.stat(self.path).st_ino == os.fstat(fd).st_ino
+        except FileNotFoundError:
+            return False
+
+    def _rotate(self):
+        for index in range(self.backups - 1, 0, -1):
+            older = f"{self.path}.{index}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.path}.{index + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+    # ----------------------------------------
+    # Lectura desde el final
+    # ----------------------------------------
+    def _reverse_records(self):
+        """Registros del más reciente al más antiguo, leyendo bloques desde el final."""
+        for path in [self.path] + [f"{self.path}.{i}" for i in range(1, self.backups + 1)]:
+            try:
+                f = open(path, "rb")
+            except FileNotFoundError:
+                continue
+            with f:
+                position = f.seek(0, os.SEEK_END)
+                remainder = b""
+                while position > 0:
+                    size = min(TAIL_BLOCK, position)
+                    position -= size
+                    f.seek(position)
+                    lines = (f.read(size) + remainder).split(b"\n")
+                    remainder = lines.pop(0)  # puede ser una línea incompleta
+                    for raw in reversed(lines):
+                        record = self._parse(raw)
+                        if record is not None:
+                            yield record
+                record = self._parse(remainder)
+                if record is not None:
+                    yield record
+
+    @staticmethod
+    def _parse(raw):
+        if not raw.strip():
+            return None
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return None
+
+    def tail(self, kinds, max_lines=500):
+        """
+        Última ejecución de alguno de los tipos indicados:
+        devuelve (inicio, fin o None, [(t, texto), ...]) o None si no hay ninguna.
+        """
+        kinds = (kinds,) if isinstance(kinds, str) else tuple(kinds)
+        by_run = {}
+        for record in self._reverse_records():
+            entry = by_run.setdefault(record.get("run"), {"end": None, "lines": []})
+            event = record.get("event")
+            if event == "end":
+                entry["end"] = record
+            elif event == "line" and len(entry["lines"]) < max_lines:
+                entry["lines"].append((record.get("t", 0), record.get("text", "")))
+            elif event == "start":
+                if record.get("kind") in kinds:
+                    return record, entry["end"], list(reversed(entry["lines"]))
+                del by_run[record.get("run")]
+        return None
+
+
+runlog = RunLog()
+
+
+def run_logger(run, callback_line=None):
+    """callback_line que además guarda cada línea en la ejecución run."""
+    def log(line):
+        run.line(line)
+        if callback_line:
+            callback_line(line)
+    return log
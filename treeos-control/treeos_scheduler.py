@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# Planificador de actualizaciones de TreeOS.
+#
+# Sustituye al bucle de update_checker.sh que despertaba cada 60 segundos: calcula
+# el próximo vencimiento a partir de LAST_UPDATE_CHECK (estado del usuario, ver
+# treeos_config.state_store) y CHECK_FREQUENCY, duerme hasta entonces y solo
+# despierta antes si cambia el archivo de configuración.
+#
+# Con STAGE_UPDATES, en las STAGE_MAX_AGE horas previas al vencimiento intenta
+# además descargar la actualización por adelantado (treeos_staging.py), de modo
+# que la comprobación programada solo tenga que desplegarla.
+import calendar, sys, time
+from datetime import datetime
+try:
+    from gi.repository import GLib
+except ImportError:  # next_due y add_month se usan sin GLib (pruebas); el demonio sí lo necesita
+    GLib = None
+from treeos_config import config_store, state_store
+from treeos_updates import run_scheduled_check, staged_update_ready, STAGE_MAX_AGE
+from treeos_staging import stage_if_allowed
+
+INTERVALS = {
+    "hourly": 60 * 60,
+    "daily": 24 * 60 * 60,
+    "weekly": 7 * 24 * 60 * 60,
+}
+DEFAULT_FREQUENCY = "daily"
+
+# Los temporizadores de GLib usan el reloj monótono, que no avanza durante la
+# suspensión; como mucho se duerme MAX_SLEEP segundos antes de revisar el reloj real.
+MAX_SLEEP = 60 * 60
+RETRY_DELAY = 5 * 60  # Si otra actualización tiene el bloqueo
+STAGE_POLL = 10 * 60  # Cada cuánto se revisan las condiciones de la descarga anticipada
+
+
+def log(message):
+    print(f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} {message}", flush=True)
+
+
+def add_month(timestamp):
+    dt = datetime.fromtimestamp(timestamp)
+    year, month = (dt.year + 1, 1) if dt.month == 12 else (dt.year, dt.month + 1)
+    day = min(dt.day, calendar.monthrange(year, month)[1])
+    return dt.replace(year=year, month=month, day=day).timestamp()
+
+
+def next_due(last_check, frequency):
+    """Momento (epoch) de la próxima comprobación; 0 si nunca se ha comprobado."""
+    if last_check <= 0:
+        return 0
+    if frequency == "monthly":
+        return add_month(last_check)
+    return last_check + INTERVALS.get(frequency, INTERVALS[DEFAULT_FREQUENCY])
+
+
+class UpdateScheduler:
+    def __init__(self, store=config_store, run_check=run_scheduled_check, clock=time.time,
+                 stage=stage_if_allowed, is_staged=staged_update_ready, state=state_store):
+        self.store = store
+        self.state = state
+        self.run_check = run_check
+        self.clock = clock
+        self.stage = stage
+        self.is_staged = is_staged
+        self._timeout_id = None
+        self._last_run = 0  # Por si no se pudo guardar LAST_UPDATE_CHECK
+
+    def start(self):
+        self.store.watch(self.on_config_changed)
+        self.reschedule()
+
+    def on_config_changed(self):
+        log("Configuración modificada; recalculando la próxima comprobación.")
+        self.reschedule()
+
+    def reschedule(self):
+        if self._timeout_id is not None:
+            GLib.source_remove(self._timeout_id)
+            self._timeout_id = None
+
+        config = self.store.read()
+        if not config.get("AUTO_UPDATES_ENABLED", True):
+            log("Actualizaciones automáticas desactivadas; esperando cambios en la configuración.")
+            return
+
+        last_check = max(self.state.get("LAST_UPDATE_CHECK", 0), self._last_run)
+        due = next_due(last_check, config.get("CHECK_FREQUENCY", DEFAULT_FREQUENCY))
+        remaining = due - self.clock()
+        if remaining <= 0:
+            if self.run_check(log):
+                self._last_run = int(self.clock())
+                return self.reschedule()
+            remaining = RETRY_DELAY
+        else:
+            log(f"Próxima comprobación: {datetime.fromtimestamp(due).strftime('%Y-%m-%d %H:%M:%S')}.")
+            if config.get("STAGE_UPDATES", True) and remaining <= STAGE_MAX_AGE and not self.is_staged():
+                if not self.stage(log):
+                    remaining = min(remaining, STAGE_POLL)
+        self._timeout_id = GLib.timeout_add_seconds(int(min(remaining, MAX_SLEEP)) + 1, self._on_timeout)
+
+    def _on_timeout(self):
+        self._timeout_id = None
+        self.reschedule()
+        return GLib.SOURCE_REMOVE
+
+
+def main():
+    loop = GLib.MainLoop()
+    UpdateScheduler().start()
+    try:
+        loop.run()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
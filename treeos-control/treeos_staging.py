@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# Descarga anticipada de actualizaciones (rpm-ostree --download-only).
+#
+# El planificador descarga la actualización cuando el equipo está en reposo,
+# conectado a la corriente y en una red no medida; al llegar la hora (o al pulsar
+# "Actualizar Ahora") solo se despliega lo ya descargado (--cache-only).
+#
+# Las condiciones son detectores intercambiables. TREEOS_STAGING_BUS=session
+# consulta UPower y NetworkManager en el bus de sesión, donde puede ejecutarse
+# tools/mock_power_network.py para pruebas.
+#
+#   python3 treeos_staging.py          muestra el estado de cada condición
+#   python3 treeos_staging.py --stage  descarga ahora si se cumplen todas
+import os, sys
+try:
+    from gi.repository import Gio, GLib
+except ImportError:  # Importable sin GLib (pruebas del planificador); los detectores sí lo necesitan
+    Gio = GLib = None
+from treeos_updates import (stage_updates_py, staged_update_ready,
+                            acquire_update_lock, release_update_lock)
+from treeos_rpmostree import RESULT_OK
+from treeos_runlog import runlog, run_logger
+
+IDLE_THRESHOLD = 5 * 60  # segundos sin actividad para considerar el equipo en reposo
+DBUS_TIMEOUT_MS = 2000
+
+NM_METERED_YES = 1
+NM_METERED_GUESS_YES = 3
+
+
+def _system_bus_type():
+    if os.environ.get("TREEOS_STAGING_BUS") == "session":
+        return Gio.BusType.SESSION
+    return Gio.BusType.SYSTEM
+
+
+def _call(bus_type, name, path, iface, method, args=None, reply_type=None):
+    bus = Gio.bus_get_sync(bus_type, None)
+    reply = bus.call_sync(name, path, iface, method, args,
+                          GLib.VariantType(reply_type) if reply_type else None,
+                          Gio.DBusCallFlags.NONE, DBUS_TIMEOUT_MS, None)
+    return reply.unpack()
+
+
+def _get_property(bus_type, name, path, iface, prop):
+    value, = _call(bus_type, name, path, "org.freedesktop.DBus.Properties", "Get",
+                   GLib.Variant("(ss)", (iface, prop)), "(v)")
+    return value
+
+
+# ========================================
+# DETECTORES
+# ========================================
+# Cada detector devuelve (cumple, motivo). Si el servicio no está disponible se
+# decide de forma conservadora solo donde equivocarse molestaría al usuario.
+class IdleDetector:
+    name = "reposo"
+
+    def __init__(self, threshold=IDLE_THRESHOLD):
+        self.threshold = threshold
+
+    def check(self):
+        try:
+            idle_ms, = _call(Gio.BusType.SESSION, "org.gnome.Mutter.IdleMonitor",
+                             "/org/gnome/Mutter/IdleMonitor/Core", "org.gnome.Mutter.IdleMonitor",
+                             "GetIdletime", None, "(t)")
+        except GLib.Error:
+            return False, "no se pudo consultar el tiempo de inactividad"
+        idle = idle_ms // 1000
+        return idle >= self.threshold, f"{idle} s sin actividad (mínimo {self.threshold} s)"
+
+
+class PowerDetector:
+    name = "corriente"
+
+    def check(self):
+        try:
+            on_battery = _get_property(_system_bus_type(), "org.freedesktop.UPower",
+                                       "/org/freedesktop/UPower", "org.freedesktop.UPower", "OnBattery")
+        except GLib.Error:
+            return True, "UPower no disponible; se asume corriente alterna"
+        return not on_battery, "en batería" if on_battery else "conectado a la corriente"
+
+
+class MeteredDetector:
+    name = "red"
+
+    def check(self):
+        try:
+            metered = _get_property(_system_bus_type(), "org.freedesktop.NetworkManager",
+                                    "/org/freedesktop/NetworkManager", "org.freedesktop.NetworkManager",
+                                    "Metered")
+        except GLib.Error:
+            return True, "NetworkManager no disponible; se asume red no medida"
+        is_metered = metered in (NM_METERED_YES, NM_METERED_GUESS_YES)
+        return not is_metered, "red medida" if is_metered else "red no medida"
+
+
+def default_detectors():
+    return [IdleDetector(), PowerDetector(), MeteredDetector()]
+
+
+class StagingPolicy:
+    def __init__(self, detectors=None):
+        self.detectors = detectors if detectors is not None else default_detectors()
+
+    def check(self):
+        """Devuelve (se puede descargar, [(nombre, cumple, motivo), ...])."""
+        results = [(d.name, *d.check()) for d in self.detectors]
+        return all(ok for _, ok, _ in results), results
+
+
+def stage_if_allowed(callback_line, policy=None):
+    """Descarga la actualización si se cumplen las condiciones; True si queda descargada."""
+    if staged_update_ready():
+        return True
+    allowed, results = (policy or StagingPolicy()).check()
+    if not allowed:
+        reasons = ", ".join(reason for _, ok, reason in results if not ok)
+        callback_line(f"Descarga anticipada pospuesta: {reasons}.")
+        return False
+    if not acquire_update_lock():
+        callback_line("Ya se está ejecutando una actualización; se pospone la descarga anticipada.")
+        return False
+    run = runlog.start_run("stage")
+    callback_line = run_logger(run, callback_line)
+    rcode = None
+    try:
+        callback_line("Descargando la actualización por adelantado...")
+        rcode = stage_updates_py(callback_line)
+    finally:
+        run.finish(rcode)
+        release_update_lock()
+    if rcode == RESULT_OK:
+        callback_line("Actualización descargada; se aplicará en la próxima comprobación.")
+    return rcode == RESULT_OK
+
+
+def main(args):
+    if "--stage" in args:
+        return 0 if stage_if_allowed(print) else 1
+    allowed, results = StagingPolicy().check()
+    for name, ok, reason in results:
+        print(f"{name:10} {'sí' if ok else 'no':3} {reason}")
+    print(f"Descarga anticipada {'permitida' if allowed else 'pospuesta'}; "
+          f"actualización descargada: {'sí' if staged_update_ready() else 'no'}")
+    return 0 if allowed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# Caché persistente de miniaturas para las vistas previas del panel de control.
+#
+# Las miniaturas se guardan en $XDG_CACHE_HOME/treeos-control/thumbnails con un
+# nombre derivado de (ruta de origen, mtime, tamaño del archivo, tamaño de la
+# miniatura). Si el original cambia, la clave cambia y la miniatura se regenera.
+import gi
+gi.require_version("GdkPixbuf", "2.0")
+from gi.repository import GdkPixbuf, GLib
+import hashlib, os, queue, threading
+
+CACHE_DIR = os.path.join(GLib.get_user_cache_dir(), "treeos-control", "thumbnails")
+
+
+class ThumbnailCache:
+    def __init__(self, size, cache_dir=CACHE_DIR):
+        self.size = size
+        self.cache_dir = cache_dir
+        self._queue = queue.Queue()
+        self._pending = {}  # ruta de origen -> callbacks esperando la miniatura
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def thumbnail_path(self, source):
+        try:
+            st = os.stat(source)
+        except OSError:
+            return None
+        key = f"{os.path.abspath(source)}\0{st.st_mtime_ns}\0{st.st_size}\0{self.size}"
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, digest + ".png")
+
+    def lookup(self, source):
+        """Devuelve la ruta de la miniatura si ya está en caché, o None."""
+        thumb = self.thumbnail_path(source)
+        if thumb and os.path.isfile(thumb):
+            return thumb
+        return None
+
+    def request(self, source, callback):
+        """
+        Llama a callback(ruta_miniatura) en el hilo principal. Si la miniatura
+        no está en caché se genera en segundo plano; callback recibe None si
+        no se pudo generar.
+        """
+        cached = self.lookup(source)
+        if cached:
+            callback(cached)
+            return
+        with self._lock:
+            if source in self._pending:
+                self._pending[source].append(callback)
+                return
+            self._pending[source] = [callback]
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, daemon=True)
+                self._worker.start()
+        self._queue.put(source)
+
+    def cancel(self, source, callback):
+        """Retira un callback pendiente; si no queda ninguno, no se genera la miniatura."""
+        with self._lock:
+            callbacks = self._pending.get(source)
+            if callbacks and callback in callbacks:
+                callbacks.remove(callback)
+
+    def generate(self, source):
+        """Genera (si hace falta) la miniatura de source y devuelve su ruta."""
+        thumb = self.thumbnail_path(source)
+        if thumb is None:
+            return None
+        if os.path.isfile(thumb):
+            return thumb
+        tmp_path = f"{thumb}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            pixbuf = GdkPixbuf.Pixbuf.new_from_file_at_scale(source, self.size, self.size, True)
+            pixbuf.savev(tmp_path, "png", [], [])
+            os.replace(tmp_path, thumb)
+            return thumb
+        except (GLib.Error, OSError) as e:
+            print(f"No se pudo generar la miniatura de {source}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return None
+
+    def _run(self):
+        while True:
+            source = self._queue.get()
+            with self._lock:
+                if not self._pending.get(source):
+                    # Nadie espera ya esta miniatura (p. ej. la celda salió de la vista).
+                    self._pending.pop(source, None)
+                    continue
+            thumb = self.generate(source)
+            with self._lock:
+                callbacks = self._pending.pop(source, [])
+            for callback in callbacks:
+                GLib.idle_add(self._deliver, callback, thumb)
+
+    @staticmethod
+    def _deliver(callback, thumb):
+        callback(thumb)
+        return GLib.SOURCE_REMOVE
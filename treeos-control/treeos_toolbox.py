@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# Estado del contenedor toolbox "treeossecure", sin dependencias de GTK.
+#
+# "toolbox list" arranca podman y tarda cientos de milisegundos; en lugar de
+# llamarlo antes de cada acción, el estado se consulta una vez en segundo plano
+# y se mantiene al día escuchando "podman events" para ese contenedor.
+import subprocess, threading, json, atexit, time, os, shlex
+
+CONTAINER_NAME = "treeossecure"
+TOOLBOX_IMAGE = "registry.fedoraproject.org/fedora-toolbox"
+RESOURCE_DIR = os.environ.get("TREEOS_RESOURCE_DIR", "/usr/share/treeos-control")
+# Imagen de TreeOS con las herramientas ya instaladas (ver treeossecure/Containerfile),
+# publicada igual que latest-release. Si no se puede descargar se usa TOOLBOX_IMAGE.
+TOOLBOX_IMAGE_FILE = os.path.join(RESOURCE_DIR, "toolbox-image")
+
+# Cachés de paquetes en el $HOME del host (toolbox lo monta en la misma ruta),
+# de modo que sobreviven a "toolbox rm" al restaurar TreeOS Secure.
+PACKAGE_CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+                                 "treeos-control", "toolbox")
+DNF_CACHE_DIR = os.path.join(PACKAGE_CACHE_DIR, "dnf")
+CONDA_PKGS_DIR = os.path.join(PACKAGE_CACHE_DIR, "conda-pkgs")
+EVENTS_RESTART_DELAY = 5  # segundos antes de relanzar "podman events" si termina
+
+
+class ContainerState:
+    def __init__(self, name=CONTAINER_NAME):
+        self.name = name
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._exists = False
+        self._running = False
+        self._events = None
+        self._stopped = False
+        self._listeners = []
+
+    def add_listener(self, listener):
+        """listener(exists, running) se llama (desde un hilo) cuando cambia el estado."""
+        self._listeners.append(listener)
+
+    def warm(self):
+        """Consulta el estado en segundo plano y empieza a vigilar los eventos de podman."""
+        threading.Thread(target=self._watch_events, daemon=True).start()
+
+    def refresh(self):
+        try:
+            result = subprocess.run(
+                ["podman", "container", "inspect", "--format", "{{.State.Running}}", self.name],
+                capture_output=True, text=True)
+        except OSError as e:
+            print(f"No se pudo consultar el contenedor {self.name}: {e}")
+            self._set(False, False)
+            return
+        exists = result.returncode == 0
+        self._set(exists, exists and result.stdout.strip() == "true")
+
+    def _set(self, exists, running):
+        with self._lock:
+            changed = (exists, running) != (self._exists, self._running) or not self._ready.is_set()
+            self._exists, self._running = exists, running
+            self._ready.set()
+        if changed:
+            for listener in self._listeners:
+                listener(exists, running)
+
+    def _ensure_ready(self, timeout):
+        if not self._ready.wait(timeout):
+            self.refresh()
+
+    def exists(self, timeout=5):
+        self._ensure_ready(timeout)
+        with self._lock:
+            return self._exists
+
+    def is_running(self, timeout=5):
+        self._ensure_ready(timeout)
+        with self._lock:
+            return self._running
+
+    def mark(self, exists, running=False):
+        """Actualiza la caché tras una operación propia (crear/eliminar) sin esperar al evento."""
+        self._set(exists, running)
+
+    def _watch_events(self):
+        while not self._stopped:
+            try:
+                # Se abre el flujo de eventos antes de la consulta inicial para no
+                # perder cambios ocurridos entre ambas.
+                self._events = subprocess.Popen(
+                    ["podman", "events", "--filter", f"container={self.name}",
+                     "--filter", "type=container", "--format", "json"],
+                    stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+                self.refresh()
+                for line in self._events.stdout:
+                    self._on_event(line)
+            except OSError as e:
+                print(f"No se pudo vigilar el contenedor {self.name}: {e}")
+                self._ready.set()
+                return
+            finally:
+                if self._events is not None:
+                    self._events.stdout.close()
+                    self._events.wait()
+            if not self._stopped:
+                time.sleep(EVENTS_RESTART_DELAY)
+
+    def _on_event(self, line):
+        try:
+            event = json.loads(line)
+        except ValueError:
+            return
+        if event.get("Name") != self.name:
+            return
+        status = event.get("Status")
+        with self._lock:
+            exists = self._exists
+        if status == "create":
+            self._set(True, False)
+        elif status in ("start", "restart", "unpause"):
+            self._set(True, True)
+        elif status in ("died", "stop", "kill", "pause"):
+            self._set(exists, False)
+        elif status == "remove":
+            self._set(False, False)
+
+    def stop(self):
+        self._stopped = True
+        if self._events is not None and self._events.poll() is None:
+            self._events.terminate()
+
+
+container_state = ContainerState()
+atexit.register(container_state.stop)
+
+
+def read_toolbox_image():
+    try:
+        with open(TOOLBOX_IMAGE_FILE) as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+def pull_image(image, callback_line=None):
+    try:
+        subprocess.run(["podman", "pull", "--quiet", image], check=True, capture_output=True, text=True)
+        return True
+    except subprocess.CalledProcessError as e:
+        if callback_line:
+            callback_line(f"No se pudo descargar {image}: {e.stderr.strip()}")
+        return False
+
+
+def configure_package_caches(callback_line=None, state=container_state):
+    """
+    Apunta dnf (con keepcache) y los paquetes de conda a las cachés del host.
+    dnf5 usa system_cachedir al ejecutarse como root; dnf4 usa cachedir.
+    """
+    for directory in (DNF_CACHE_DIR, CONDA_PKGS_DIR):
+        os.makedirs(directory, exist_ok=True)
+    script = (
+        "grep -q '^# treeos-cache' /etc/dnf/dnf.conf || "
+        f"printf '%s\\n' '# treeos-cache' keepcache=True {shlex.quote('cachedir=' + DNF_CACHE_DIR)} "
+        f"{shlex.quote('system_cachedir=' + DNF_CACHE_DIR)} >> /etc/dnf/dnf.conf; "
+        "mkdir -p /etc/conda/condarc.d && "
+        f"printf 'pkgs_dirs:\\n  - %s\\n' {shlex.quote(CONDA_PKGS_DIR)} > /etc/conda/condarc.d/treeos-cache.yml"
+    )
+    result = subprocess.run(["toolbox", "run", "--container", state.name, "sudo", "sh", "-c", script],
+                            capture_output=True, text=True)
+    if callback_line:
+        if result.returncode == 0:
+            callback_line(f"Cachés de paquetes persistentes en {PACKAGE_CACHE_DIR}.")
+        else:
+            callback_line(f"No se pudieron configurar las cachés de paquetes: {result.stderr.strip()}")
+    return result.returncode == 0
+
+
+def ensure_toolbox_exists(callback_line=None, state=container_state):
+    """Crea el contenedor si no existe; devuelve True si lo ha creado ahora."""
+    if state.exists():
+        return False
+    try:
+        if callback_line:
+            callback_line(f"Contenedor '{state.name}' no encontrado. Creándolo automáticamente...")
+        image = read_toolbox_image()
+        if not image or not pull_image(image, callback_line):
+            image = TOOLBOX_IMAGE
+            if not pull_image(image, callback_line):
+                raise OSError(f"no se pudo descargar {image}")
+        subprocess.run(f"echo y | toolbox create -c {shlex.quote(state.name)} --image {shlex.quote(image)}",
+                       shell=True, check=True)
+        state.mark(True)
+        if callback_line:
+            callback_line(f"Contenedor '{state.name}' creado exitosamente a partir de {image}.")
+        configure_package_caches(callback_line, state)
+        return True
+    except (subprocess.CalledProcessError, OSError) as e:
+        if callback_line:
+            callback_line(f"Error al verificar/crear contenedor: {e}")
+        return False
+
+
+def remove_toolbox(state=container_state):
+    """Elimina el contenedor; devuelve (código, stderr)."""
+    result = subprocess.run(["toolbox", "rm", "-f", state.name], capture_output=True, text=True)
+    if result.returncode == 0:
+        state.mark(False)
+    return result.returncode, result.stderr
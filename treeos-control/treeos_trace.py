@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# Instrumentación opcional del panel de control en formato Chrome Trace Event.
+#
+#   TREEOS_TRACE=/tmp/treeos.json python3 treeos-control.py
+#
+# Al salir se escribe el archivo, que se puede abrir en chrome://tracing o en
+# https://ui.perfetto.dev. Se registran la importación de módulos, la
+# construcción de cada página, el primer fotograma, cada subproceso de
+# ejecutar_comando_captura y los bloqueos del bucle principal: un hilo vigía
+# detecta cuando el bucle deja de atender su latido durante más de
+# TREEOS_TRACE_STALL_MS y anota la función Python que lo estaba ocupando.
+#
+# Sin TREEOS_TRACE todas las funciones son no-ops.
+import atexit, json, os, sys, threading, time, traceback
+from contextlib import contextmanager
+
+TRACE_FILE = os.environ.get("TREEOS_TRACE")
+STALL_THRESHOLD_MS = int(os.environ.get("TREEOS_TRACE_STALL_MS", "100"))
+HEARTBEAT_MS = 20
+
+# Momento más temprano disponible: este módulo se importa el primero.
+PROCESS_START = time.perf_counter()
+
+
+def now_us():
+    return (time.perf_counter() - PROCESS_START) * 1e6
+
+
+class Tracer:
+    def __init__(self, path):
+        self.path = path
+        self.enabled = bool(path)
+        self.pid = os.getpid()
+        self._events = []
+        self._named_threads = set()
+        self._lock = threading.Lock()
+        if self.enabled:
+            atexit.register(self.save)
+
+    def _add(self, event):
+        tid = threading.get_ident()
+        event.setdefault("pid", self.pid)
+        event.setdefault("tid", tid)
+        with self._lock:
+            if tid not in self._named_threads:
+                self._named_threads.add(tid)
+                self._events.append({"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid,
+                                     "args": {"name": threading.current_thread().name}})
+            self._events.append(event)
+
+    def complete(self, name, cat, start_us, dur_us, args=None, tid=None):
+        if not self.enabled:
+            return
+        event = {"name": name, "cat": cat, "ph": "X", "ts": start_us, "dur": dur_us, "args": args or {}}
+        if tid is not None:
+            event["tid"] = tid
+        self._add(event)
+
+    def instant(self, name, cat, args=None):
+        if self.enabled:
+            self._add({"name": name, "cat": cat, "ph": "i", "s": "p", "ts": now_us(), "args": args or {}})
+
+    @contextmanager
+    def span(self, name, cat, args=None):
+        """Registra la duración del bloque; args puede completarse dentro del bloque."""
+        args = {} if args is None else args
+        if not self.enabled:
+            yield args
+            return
+        start = now_us()
+        try:
+            yield args
+        finally:
+            self.complete(name, cat, start, now_us() - start, args)
+
+    def save(self):
+        with self._lock:
+            events = list(self._events)
+        try:
+            with open(self.path, "w") as f:
+                json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        except OSError as e:
+            print(f"No se pudo guardar la traza en {self.path}: {e}")
+
+
+tracer = Tracer(TRACE_FILE)
+
+
+# ========================================
+# DETECTOR DE BLOQUEOS DEL BUCLE PRINCIPAL
+# ========================================
+def _handler_name(frame):
+    """Primera función propia llamada desde el bucle principal (la que lo bloquea)."""
+    stack = traceback.extract_stack(frame)
+    ours = [entry for entry in stack if "/gi/" not in entry.filename and entry.name != "<module>"]
+    entry = ours[0] if ours else stack[-1]
+    return f"{entry.name} ({os.path.basename(entry.filename)}:{entry.lineno})"
+
+
+class StallWatchdog:
+    def __init__(self, glib, trace=tracer, threshold_ms=STALL_THRESHOLD_MS):
+        self.glib = glib
+        self.tracer = trace
+        self.threshold_us = threshold_ms * 1000
+        self.main_thread_id = threading.main_thread().ident
+        self._heartbeat = now_us()
+        self._stall = None  # (inicio, manejador, pila) del bloqueo en curso
+
+    def start(self):
+        if not self.tracer.enabled:
+            return
+        self.glib.timeout_add(HEARTBEAT_MS, self._beat)
+        threading.Thread(target=self._watch, name="treeos-trace-watchdog", daemon=True).start()
+
+    def _beat(self):
+        self._heartbeat = now_us()
+        return True
+
+    def _watch(self):
+        while True:
+            time.sleep(HEARTBEAT_MS / 1000)
+            last = self._heartbeat
+            blocked_us = now_us() - last - HEARTBEAT_MS * 1000
+            if blocked_us > self.threshold_us and self._stall is None:
+                frame = sys._current_frames().get(self.main_thread_id)
+                if frame is not None:
+                    stack = [f"{e.name} ({os.path.basename(e.filename)}:{e.lineno})"
+                             for e in traceback.extract_stack(frame)]
+                    self._stall = (last, _handler_name(frame), stack)
+            elif self._stall is not None and last > self._stall[0]:
+                start, handler, stack = self._stall
+                self._stall = None
+                self.tracer.complete(f"bloqueo: {handler}", "stall", start, last - start,
+                                     {"handler": handler, "stack": stack}, tid=self.main_thread_id)
+                print(f"[treeos-trace] bucle principal bloqueado {(last - start) / 1000:.0f} ms en {handler}")
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+# Lógica de actualización del sistema (rpm-ostree), sin dependencias de GTK.
+# La usan el panel de control y el planificador de actualizaciones.
+import subprocess, os, re, time, json
+from treeos_config import read_config, write_config
+from treeos_rpmostree import RpmOstreeEngine, RESULT_OK, RESULT_CANCELLED
+from treeos_trace import tracer
+from treeos_runlog import runlog, run_logger
+
+RESOURCE_DIR = os.environ.get("TREEOS_RESOURCE_DIR", "/usr/share/treeos-control")
+LATEST_RELEASE_FILE = os.path.join(RESOURCE_DIR, "latest-release")
+OS_RELEASE_FILE = "/etc/os-release"
+
+LOCK_FILE = "/tmp/treeos_update.lock"  # usado para actualizaciones
+
+# Actualización descargada por adelantado (ver treeos_staging.py). Pasado
+# STAGE_MAX_AGE se descarta y se vuelve a descargar al aplicar.
+STATE_DIR = os.path.join(os.environ.get("XDG_STATE_HOME") or os.path.expanduser("~/.local/state"), "treeos-control")
+STAGE_STATE_FILE = os.path.join(STATE_DIR, "staged-update.json")
+STAGE_MAX_AGE = 12 * 60 * 60
+
+# Motor D-Bus compartido: permite cancelar desde la interfaz la transacción en curso.
+update_engine = RpmOstreeEngine()
+
+# ========================================
+# FUNCIONES DE SUBPROCESOS Y EJECUCIÓN
+# ========================================
+def ejecutar_comando_captura(comando, callback_line=None):
+    with tracer.span("subproceso", "subprocess", {"command": comando}) as trace_args:
+        process = subprocess.Popen(comando, shell=True,
+                                   stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                   text=True)
+        for line in iter(process.stdout.readline, ''):
+            if callback_line:
+                callback_line(line.rstrip())
+        process.stdout.close()
+        process.wait()
+        trace_args["returncode"] = process.returncode
+    return process.returncode
+
+def upgrade_py(callback_line, progress=None, **options):
+    # Se usa la API D-Bus de rpmostreed si está disponible; si no, la CLI.
+    # options son las de UpdateDeployment ("download-only", "cache-only"...).
+    if update_engine.available():
+        return update_engine.upgrade(callback_line, progress, **options)
+    flags = "".join(f" --{name}" for name, enabled in options.items() if enabled)
+    return ejecutar_comando_captura(f"rpm-ostree upgrade{flags}", callback_line)
+
+def apply_updates_py(callback_line, progress=None):
+    # Si ya se descargó la actualización, solo se despliega desde la caché local.
+    if staged_update_ready():
+        callback_line("Aplicando la actualización descargada previamente...")
+        rcode = upgrade_py(callback_line, progress, **{"cache-only": True})
+        clear_staged_update()
+        if rcode in (RESULT_OK, RESULT_CANCELLED):
+            return rcode
+        callback_line("No se pudo aplicar desde la caché; se descargará de nuevo.")
+    return upgrade_py(callback_line, progress)
+
+def stage_updates_py(callback_line, progress=None):
+    """Descarga la actualización sin desplegarla ("rpm-ostree upgrade --download-only")."""
+    rcode = upgrade_py(callback_line, progress, **{"download-only": True})
+    if rcode == RESULT_OK:
+        os.makedirs(STATE_DIR, exist_ok=True)
+        tmp_path = f"{STAGE_STATE_FILE}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"staged_at": int(time.time())}, f)
+        os.replace(tmp_path, STAGE_STATE_FILE)
+    return rcode
+
+def staged_update_ready():
+    try:
+        with open(STAGE_STATE_FILE) as f:
+            staged_at = json.load(f).get("staged_at", 0)
+    except (OSError, ValueError):
+        return False
+    return 0 <= time.time() - staged_at < STAGE_MAX_AGE
+
+def clear_staged_update():
+    try:
+        os.remove(STAGE_STATE_FILE)
+    except FileNotFoundError:
+        pass
+
+def rebase_py(refspec, callback_line, progress=None):
+    if update_engine.available():
+        return update_engine.rebase(refspec, callback_line, progress)
+    return ejecutar_comando_captura(f"rpm-ostree rebase {refspec}", callback_line)
+
+# ========================================
+# PLANIFICADOR: SOLO TRANSACCIONES CON TRABAJO REAL
+# ========================================
+UPGRADE_CHECK_NO_UPDATES = 77  # código de "rpm-ostree upgrade --check" sin novedades
+OSTREE_REPO = "/sysroot/ostree/repo"
+
+def read_latest_release():
+    try:
+        with open(LATEST_RELEASE_FILE) as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+def rpmostree_deployments():
+    """Despliegues de "rpm-ostree status --json"; lista vacía si no se puede consultar."""
+    try:
+        result = subprocess.run(["rpm-ostree", "status", "--json"], capture_output=True, text=True)
+        return json.loads(result.stdout).get("deployments", []) if result.returncode == 0 else []
+    except (OSError, ValueError):
+        return []
+
+def parse_upgrade_check(output):
+    """Versión y resumen de paquetes ("Diff: 12 upgraded, 1 added") de "rpm-ostree upgrade --check"."""
+    details = {}
+    for line in output.splitlines():
+        key, _, value = line.strip().partition(":")
+        if key in ("Version", "Diff") and value.strip():
+            details[key.lower()] = value.strip()
+    return details
+
+def check_upgrade(callback_line):
+    """
+    "rpm-ostree upgrade --check": solo descarga los metadatos del commit.
+    Devuelve (True/False, o None si no se pudo saber; detalles de parse_upgrade_check).
+    """
+    try:
+        result = subprocess.run(["rpm-ostree", "upgrade", "--check"], capture_output=True, text=True)
+    except OSError as e:
+        callback_line(f"No se pudo comprobar si hay actualizaciones: {e}")
+        return None, {}
+    if result.returncode == UPGRADE_CHECK_NO_UPDATES:
+        return False, {}
+    if result.returncode != 0:
+        error = (result.stderr.strip().splitlines() or [f"código {result.returncode}"])[-1]
+        callback_line(f"No se pudo comprobar si hay actualizaciones: {error}")
+        return None, {}
+    details = parse_upgrade_check(result.stdout)
+    for key in ("version", "diff"):
+        if key in details:
+            callback_line(f"{key.capitalize()}: {details[key]}")
+    return True, details
+
+def estimate_download_size(refspec):
+    """
+    Tamaño estimado con "ostree pull --dry-run" (requiere deltas estáticos); None si no se sabe.
+    Necesita escribir en el repositorio del sistema: sin root ni se intenta.
+    """
+    remote, _, ref = refspec.partition(":")
+    if not ref or os.geteuid() != 0:
+        return None
+    try:
+        result = subprocess.run(["ostree", "pull", "--dry-run", f"--repo={OSTREE_REPO}", remote, ref],
+                                capture_output=True, text=True, timeout=60)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    m = re.search(r"[Ee]stimated.*?:\s*([\d.,]+\s*[kKMGT]?i?B)", result.stdout + result.stderr)
+    return m.group(1) if m else None
+
+def plan_rebase(callback_line, deployments=None):
+    """refspec de latest-release si todavía hay que hacer rebase; None si no."""
+    latest_release = read_latest_release()
+    if not latest_release:
+        return None
+    m = re.search(r'/(\d+)/', latest_release)
+    extracted_version = m.group(1) if m else None
+
+    deployments = rpmostree_deployments() if deployments is None else deployments
+    if deployments:
+        # El despliegue por defecto (índice 0) puede ser un rebase pendiente de reinicio.
+        booted = next((d for d in deployments if d.get("booted")), deployments[0])
+        if latest_release in (booted.get("origin"), deployments[0].get("origin")):
+            return None
+        booted_major = str(booted.get("version", "")).split(".")[0]
+        if extracted_version is not None and extracted_version == booted_major:
+            return None
+        return latest_release
+
+    # Sin "rpm-ostree status": comparación anterior con os-release y STORED_VERSION.
+    current_version = ""
+    try:
+        with open(OS_RELEASE_FILE) as f:
+            for line in f:
+                if line.startswith("VERSION_ID="):
+                    current_version = line.split("=")[1].strip().strip('"')
+                    break
+    except Exception as e:
+        callback_line(f"Error al obtener la versión actual de Fedora: {e}")
+    if latest_release == read_config().get("STORED_VERSION", "").strip():
+        return None
+    if extracted_version is not None and extracted_version == current_version:
+        return None
+    return latest_release
+
+def plan_updates(callback_line):
+    """
+    Comprobaciones baratas antes de abrir ninguna transacción. "upgrade" es
+    True, False o None (no se pudo comprobar); "changes" es lo que anuncia
+    rpm-ostree de la actualización (versión y paquetes), que se conoce sin
+    descargarla; "download" solo cuando se puede estimar el tamaño.
+    """
+    deployments = rpmostree_deployments()
+    changes = {}
+    if staged_update_ready():
+        upgrade = True  # ya descargada: solo falta desplegarla
+    else:
+        upgrade, changes = check_upgrade(callback_line)
+    rebase = plan_rebase(callback_line, deployments)
+    download = None
+    if rebase:
+        download = estimate_download_size(rebase)
+    elif upgrade is not False and deployments:
+        booted = next((d for d in deployments if d.get("booted")), deployments[0])
+        download = estimate_download_size(booted.get("origin", ""))
+    return {"upgrade": upgrade, "rebase": rebase, "changes": changes, "download": download}
+
+def describe_plan(plan):
+    if plan["upgrade"] is False and not plan["rebase"]:
+        return "El sistema está al día; no hay nada que descargar."
+    parts = []
+    if plan["upgrade"]:
+        changes = plan.get("changes") or {}
+        detail = ", ".join(changes[key] for key in ("version", "diff") if key in changes)
+        parts.append(f"actualización a {detail}" if detail else "actualización disponible")
+    elif plan["upgrade"] is None:
+        parts.append("no se pudo comprobar si hay actualización (se intentará igualmente)")
+    if plan["rebase"]:
+        parts.append(f"rebase a {plan['rebase']}")
+    text = f"Pendiente: {'; '.join(parts)}"
+    if plan["download"]:
+        text += f" (descarga estimada: {plan['download']})"
+    return text + "."
+
+def run_update_plan(plan, callback_line, progress=None):
+    """Ejecuta solo las transacciones del plan; devuelve el código de la última."""
+    rcode = RESULT_OK
+    if plan["upgrade"] is not False:  # también si no se pudo comprobar
+        rcode = apply_updates_py(callback_line, progress)
+        if rcode == RESULT_CANCELLED:
+            return rcode
+    if plan["rebase"]:
+        rcode = check_silverblue_version_py(callback_line, progress, refspec=plan["rebase"])
+    return rcode
+
+def check_silverblue_version_py(callback_line, progress=None, refspec=None):
+    latest_release = refspec or plan_rebase(callback_line)
+    if not latest_release:
+        callback_line("No hay nuevas versiones de Silverblue disponibles.")
+        return RESULT_OK
+    callback_line(f"Aplicando rebase a la imagen: {latest_release}")
+    rcode = rebase_py(latest_release, callback_line, progress)
+    if rcode == RESULT_OK:
+        callback_line(f"Rebase completado a la imagen: {latest_release}")
+        if not write_config(stored_version=latest_release):
+            callback_line("No se pudo guardar STORED_VERSION.")
+    else:
+        callback_line(f"Error al aplicar rebase a {latest_release}.")
+    return rcode
+
+# ========================================
+# BLOQUEO COMPARTIDO CON EL PANEL DE CONTROL
+# ========================================
+def acquire_update_lock():
+    """Crea LOCK_FILE de forma exclusiva; devuelve False si ya hay una actualización en curso."""
+    try:
+        fd = os.open(LOCK_FILE, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, "w") as f:
+        f.write(str(os.getpid()))
+    return True
+
+def release_update_lock():
+    try:
+        os.remove(LOCK_FILE)
+    except FileNotFoundError:
+        pass
+
+def run_scheduled_check(callback_line):
+    """Actualización + comprobación de rebase, y registro de LAST_UPDATE_CHECK."""
+    if not acquire_update_lock():
+        callback_line("Ya se está ejecutando una actualización; se omite esta comprobación.")
+        return False
+    run = runlog.start_run("scheduled-update")
+    log = run_logger(run, callback_line)
+    rcode = None
+    try:
+        log("Iniciando comprobación de actualizaciones...")
+        plan = plan_updates(log)
+        log(describe_plan(plan))
+        rcode = run_update_plan(plan, log)
+    finally:
+        run.finish(rcode)
+        if not write_config(last_update_check=int(time.time())):
+            callback_line("No se pudo guardar LAST_UPDATE_CHECK; se volverá a comprobar al reiniciar el planificador.")
+        release_update_lock()
+    return True
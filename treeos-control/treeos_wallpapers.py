@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# Fondos de escritorio preescalados a la resolución de los monitores, sin GTK.
+#
+# Los fondos oficiales son imágenes de varios megapíxeles; si picture-uri apunta
+# al original, gnome-shell lo decodifica y escala en cada inicio de sesión y al
+# conectar un monitor. Al elegir un fondo se recorta y escala una sola vez a la
+# resolución del monitor más grande (modo "cubrir", como picture-options=zoom) y
+# se guarda en $XDG_DATA_HOME/treeos-control/wallpapers, con un nombre derivado
+# de (ruta, mtime, tamaño, resolución) igual que las miniaturas. Después
+# picture-uri y picture-uri-dark se cambian en el propio proceso con
+# Gio.Settings y se borran las versiones que ya no se usan.
+import gi
+gi.require_version("GdkPixbuf", "2.0")
+from gi.repository import GdkPixbuf, Gio, GLib
+import hashlib, math, os, threading
+
+RENDER_DIR = os.path.join(GLib.get_user_data_dir(), "treeos-control", "wallpapers")
+RENDER_FORMAT = ("jpeg", ["quality"], ["92"])  # se decodifica mucho más rápido que webp
+BACKGROUND_SCHEMA = "org.gnome.desktop.background"
+DISPLAY_CONFIG_BUS = "org.gnome.Mutter.DisplayConfig"
+DISPLAY_CONFIG_PATH = "/org/gnome/Mutter/DisplayConfig"
+DBUS_TIMEOUT_MS = 2000
+
+
+def monitor_resolutions():
+    """Resoluciones físicas (ancho, alto) de los monitores conectados; [] si Mutter no responde."""
+    try:
+        bus = Gio.bus_get_sync(Gio.BusType.SESSION, None)
+        reply = bus.call_sync(DISPLAY_CONFIG_BUS, DISPLAY_CONFIG_PATH, DISPLAY_CONFIG_BUS, "GetCurrentState",
+                              None, None, Gio.DBusCallFlags.NONE, DBUS_TIMEOUT_MS, None)
+    except GLib.Error as e:
+        print(f"No se pudo consultar la configuración de monitores: {e.message}")
+        return []
+    _, monitors, _, _ = reply.unpack()
+    resolutions = []
+    for _, modes, _ in monitors:
+        for _, width, height, _, _, _, props in modes:
+            if props.get("is-current") and (width, height) not in resolutions:
+                resolutions.append((width, height))
+    return resolutions
+
+
+def rendered_path(source, width, height, render_dir=RENDER_DIR):
+    try:
+        st = os.stat(source)
+    except OSError:
+        return None
+    key = f"{os.path.abspath(source)}\0{st.st_mtime_ns}\0{st.st_size}\0{width}x{height}"
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+    return os.path.join(render_dir, f"{digest}-{width}x{height}.jpg")
+
+
+def render(source, width, height, render_dir=RENDER_DIR):
+    """Versión de source que cubre exactamente width x height (recorte centrado); devuelve su ruta."""
+    target = rendered_path(source, width, height, render_dir)
+    if target is None:
+        return None
+    if os.path.isfile(target):
+        return target
+    tmp_path = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        file_format, source_width, source_height = GdkPixbuf.Pixbuf.get_file_info(source)
+        if file_format is None:
+            raise OSError("formato de imagen no reconocido")
+        scale = max(width / source_width, height / source_height)
+        scaled_width = max(width, math.ceil(source_width * scale))
+        scaled_height = max(height, math.ceil(source_height * scale))
+        # El cargador escala mientras decodifica: no se llega a tener el original en memoria.
+        pixbuf = GdkPixbuf.Pixbuf.new_from_file_at_scale(source, scaled_width, scaled_height, False)
+        cropped = pixbuf.new_subpixbuf((scaled_width - width) // 2, (scaled_height - height) // 2, width, height)
+        os.makedirs(render_dir, exist_ok=True)
+        file_type, keys, values = RENDER_FORMAT
+        cropped.savev(tmp_path, file_type, keys, values)
+        os.replace(tmp_path, target)
+        return target
+    except (GLib.Error, OSError) as e:
+        print(f"No se pudo preparar el fondo {source} a {width}x{height}: {e}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return None
+
+
+def prepare(source, resolutions=None, render_dir=RENDER_DIR):
+    """
+    Genera (si falta) la versión que se aplicará: la del monitor más grande.
+    Sin monitores conocidos, o si falla, el original.
+    """
+    if resolutions is None:
+        resolutions = monitor_resolutions()
+    if not resolutions:
+        return source
+    width, height = max(resolutions, key=lambda r: r[0] * r[1])
+    return render(source, width, height, render_dir) or source
+
+
+def apply(path, settings=None, render_dir=RENDER_DIR):
+    """Cambia picture-uri y picture-uri-dark en una sola escritura de GSettings."""
+    settings = settings or Gio.Settings.new(BACKGROUND_SCHEMA)
+    uri = Gio.File.new_for_path(path).get_uri()
+    settings.delay()
+    settings.set_string("picture-uri", uri)
+    if settings.get_property("settings-schema").has_key("picture-uri-dark"):
+        settings.set_string("picture-uri-dark", uri)
+    settings.apply()
+    remove_stale(path, render_dir)
+    return uri
+
+
+def remove_stale(current, render_dir=RENDER_DIR):
+    """Borra las versiones preparadas distintas de current (la que está aplicada)."""
+    try:
+        names = os.listdir(render_dir)
+    except OSError:
+        return
+    for name in names:
+        path = os.path.join(render_dir, name)
+        if name.endswith(".jpg") and os.path.abspath(path) != os.path.abspath(current):
+            try:
+                os.remove(path)
+            except OSError as e:
+                print(f"No se pudo borrar el fondo preparado {path}: {e}")
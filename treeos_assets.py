@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+# Almacén de recursos de TreeOS compartido por todo el sistema.
+#
+# En lugar de un clon git completo por usuario, un servicio de root mantiene en
+# /var/lib/treeos/assets una copia direccionada por contenido:
+#
+#   objects/ab/abcdef...      un archivo por hash sha256 (sufijo "-x" si es ejecutable)
+#   trees/<id>/...            árbol de enlaces duros a objects/ para un manifiesto
+#   current -> trees/<id>     enlace simbólico que se cambia de forma atómica
+#   manifest.json             último manifiesto aplicado
+#
+# Solo se descargan los archivos cuyo hash no está ya en objects/. Cada usuario
+# tiene en ~/.local/share/applications enlaces simbólicos a current/.
+#
+#   treeos_assets.py manifest [DIR] [-o assets-manifest.json] [--check]
+#   treeos_assets.py update          (root, desde treeos-assets.service)
+#   treeos_assets.py link            (usuario, desde /etc/profile.d/treeos_init.sh)
+import argparse, fcntl, hashlib, json, os, re, shutil, subprocess, sys, tempfile, urllib.request
+
+STORE_DIR = os.environ.get("TREEOS_ASSET_STORE", "/var/lib/treeos/assets")
+BASE_URL = os.environ.get("TREEOS_ASSET_URL", "https://raw.githubusercontent.com/carlosvalin94/Treeos/main")
+MANIFEST_NAME = "assets-manifest.json"
+USER_APPS_DIR = os.path.join(os.path.expanduser("~"), ".local", "share", "applications")
+
+# Lo que cada usuario necesita del repositorio (antes, el clon completo).
+ENTRY_POINTS = ("treeos-control", "treeos-control.desktop")
+EXCLUDED_DIRS = ("__pycache__",)
+DOWNLOAD_TIMEOUT = 60
+KEEP_TREES = 2  # el árbol actual y el anterior
+SHA256_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+
+def sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# ========================================
+# MANIFIESTO (se genera en el repositorio)
+# ========================================
+def build_manifest(source_dir):
+    files = {}
+    for entry in ENTRY_POINTS:
+        top = os.path.join(source_dir, entry)
+        if os.path.isfile(top):
+            paths = [top]
+        else:
+            paths = []
+            for dirpath, dirnames, filenames in os.walk(top):
+                dirnames[:] = sorted(d for d in dirnames if d not in EXCLUDED_DIRS)
+                paths += [os.path.join(dirpath, name) for name in sorted(filenames)]
+        for path in paths:
+            rel = os.path.relpath(path, source_dir).replace(os.sep, "/")
+            files[rel] = {
+                "sha256": sha256_file(path),
+                "size": os.path.getsize(path),
+                "executable": os.access(path, os.X_OK),
+            }
+    return {"version": 1, "files": files}
+
+
+def serialize_manifest(manifest):
+    return json.dumps(manifest, indent=1, sort_keys=True) + "\n"
+
+
+def validate_manifest(manifest):
+    """
+    El manifiesto llega de la red y lo usa root para crear archivos: solo se
+    aceptan rutas relativas bajo ENTRY_POINTS, sin componentes vacíos, "." ni
+    "..", y hashes sha256 en hexadecimal. Lanza ValueError si algo no cuadra.
+    """
+    if not isinstance(manifest, dict) or not isinstance(manifest.get("files"), dict):
+        raise ValueError("manifiesto sin lista de archivos")
+    for rel_path, info in manifest["files"].items():
+        parts = rel_path.split("/") if isinstance(rel_path, str) else []
+        if (not parts or "\0" in rel_path or "\\" in rel_path
+                or any(part in ("", ".", "..") for part in parts)):
+            raise ValueError(f"ruta no válida en el manifiesto: {rel_path!r}")
+        # Las entradas que son archivos (treeos-control.desktop) no pueden tener hijos.
+        if parts[0] not in ENTRY_POINTS or (len(parts) > 1 and parts[0].endswith(".desktop")):
+            raise ValueError(f"ruta fuera de {', '.join(ENTRY_POINTS)}: {rel_path!r}")
+        if not isinstance(info, dict) or not SHA256_PATTERN.fullmatch(str(info.get("sha256", ""))):
+            raise ValueError(f"hash no válido para {rel_path!r}")
+        if not isinstance(info.get("size"), int) or info["size"] < 0 or not isinstance(info.get("executable"), bool):
+            raise ValueError(f"entrada no válida para {rel_path!r}")
+    return manifest
+
+
+# ========================================
+# ALMACÉN DEL SISTEMA (como root)
+# ========================================
+class AssetStore:
+    def __init__(self, root=STORE_DIR, base_url=BASE_URL):
+        self.root = root
+        self.base_url = base_url.rstrip("/")
+        self.objects_dir = os.path.join(root, "objects")
+        self.trees_dir = os.path.join(root, "trees")
+        self.current = os.path.join(root, "current")
+
+    def object_path(self, info):
+        if not SHA256_PATTERN.fullmatch(info["sha256"]):
+            raise ValueError(f"hash no válido: {info['sha256']!r}")
+        key = info["sha256"] + ("-x" if info["executable"] else "")
+        return os.path.join(self.objects_dir, key[:2], key)
+
+    def fetch_manifest(self):
+        with urllib.request.urlopen(f"{self.base_url}/{MANIFEST_NAME}", timeout=DOWNLOAD_TIMEOUT) as response:
+            data = response.read()
+        return json.loads(data), data
+
+    def download_object(self, rel_path, info):
+        """Descarga un archivo, comprueba su hash y lo guarda en objects/."""
+        target = self.object_path(info)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target), prefix=".download.")
+        try:
+            digest = hashlib.sha256()
+            url = f"{self.base_url}/{urllib.request.quote(rel_path)}"
+            with os.fdopen(fd, "wb") as f, urllib.request.urlopen(url, timeout=DOWNLOAD_TIMEOUT) as response:
+                for chunk in iter(lambda: response.read(1 << 20), b""):
+                    digest.update(chunk)
+                    f.write(chunk)
+            if digest.hexdigest() != info["sha256"]:
+                raise ValueError(f"hash incorrecto para {rel_path}")
+            os.chmod(tmp_path, 0o755 if info["executable"] else 0o644)
+            os.replace(tmp_path, target)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def build_tree(self, manifest, tree_id):
+        """Árbol de enlaces duros a los objetos; el .desktop se reescribe con la ruta del icono."""
+        tree = os.path.join(self.trees_dir, tree_id)
+        if os.path.isdir(tree):
+            return tree
+        staging = tempfile.mkdtemp(dir=self.trees_dir, prefix=".new.")
+        staging_root = os.path.realpath(staging) + os.sep
+        for rel_path, info in manifest["files"].items():
+            target = os.path.join(staging, *rel_path.split("/"))
+            if not os.path.realpath(target).startswith(staging_root):
+                shutil.rmtree(staging, ignore_errors=True)
+                raise ValueError(f"{rel_path!r} sale del árbol de recursos")
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            if rel_path.endswith(".desktop"):
+                with open(self.object_path(info)) as f:
+                    content = f.read()
+                icon = os.path.join(self.current, "treeos-control", "logo.gif")
+                content = "\n".join(f"Icon={icon}" if line.startswith("Icon=TEMPATH") else line
+                                    for line in content.split("\n"))
+                with open(target, "w") as f:
+                    f.write(content)
+                os.chmod(target, 0o644)
+            else:
+                os.link(self.object_path(info), target)
+        os.chmod(staging, 0o755)
+        os.rename(staging, tree)
+        return tree
+
+    def switch_current(self, tree):
+        tmp_link = f"{self.current}.new"
+        if os.path.lexists(tmp_link):
+            os.remove(tmp_link)
+        os.symlink(os.path.relpath(tree, self.root), tmp_link)
+        os.replace(tmp_link, self.current)
+
+    def collect_garbage(self, manifest):
+        """Conserva los últimos árboles y borra objetos que ya no usa ninguno."""
+        current = os.path.realpath(self.current)
+        previous = sorted((os.path.join(self.trees_dir, name) for name in os.listdir(self.trees_dir)
+                           if os.path.join(os.path.realpath(self.trees_dir), name) != current),
+                          key=os.path.getmtime, reverse=True)
+        for tree in previous:
+            if os.path.basename(tree).startswith(".new.") or previous.index(tree) >= KEEP_TREES - 1:
+                shutil.rmtree(tree, ignore_errors=True)
+
+        referenced = {self.object_path(info) for info in manifest["files"].values()}
+        removed = 0
+        for dirpath, _, filenames in os.walk(self.objects_dir):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                # Un solo enlace: ningún árbol lo usa (los .desktop se reescriben, por eso
+                # también se conservan los objetos del manifiesto actual).
+                if name.startswith(".download.") or (os.stat(path).st_nlink == 1 and path not in referenced):
+                    os.remove(path)
+                    removed += 1
+        return removed
+
+    def update(self):
+        for directory in (self.root, self.objects_dir, self.trees_dir):
+            os.makedirs(directory, mode=0o755, exist_ok=True)
+        with open(os.path.join(self.root, ".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            manifest, raw = self.fetch_manifest()
+            validate_manifest(manifest)
+            tree_id = hashlib.sha256(raw).hexdigest()[:16]
+            if os.path.realpath(self.current) == os.path.join(os.path.realpath(self.trees_dir), tree_id):
+                print("Los recursos ya están al día.")
+                return 0
+
+            missing = [(path, info) for path, info in manifest["files"].items()
+                       if not os.path.exists(self.object_path(info))]
+            missing_bytes = sum(info["size"] for _, info in missing)
+            print(f"{len(manifest['files'])} archivos en el manifiesto; "
+                  f"{len(missing)} por descargar ({missing_bytes} bytes).")
+            for rel_path, info in missing:
+                self.download_object(rel_path, info)
+
+            self.switch_current(self.build_tree(manifest, tree_id))
+            with open(os.path.join(self.root, "manifest.json"), "wb") as f:
+                f.write(raw)
+            print(f"Recursos actualizados ({tree_id}); {self.collect_garbage(manifest)} objetos sin uso eliminados.")
+        return 0
+
+
+# ========================================
+# ENLACES POR USUARIO
+# ========================================
+def link_user(store_root=STORE_DIR, apps_dir=USER_APPS_DIR):
+    """Sustituye el contenido del antiguo clon por enlaces simbólicos al almacén."""
+    current = os.path.join(store_root, "current")
+    if not os.path.isdir(current):
+        print(f"El almacén {store_root} todavía no está disponible.")
+        return 1
+    os.makedirs(apps_dir, exist_ok=True)
+
+    if os.path.isdir(os.path.join(apps_dir, ".git")):
+        # Migración: se borran solo los archivos del repositorio, no otros .desktop del usuario.
+        tracked = subprocess.run(["git", "-C", apps_dir, "ls-files", "-z"],
+                                 capture_output=True, text=True).stdout.split("\0")
+        for rel_path in filter(None, tracked):
+            path = os.path.join(apps_dir, rel_path)
+            if os.path.lexists(path) and not os.path.isdir(path):
+                os.remove(path)
+        for entry in ENTRY_POINTS:
+            path = os.path.join(apps_dir, entry)
+            if os.path.isdir(path) and not os.path.islink(path):
+                shutil.rmtree(path)
+        shutil.rmtree(os.path.join(apps_dir, ".git"))
+        print(f"Clon de {apps_dir} sustituido por el almacén compartido.")
+
+    for entry in ENTRY_POINTS:
+        path = os.path.join(apps_dir, entry)
+        target = os.path.join(current, entry)
+        if os.path.islink(path) and os.readlink(path) == target:
+            continue
+        if os.path.isdir(path) and not os.path.islink(path):
+            print(f"Se conserva {path}: no es un enlace y no pertenece a un clon de TreeOS.")
+            continue
+        tmp_link = f"{path}.treeos-new"
+        if os.path.lexists(tmp_link):
+            os.remove(tmp_link)
+        os.symlink(target, tmp_link)
+        os.replace(tmp_link, path)
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Almacén compartido de recursos de TreeOS")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    manifest_parser = subparsers.add_parser("manifest", help="generar el manifiesto de hashes")
+    manifest_parser.add_argument("source", nargs="?", default=os.path.dirname(os.path.abspath(__file__)))
+    manifest_parser.add_argument("-o", "--output", help=f"archivo de salida (por defecto SOURCE/{MANIFEST_NAME})")
+    manifest_parser.add_argument("--check", action="store_true", help="fallar si el manifiesto no está al día")
+    subparsers.add_parser("update", help="descargar los archivos cambiados al almacén (root)")
+    subparsers.add_parser("link", help="enlazar los recursos en ~/.local/share/applications")
+    args = parser.parse_args()
+
+    if args.command == "manifest":
+        output = args.output or os.path.join(args.source, MANIFEST_NAME)
+        content = serialize_manifest(build_manifest(args.source))
+        if args.check:
+            try:
+                with open(output) as f:
+                    up_to_date = f.read() == content
+            except FileNotFoundError:
+                up_to_date = False
+            if not up_to_date:
+                print(f"{output} no está al día; regenérelo con: treeos_assets.py manifest")
+                return 1
+            return 0
+        with open(output, "w") as f:
+            f.write(content)
+        return 0
+    if args.command == "update":
+        try:
+            return AssetStore().update()
+        except (OSError, ValueError) as e:
+            print(f"Error al actualizar los recursos: {e}")
+            return 1
+    return link_user()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# Actualización de un aula (o cualquier grupo) de equipos TreeOS por SSH.
+#
+# En cada equipo se ejecuta "treeos-control.py --cli update", es decir, el mismo
+# plan_updates/apply_updates_py/check_silverblue_version_py que usan el panel y el
+# planificador, y se recoge el JSON que imprime. Los equipos se actualizan por
+# oleadas: primero CANARY equipos y después grupos de WAVE_SIZE, con como mucho
+# PARALLEL conexiones a la vez. Si en una oleada falla más de MAX_FAILURE_RATE de
+# los equipos, el despliegue se detiene y el resto queda sin tocar.
+#
+#   treeos_fleet.py inventario.txt [--parallel 8] [--canary 1] [--wave-size 10]
+#                   [--max-failure-rate 0.2] [--report informe.json]
+#
+# El inventario tiene un equipo por línea ("[usuario@]equipo[:puerto]"); se
+# ignoran las líneas vacías y lo que va tras "#". Para probar sin equipos reales:
+#
+#   --ssh-command "python3 tools/fake_ssh.py"            (equipos simulados)
+#   --ssh-command "podman exec {host} sh -c"              (contenedores locales)
+import argparse, concurrent.futures, json, shlex, statistics, subprocess, sys, time
+
+SSH_COMMAND = "ssh -o BatchMode=yes -o ConnectTimeout=10"
+REMOTE_COMMAND = "python3 ~/.local/share/applications/treeos-control/treeos-control.py --cli -q update"
+PARALLEL = 8
+CANARY = 1
+WAVE_SIZE = 10
+MAX_FAILURE_RATE = 0.2
+HOST_TIMEOUT = 2 * 60 * 60  # un rebase completo puede tardar
+
+SSH_UNREACHABLE = 255  # código de ssh cuando falla la conexión
+EXIT_LOCKED = 75  # ver treeos_cli.EXIT_LOCKED
+
+# Estados por equipo; solo FAILED, UNREACHABLE y TIMEOUT cuentan como fallo.
+OK, FAILED, UNREACHABLE, TIMEOUT, LOCKED, SKIPPED = "ok", "failed", "unreachable", "timeout", "locked", "skipped"
+FAILURES = (FAILED, UNREACHABLE, TIMEOUT)
+
+
+def read_inventory(path):
+    hosts = []
+    with open(path) as f:
+        for line in f:
+            host = line.split("#", 1)[0].strip()
+            if host and host not in hosts:
+                hosts.append(host)
+    return hosts
+
+
+def plan_waves(hosts, canary=CANARY, wave_size=WAVE_SIZE):
+    waves = [hosts[:canary]] if canary > 0 else []
+    rest = hosts[canary:] if canary > 0 else hosts
+    waves += [rest[i:i + wave_size] for i in range(0, len(rest), wave_size)]
+    return [wave for wave in waves if wave]
+
+
+def ssh_argv(ssh_command, host, remote_command):
+    """ssh_command + equipo + orden remota; {host} en ssh_command indica dónde va el equipo."""
+    argv = shlex.split(ssh_command)
+    if any("{host}" in arg for arg in argv):
+        return [arg.replace("{host}", host) for arg in argv] + [remote_command]
+    target, port = host, None
+    if ":" in host:
+        target, port = host.rsplit(":", 1)
+    return argv + (["-p", port] if port else []) + [target, remote_command]
+
+
+def parse_report(stdout):
+    """Último objeto JSON de la salida (el de treeos_cli); None si no hay ninguno."""
+    for line in reversed(stdout.splitlines()):
+        line = line.strip()
+        if line.startswith("{"):
+            try:
+                return json.loads(line)
+            except ValueError:
+                continue
+    return None
+
+
+def update_host(host, ssh_command=SSH_COMMAND, remote_command=REMOTE_COMMAND, timeout=HOST_TIMEOUT):
+    start = time.monotonic()
+    result = {"host": host}
+    try:
+        process = subprocess.run(ssh_argv(ssh_command, host, remote_command),
+                                 stdin=subprocess.DEVNULL, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        result.update(status=TIMEOUT, exit_code=None, error=f"sin respuesta tras {timeout} s")
+    except OSError as e:
+        result.update(status=UNREACHABLE, exit_code=None, error=str(e))
+    else:
+        report = parse_report(process.stdout)
+        result["exit_code"] = process.returncode
+        if report is not None:
+            result["report"] = report
+        if process.returncode == 0:
+            result["status"] = OK
+        elif process.returncode == EXIT_LOCKED:
+            result["status"] = LOCKED
+        elif process.returncode == SSH_UNREACHABLE and report is None:
+            result["status"] = UNREACHABLE
+        else:
+            result["status"] = FAILED
+        if process.returncode != 0:
+            result["error"] = (process.stderr.strip().splitlines() or [""])[-1]
+    result["duration"] = round(time.monotonic() - start, 3)
+    return result
+
+
+# ========================================
+# DESPLIEGUE POR OLEADAS
+# ========================================
+def run_rollout(hosts, parallel=PARALLEL, canary=CANARY, wave_size=WAVE_SIZE,
+                max_failure_rate=MAX_FAILURE_RATE, on_result=None, **host_options):
+    waves = plan_waves(hosts, canary, wave_size)
+    results, wave_summaries, halted = [], [], None
+    with concurrent.futures.ThreadPoolExecutor(max_workers=parallel) as pool:
+        for number, wave in enumerate(waves, 1):
+            if halted:
+                results += [{"host": host, "status": SKIPPED, "wave": number} for host in wave]
+                continue
+            futures = [pool.submit(update_host, host, **host_options) for host in wave]
+            wave_results = []
+            for future in concurrent.futures.as_completed(futures):
+                result = future.result()
+                result["wave"] = number
+                wave_results.append(result)
+                if on_result:
+                    on_result(result)
+            failed = sum(1 for r in wave_results if r["status"] in FAILURES)
+            rate = failed / len(wave)
+            wave_summaries.append({"wave": number, "hosts": len(wave), "failed": failed,
+                                   "failure_rate": round(rate, 3)})
+            results += sorted(wave_results, key=lambda r: wave.index(r["host"]))
+            if rate > max_failure_rate:
+                halted = {"wave": number, "failure_rate": round(rate, 3)}
+    return build_report(results, wave_summaries, halted, max_failure_rate)
+
+
+def build_report(results, waves, halted, max_failure_rate):
+    counts = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    durations = [r["duration"] for r in results if "duration" in r]
+    plans = [r["report"].get("plan") or {} for r in results if r["status"] == OK and "report" in r]
+    return {
+        "hosts": len(results),
+        "counts": counts,
+        "halted": halted,
+        "max_failure_rate": max_failure_rate,
+        "waves": waves,
+        "upgraded": sum(1 for plan in plans if plan.get("upgrade") is True),
+        # Sin comprobación previa el equipo actualiza igualmente, pero no se sabe si había algo
+        "upgrade_unknown": sum(1 for plan in plans if "upgrade" in plan and plan["upgrade"] is None),
+        "rebased": sum(1 for plan in plans if plan.get("rebase")),
+        "up_to_date": sum(1 for plan in plans if plan.get("upgrade") is False and not plan.get("rebase")),
+        "duration_median": round(statistics.median(durations), 3) if durations else None,
+        "duration_max": max(durations) if durations else None,
+        "results": results,
+    }
+
+
+def print_result(result):
+    detail = result.get("error") or ""
+    print(f"[oleada {result['wave']}] {result['host']:30} {result['status']:12} "
+          f"{result['duration']:7.1f} s  {detail}", file=sys.stderr, flush=True)
+
+
+def print_summary(report):
+    counts = ", ".join(f"{status}: {count}" for status, count in sorted(report["counts"].items()))
+    print(f"\n{report['hosts']} equipos ({counts}); actualizados {report['upgraded']}, "
+          f"rebase {report['rebased']}, ya al día {report['up_to_date']}, "
+          f"sin comprobar {report['upgrade_unknown']}.", file=sys.stderr)
+    if report["halted"]:
+        print(f"Despliegue detenido en la oleada {report['halted']['wave']}: "
+              f"{report['halted']['failure_rate']:.0%} de fallos "
+              f"(máximo {report['max_failure_rate']:.0%}).", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Actualización por oleadas de equipos TreeOS por SSH")
+    parser.add_argument("inventory", help="archivo con un equipo por línea")
+    parser.add_argument("--parallel", type=int, default=PARALLEL, help="conexiones simultáneas")
+    parser.add_argument("--canary", type=int, default=CANARY, help="equipos de la primera oleada")
+    parser.add_argument("--wave-size", type=int, default=WAVE_SIZE, help="equipos por oleada tras la canaria")
+    parser.add_argument("--max-failure-rate", type=float, default=MAX_FAILURE_RATE,
+                        help="fracción de fallos por oleada a partir de la cual se detiene")
+    parser.add_argument("--timeout", type=int, default=HOST_TIMEOUT, help="segundos máximos por equipo")
+    parser.add_argument("--ssh-command", default=SSH_COMMAND,
+                        help="orden de conexión; {host} indica dónde va el equipo (por defecto se añade al final)")
+    parser.add_argument("--remote-command", default=REMOTE_COMMAND, help="orden que se ejecuta en cada equipo")
+    parser.add_argument("--report", help="guardar el informe JSON en este archivo (por defecto, stdout)")
+    args = parser.parse_args(argv)
+    if args.parallel < 1 or args.wave_size < 1 or args.canary < 0:
+        parser.error("--parallel y --wave-size deben ser positivos y --canary no negativo")
+
+    hosts = read_inventory(args.inventory)
+    if not hosts:
+        print(f"El inventario {args.inventory} está vacío.", file=sys.stderr)
+        return 1
+    report = run_rollout(hosts, parallel=args.parallel, canary=args.canary, wave_size=args.wave_size,
+                         max_failure_rate=args.max_failure_rate, on_result=print_result,
+                         ssh_command=args.ssh_command, remote_command=args.remote_command,
+                         timeout=args.timeout)
+    print_summary(report)
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    else:
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write("\n")
+    if report["halted"]:
+        return 2
+    return 1 if any(r["status"] in FAILURES for r in report["results"]) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+# Ayudante privilegiado de aprovisionamiento del primer arranque de TreeOS.
+#
+# SystemConfigurator (usado por treeosinstall.py) construye un plan declarativo y lo envía en
+# JSON por stdin a este script, ejecutado UNA sola vez con sudo. Cada paso se
+# aplica directamente (sin heredocs ni un sudo por comando), el progreso se
+# informa como líneas JSON por stdout y, si un paso falla, se deshacen en orden
+# inverso los pasos ya completados.
+#
+#   echo '{"steps": [...]}' | sudo python3 treeos_provision.py
+#
+# Cada paso se cronometra y al terminar se escribe un informe JSON (por defecto
+# /var/log/treeos-provision.json). El plan puede indicar una raíz alternativa
+# ("root") para los archivos, lo que permite ejecutarlo sin privilegios contra
+# un árbol temporal (ver tools/bench_provision.py).
+import json, os, subprocess, sys, tempfile, time
+
+# El asistente se ejecuta como root: sudo descarta el entorno del usuario, así
+# que estas variables se leen en el lado sin privilegios y viajan en el plan.
+REPORT_FILE = os.environ.get("TREEOS_PROVISION_REPORT", "/var/log/treeos-provision.json")
+PROVISION_ROOT = os.environ.get("TREEOS_PROVISION_ROOT", "/")
+PROVISION_HELPER = os.path.abspath(__file__)
+LOG_TIMINGS = os.environ.get("TREEOS_PROVISION_TIMINGS") == "1"
+
+PROFILE_SCRIPT_PATH = "/etc/profile.d/treeos_init.sh"
+CLEANUP_UNIT = "remove-treeostempus3rx01.service"
+CLEANUP_UNIT_PATH = f"/etc/systemd/system/{CLEANUP_UNIT}"
+ASSETS_HELPER_PATH = "/usr/local/libexec/treeos-assets"
+ASSETS_SERVICE_PATH = "/etc/systemd/system/treeos-assets.service"
+ASSETS_TIMER = "treeos-assets.timer"
+ASSETS_TIMER_PATH = f"/etc/systemd/system/{ASSETS_TIMER}"
+SYSTEMD_UNIT_DIR = "/etc/systemd/system/"
+ASSETS_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "treeos_assets.py")
+
+# Hook de inicio de sesión. Solo usa órdenes internas de bash en el camino de
+# login: la sincronización (clonado/fetch superficial de una rama, con intervalo
+# mínimo entre comprobaciones) y el arranque de update_checker.sh se hacen en un
+# subproceso desacoplado. TREEOS_INIT_TRACE=1 (o una ruta) mide su coste.
+PROFILE_SCRIPT = r"""#!/bin/bash
+
+# Solo bash (usa [[ ]] y $EPOCHREALTIME) y una vez por sesión
+[ -n "$BASH_VERSION" ] || return 0
+if [[ -n "$TREEOS_UPDATE_DONE" ]]; then
+  return 0
+fi
+export TREEOS_UPDATE_DONE=1
+
+[[ -n "$TREEOS_INIT_TRACE" ]] && __treeos_t0=${EPOCHREALTIME//[.,]/}
+
+__treeos_sync() {
+  local repo_url="${TREEOS_REPO_URL:-https://github.com/carlosvalin94/Treeos.git}"
+  local branch="main"
+  local apps_dir="$HOME/.local/share/applications"
+  local state_dir="${XDG_STATE_HOME:-$HOME/.local/state}/treeos"
+  local interval="${TREEOS_SYNC_INTERVAL:-}"
+  local key value now last remote_head local_head
+
+  # Con el almacén compartido del sistema (treeos-assets.timer) no hay clon por
+  # usuario: solo enlaces simbólicos a /var/lib/treeos/assets/current.
+  if [[ -d /var/lib/treeos/assets/current && -x /usr/local/libexec/treeos-assets ]]; then
+    /usr/local/libexec/treeos-assets link
+    return
+  fi
+
+  # Intervalo mínimo entre comprobaciones (segundos): entorno, configuración o 6 h
+  if [[ -z "$interval" && -r /etc/treeos-control/update_config.conf ]]; then
+    while IFS='=' read -r key value; do
+      [[ "$key" == "SYNC_INTERVAL" ]] && interval="$value"
+    done < /etc/treeos-control/update_config.conf
+  fi
+  [[ "$interval" =~ ^[0-9]+$ ]] || interval=21600
+
+  mkdir -p "$state_dir" || return 1
+  # Una sola sincronización a la vez aunque se abran varias sesiones
+  exec 9>"$state_dir/sync.lock"
+  flock -n 9 || return 0
+
+  printf -v now '%(%s)T' -1
+  last=0
+  [[ -r "$state_dir/last-sync-check" ]] && read -r last < "$state_dir/last-sync-check"
+  if [[ -d "$apps_dir/.git" && "$last" =~ ^[0-9]+$ ]] && (( now - last < interval )); then
+    echo "Comprobación reciente ($(( now - last )) s < $interval s); se omite."
+    return 0
+  fi
+
+  remote_head=$(git ls-remote "$repo_url" "refs/heads/$branch" | cut -f1)
+  if [[ -z "$remote_head" ]]; then
+    echo "No se pudo consultar $repo_url."
+    return 1
+  fi
+  echo "$now" > "$state_dir/last-sync-check"
+
+  if [[ ! -d "$apps_dir/.git" ]]; then
+    git clone --depth 1 --single-branch --branch "$branch" "$repo_url" "$apps_dir/" || return 1
+  else
+    local_head=$(git -C "$apps_dir" rev-parse HEAD 2>/dev/null)
+    if [[ "$remote_head" == "$local_head" ]]; then
+      echo "Sin cambios en $branch ($remote_head)."
+      return 0
+    fi
+    git -C "$apps_dir" fetch --depth 1 origin "$branch" || return 1
+    git -C "$apps_dir" reset --hard FETCH_HEAD || return 1
+  fi
+
+  # Ajustar la ruta del icono en el archivo .desktop
+  sed -i "s|Icon=TEMPATH.*|Icon=$apps_dir/treeos-control/logo.gif|" \
+    "$apps_dir/treeos-control.desktop"
+}
+
+__treeos_background() {
+  local state_dir="${XDG_STATE_HOME:-$HOME/.local/state}/treeos"
+  trap '' HUP
+  mkdir -p "$state_dir" && exec >"$state_dir/last-sync.log" 2>&1
+  __treeos_sync
+
+  # Lanzar update_checker.sh si no está ya corriendo para este usuario
+  if ! pgrep -u "$USER" -f "update_checker.sh" >/dev/null 2>&1; then
+    bash "$HOME/.local/share/applications/treeos-control/update_checker.sh" </dev/null >/dev/null 2>&1 9>&- &
+  fi
+}
+
+# Doble fork: el trabajo queda fuera del control de trabajos del shell y no
+# retrasa el prompt. La salida de la última ejecución queda en last-sync.log.
+( __treeos_background </dev/null >/dev/null 2>&1 & )
+unset -f __treeos_sync __treeos_background
+
+if [[ -n "$TREEOS_INIT_TRACE" ]]; then
+  __treeos_elapsed=$(( ${EPOCHREALTIME//[.,]/} - __treeos_t0 ))
+  if [[ "$TREEOS_INIT_TRACE" == "1" ]]; then
+    printf 'treeos_init.sh: %d.%03d ms\n' $(( __treeos_elapsed / 1000 )) $(( __treeos_elapsed % 1000 )) >&2
+  else
+    printf '%(%s)T treeos_init.sh %d us\n' -1 "$__treeos_elapsed" >> "$TREEOS_INIT_TRACE"
+  fi
+  unset __treeos_t0 __treeos_elapsed
+fi
+"""
+
+# Servicio que elimina al usuario temporal en el próximo arranque y se autodestruye.
+# Al estar fuera de la sesión del usuario, evita problemas de "User is currently logged in".
+CLEANUP_UNIT_CONTENT = r"""[Unit]
+Description=Remove user treeostempus3rx01 on next boot
+
+[Service]
+Type=oneshot
+ExecStart=/usr/sbin/userdel -r treeostempus3rx01
+ExecStartPost=/usr/bin/rm -f /etc/systemd/system/remove-treeostempus3rx01.service
+
+[Install]
+WantedBy=multi-user.target
+"""
+
+# Almacén de recursos compartido (ver treeos_assets.py): un único servicio de root
+# descarga los archivos cambiados en lugar de un clon git por usuario.
+ASSETS_SERVICE_CONTENT = f"""[Unit]
+Description=Update the shared TreeOS asset store
+Wants=network-online.target
+After=network-online.target
+
+[Service]
+Type=oneshot
+ExecStart={ASSETS_HELPER_PATH} update
+Nice=10
+IOSchedulingClass=idle
+"""
+
+ASSETS_TIMER_CONTENT = """[Unit]
+Description=Periodically update the shared TreeOS asset store
+
+[Timer]
+OnBootSec=30s
+OnUnitActiveSec=6h
+RandomizedDelaySec=10min
+Persistent=true
+
+[Install]
+WantedBy=timers.target
+"""
+
+
+def read_assets_helper():
+    with open(ASSETS_SOURCE) as f:
+        return f.read()
+
+
+def build_plan(username, locale, keyboard_layout):
+    """Plan completo de la configuración inicial."""
+    return [
+        {"action": "create_user", "username": username},
+        {"action": "set_locale", "locale": locale},
+        {"action": "set_keymap", "keymap": keyboard_layout},
+        {"action": "set_x11_keymap", "keymap": keyboard_layout},
+        {"action": "write_file", "path": PROFILE_SCRIPT_PATH, "content": PROFILE_SCRIPT, "mode": 0o755},
+        {"action": "write_file", "path": CLEANUP_UNIT_PATH, "content": CLEANUP_UNIT_CONTENT, "mode": 0o644},
+        {"action": "write_file", "path": ASSETS_HELPER_PATH, "content": read_assets_helper(), "mode": 0o755},
+        {"action": "write_file", "path": ASSETS_SERVICE_PATH, "content": ASSETS_SERVICE_CONTENT, "mode": 0o644},
+        {"action": "write_file", "path": ASSETS_TIMER_PATH, "content": ASSETS_TIMER_CONTENT, "mode": 0o644},
+        {"action": "daemon_reload"},
+        {"action": "enable_unit", "unit": CLEANUP_UNIT},
+        {"action": "enable_unit", "unit": ASSETS_TIMER},
+    ]
+
+
+def describe_step(step):
+    descriptions = {
+        "create_user": "Creando el usuario {username}",
+        "set_locale": "Configurando el idioma {locale}",
+        "set_keymap": "Configurando el teclado de consola {keymap}",
+        "set_x11_keymap": "Configurando el teclado gráfico {keymap}",
+        "write_file": "Escribiendo {path}",
+        "daemon_reload": "Recargando systemd",
+        "enable_unit": "Habilitando {unit}",
+    }
+    return descriptions.get(step["action"], step["action"]).format(**step)
+
+
+# ========================================
+# INVOCACIÓN DESDE EL INSTALADOR (sin privilegios)
+# ========================================
+class SystemConfigurator:
+    @staticmethod
+    def build_plan(username, locale, keyboard_layout):
+        """
+        Plan declarativo de la configuración inicial:
+          1) Crear el usuario (grupo wheel en Fedora Silverblue)
+          2) Configurar idioma/teclado
+          3) Crear /etc/profile.d/treeos_init.sh
+          4) Crear y habilitar un servicio systemd que elimina 'treeostempus3rx01' en el próximo arranque
+        """
+        return build_plan(username, locale, keyboard_layout)
+
+    @staticmethod
+    def apply_plan(steps, on_event):
+        """
+        Aplica el plan con UNA sola invocación de sudo. on_event(evento) recibe
+        cada evento JSON de progreso (desde el hilo que llama a esta función).
+        Devuelve (éxito, mensaje de error).
+        """
+        start = time.monotonic()
+        process = subprocess.Popen(
+            ["sudo", sys.executable, PROVISION_HELPER],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        plan = {"steps": steps, "root": PROVISION_ROOT, "report": REPORT_FILE}
+        process.stdin.write(json.dumps(plan))
+        process.stdin.close()
+
+        finished, other_output = None, []
+        for line in process.stdout:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                other_output.append(line.strip())
+                continue
+            if event.get("event") == "finished":
+                finished = event
+            on_event(event)
+        process.stdout.close()
+        process.wait()
+
+        if LOG_TIMINGS:
+            print(f"Aprovisionamiento completo (incluido sudo): {time.monotonic() - start:.3f} s")
+        if finished is None:
+            detail = "\n".join(l for l in other_output if l) or f"código {process.returncode}"
+            return False, f"El asistente de configuración terminó sin resultado: {detail}"
+        return finished["success"], finished.get("error", "")
+
+
+# ========================================
+# EJECUCIÓN DE LOS PASOS (como root)
+# ========================================
+def run(*command):
+    subprocess.run(command, check=True, capture_output=True, text=True)
+
+
+def localectl_status():
+    """Valores actuales de localectl, para poder restaurarlos al deshacer."""
+    result = subprocess.run(["localectl", "status"], capture_output=True, text=True)
+    status = {}
+    for line in result.stdout.splitlines():
+        key, _, value = line.strip().partition(":")
+        status[key.strip()] = value.strip()
+    return status
+
+
+class Provisioner:
+    def __init__(self, emit, root="/"):
+        self.emit = emit
+        self.root = root
+        self.undo_stack = []
+        self.after_rollback = []  # se ejecuta tras vaciar undo_stack (p. ej. daemon-reload)
+        self.timings = []
+        self.rollback_seconds = 0.0
+
+    def root_path(self, path):
+        return os.path.join(self.root, path.lstrip("/"))
+
+    def step_create_user(self, step):
+        username = step["username"]
+        run("useradd", "-m", username)
+        self.undo_stack.append(lambda: run("userdel", "-r", username))
+        # Sin contraseña: se pide en el primer inicio de sesión
+        run("passwd", "-d", username)
+        run("chage", "-d", "0", username)
+        # Para Fedora Silverblue, se usa el grupo wheel en lugar de sudo
+        run("usermod", "-aG", "wheel", username)
+
+    def step_set_locale(self, step):
+        previous = localectl_status().get("System Locale", "")
+        run("localectl", "set-locale", f"LANG={step['locale']}")
+        if previous.startswith("LANG="):
+            self.undo_stack.append(lambda: run("localectl", "set-locale", previous))
+
+    def step_set_keymap(self, step):
+        previous = localectl_status().get("VC Keymap", "")
+        run("localectl", "set-keymap", step["keymap"])
+        if previous and previous != "(unset)" and previous != "n/a":
+            self.undo_stack.append(lambda: run("localectl", "set-keymap", previous))
+
+    def step_set_x11_keymap(self, step):
+        previous = localectl_status().get("X11 Layout", "")
+        run("localectl", "set-x11-keymap", step["keymap"])
+        if previous and previous != "(unset)" and previous != "n/a":
+            self.undo_stack.append(lambda: run("localectl", "set-x11-keymap", previous))
+
+    def step_write_file(self, step):
+        path = self.root_path(step["path"])
+        try:
+            with open(path, "rb") as f:
+                previous = f.read()
+                previous_mode = os.fstat(f.fileno()).st_mode & 0o7777
+        except FileNotFoundError:
+            previous = None
+            # /usr/local/libexec puede no existir todavía (se conserva al deshacer).
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_file_atomic(path, step["content"].encode("utf-8"), step.get("mode", 0o644))
+        if previous is None:
+            self.undo_stack.append(lambda: os.remove(path))
+        else:
+            self.undo_stack.append(lambda: write_file_atomic(path, previous, previous_mode))
+        if step["path"].startswith(SYSTEMD_UNIT_DIR) and not self.after_rollback:
+            # Tras borrar o restaurar las unidades, systemd tiene que volver a leerlas.
+            self.after_rollback.append(lambda: run("systemctl", "daemon-reload"))
+
+    def step_daemon_reload(self, step):
+        run("systemctl", "daemon-reload")
+
+    def step_enable_unit(self, step):
+        run("systemctl", "enable", step["unit"])
+        self.undo_stack.append(lambda: run("systemctl", "disable", step["unit"]))
+
+    def apply(self, steps):
+        total = len(steps)
+        for index, step in enumerate(steps):
+            self.emit({"event": "step", "index": index, "total": total,
+                       "action": step["action"], "description": describe_step(step), "status": "start"})
+            start = time.monotonic()
+            try:
+                getattr(self, f"step_{step['action']}")(step)
+            except (subprocess.CalledProcessError, OSError, KeyError, AttributeError) as e:
+                seconds = time.monotonic() - start
+                self.record(step, "failed", seconds)
+                error = e.stderr.strip() if isinstance(e, subprocess.CalledProcessError) and e.stderr else str(e)
+                self.emit({"event": "step", "index": index, "total": total, "action": step["action"],
+                           "status": "failed", "seconds": seconds, "error": error})
+                self.rollback()
+                self.emit({"event": "finished", "success": False, "error": error})
+                return False
+            seconds = time.monotonic() - start
+            self.record(step, "done", seconds)
+            self.emit({"event": "step", "index": index, "total": total,
+                       "action": step["action"], "status": "done", "seconds": seconds})
+        self.emit({"event": "finished", "success": True})
+        return True
+
+    def record(self, step, status, seconds):
+        self.timings.append({"action": step["action"], "description": describe_step(step),
+                             "status": status, "seconds": round(seconds, 6)})
+
+    def rollback(self):
+        start = time.monotonic()
+        while self.undo_stack:
+            undo = self.undo_stack.pop()
+            try:
+                undo()
+            except (subprocess.CalledProcessError, OSError) as e:
+                self.emit({"event": "rollback", "status": "failed", "error": str(e)})
+            else:
+                self.emit({"event": "rollback", "status": "done"})
+        for finish in self.after_rollback:
+            try:
+                finish()
+            except (subprocess.CalledProcessError, OSError) as e:
+                self.emit({"event": "rollback", "status": "failed", "error": str(e)})
+        self.after_rollback = []
+        self.rollback_seconds = time.monotonic() - start
+
+    def write_report(self, path, success, total_seconds):
+        report = {
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(time.time() - total_seconds)),
+            "success": success,
+            "total_seconds": round(total_seconds, 6),
+            "steps": self.timings,
+            "rollback_seconds": round(self.rollback_seconds, 6),
+        }
+        path = self.root_path(path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_file_atomic(path, json.dumps(report, indent=2).encode("utf-8"), 0o644)
+        return path
+
+
+def write_file_atomic(path, data, mode):
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".treeos.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def emit_json(event):
+    sys.stdout.write(json.dumps(event) + "\n")
+    sys.stdout.flush()
+
+
+def main():
+    start = time.monotonic()
+    plan = json.load(sys.stdin)
+    provisioner = Provisioner(emit_json, plan.get("root", "/"))
+    ok = provisioner.apply(plan["steps"])
+    try:
+        path = provisioner.write_report(plan.get("report", REPORT_FILE), ok, time.monotonic() - start)
+        emit_json({"event": "report", "path": path})
+    except OSError as e:
+        emit_json({"event": "report", "error": str(e)})
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,124 +3,8 @@ import gi
 gi.require_version("Gtk", "4.0")
 from gi.repository import Gtk, Gdk, GLib, Pango
 import subprocess
-import time
-
-class SystemConfigurator:
-    @staticmethod
-    def create_user(username):
-        # Crea el usuario con directorio home
-        subprocess.run(["sudo", "useradd", "-m", username], check=True)
-        # Elimina la contraseña para que se pida en el primer inicio de sesión
-        subprocess.run(["sudo", "passwd", "-d", username], check=True)
-        subprocess.run(["sudo", "chage", "-d", "0", username], check=True)
-        # Para Fedora Silverblue, se usa el grupo wheel en lugar de sudo
-        subprocess.run(["sudo", "usermod", "-aG", "wheel", username], check=True)
-
-    @staticmethod
-    def configure_localization(locale, keyboard_layout):
-        try:
-            # 1. Ajustar el locale del sistema
-            subprocess.run([
-                "sudo", "localectl", "set-locale", f"LANG={locale}"
-            ], check=True)
-
-            # 2. Ajustar el layout del teclado
-            subprocess.run([
-                "sudo", "localectl", "set-keymap", keyboard_layout
-            ], check=True)
-
-            # 3. Actualizar la configuración de X11
-            subprocess.run([
-                "sudo", "localectl", "set-x11-keymap", keyboard_layout
-            ], check=True)
-
-        except subprocess.CalledProcessError as e:
-            raise RuntimeError(f"Error configurando localización: {e.stderr}")
-
-    @staticmethod
-    def create_profile_d_script():
-        """
-        Crea el archivo /etc/profile.d/treeos_init.sh con permisos de ejecución.
-        Este script clona/actualiza el repositorio Treeos y lanza el update_checker.sh en segundo plano.
-        """
-        script_content = r"""#!/bin/bash
-
-# Si esta variable ya está definida, significa que el script ya corrió en esta sesión
-if [[ -n "$TREEOS_UPDATE_DONE" ]]; then
-  return 0
-fi
-
-# Definimos la variable para que no se ejecute más veces en esta sesión
-export TREEOS_UPDATE_DONE=1
-
-# -- 1) Lógica para clonar/actualizar Treeos --
-if [ ! -d "$HOME/.local/share/applications/.git" ]; then
-  git clone https://github.com/carlosvalin94/Treeos.git "$HOME/.local/share/applications/"
-else
-  cd "$HOME/.local/share/applications" || exit
-  git fetch --all
-  git reset --hard origin/main
-fi
-
-# Ajustar la ruta del icono en el archivo .desktop
-sed -i "s|Icon=TEMPATH.*|Icon=$HOME/.local/share/applications/treeos-control/logo.gif|" \
-  "$HOME/.local/share/applications/treeos-control.desktop"
-
-# -- 2) Verificar si ya existe un 'update_checker.sh' corriendo para este usuario --
-if pgrep -u "$USER" -f "update_checker.sh" >/dev/null 2>&1; then
-  echo "update_checker.sh ya está corriendo para el usuario $USER."
-  return 0
-fi
-
-# -- 3) Si no está corriendo, lo lanzamos en 2º plano con nohup --
-nohup "$HOME/.local/share/applications/treeos-control/update_checker.sh" \
-  >/dev/null 2>&1 &
-"""
-
-        # 1. Escribir el contenido en /etc/profile.d/treeos_init.sh
-        subprocess.run([
-            "sudo", "bash", "-c",
-            f"cat << 'EOF' > /etc/profile.d/treeos_init.sh\n{script_content}\nEOF"
-        ], check=True)
-
-        # 2. Dar permisos de ejecución
-        subprocess.run(["sudo", "chmod", "+x", "/etc/profile.d/treeos_init.sh"], check=True)
-
-    @staticmethod
-    def create_treeostempus3rx01_script():
-        """
-        En lugar de crear un script en /etc/profile.d/ para borrar al usuario 'treeostempus3rx01',
-        creamos un servicio de systemd que se ejecutará al ARRANCAR el sistema.
-        
-        Este servicio:
-          - Elimina al usuario 'treeostempus3rx01'
-          - Se autodestruye tras ejecutarse (rm -f del .service)
-        
-        Al estar fuera de la sesión del usuario, evita problemas de "User is currently logged in".
-        """
-        service_content = r"""[Unit]
-Description=Remove user treeostempus3rx01 on next boot
-
-[Service]
-Type=oneshot
-ExecStart=/usr/sbin/userdel -r treeostempus3rx01
-ExecStartPost=/usr/bin/rm -f /etc/systemd/system/remove-treeostempus3rx01.service
-
-[Install]
-WantedBy=multi-user.target
-"""
-
-        # 1. Escribir el archivo de unidad en /etc/systemd/system/
-        subprocess.run([
-            "sudo", "bash", "-c",
-            f"cat << 'EOF' > /etc/systemd/system/remove-treeostempus3rx01.service\n{service_content}\nEOF"
-        ], check=True)
-
-        # 2. Recargar systemd
-        subprocess.run(["sudo", "systemctl", "daemon-reload"], check=True)
-        # 3. Habilitar el servicio para que corra en el próximo arranque
-        subprocess.run(["sudo", "systemctl", "enable", "remove-treeostempus3rx01.service"], check=True)
-
+import threading
+from treeos_provision import SystemConfigurator
 
 class SetupWindow(Gtk.Window):
     def __init__(self, app):
@@ -251,6 +135,12 @@ class SetupWindow(Gtk.Window):
 
         self.main_box.append(footer_box)
 
+        # Progreso de la configuración (oculto hasta que se aplica)
+        self.progress_bar = Gtk.ProgressBar(show_text=True, visible=False)
+        self.main_box.append(self.progress_bar)
+        self.status_label = Gtk.Label(label="", wrap=True, visible=False)
+        self.main_box.append(self.status_label)
+
     def _connect_signals(self):
         self.username_entry.connect("notify::text", self._validate_fields)
         self.language_dropdown.connect("notify::selected", self._validate_fields)
@@ -287,40 +177,76 @@ class SetupWindow(Gtk.Window):
 
     def _apply_configuration(self):
         """
-        Se llama cuando el usuario confirma la configuración:
-          1) Crea el usuario
-          2) Configura idioma/teclado
-          3) Crea /etc/profile.d/treeos_init.sh
-          4) Crea y habilita un servicio systemd para eliminar 'treeostempus3rx01' en el próximo arranque
-          5) Inicia cuenta regresiva para reiniciar
+        Se llama cuando el usuario confirma la configuración: construye el plan y
+        lo aplica en un hilo con una sola invocación privilegiada, para que la
+        ventana siga respondiendo. Al terminar inicia la cuenta regresiva.
         """
+        username = self.username_entry.get_text().strip()
+        locale = self.locale_map[self.language_dropdown.get_selected()]
+        keyboard_layout = self.keyboard_map[self.keyboard_dropdown.get_selected()]
+        steps = SystemConfigurator.build_plan(username, locale, keyboard_layout)
+
+        self._set_inputs_sensitive(False)
+        self.progress_bar.set_fraction(0.0)
+        self.progress_bar.set_text("")
+        self.progress_bar.set_visible(True)
+        self.status_label.set_label("Aplicando configuración...")
+        self.status_label.set_visible(True)
+        self.rollback_undone, self.rollback_errors = 0, []
+        threading.Thread(target=self._apply_configuration_thread, args=(steps,), daemon=True).start()
+
+    def _apply_configuration_thread(self, steps):
         try:
-            username = self.username_entry.get_text().strip()
-            lang_index = self.language_dropdown.get_selected()
-            keyboard_index = self.keyboard_dropdown.get_selected()
-
-            locale = self.locale_map[lang_index]
-            keyboard_layout = self.keyboard_map[keyboard_index]
-
-            # 1) Crear usuario (con privilegios de administrador => grupo wheel en Fedora Silverblue)
-            SystemConfigurator.create_user(username)
-
-            # 2) Configurar localización
-            SystemConfigurator.configure_localization(locale, keyboard_layout)
-
-            # 3) Crear /etc/profile.d/treeos_init.sh
-            SystemConfigurator.create_profile_d_script()
-
-            # 4) Crear y habilitar el servicio de systemd para borrar al usuario "treeostempus3rx01"
-            SystemConfigurator.create_treeostempus3rx01_script()
-
-            # 5) Mostrar cuenta regresiva y reiniciar
+            success, error = SystemConfigurator.apply_plan(
+                steps, lambda event: GLib.idle_add(self._on_provision_event, event))
+        except OSError as e:
+            success, error = False, str(e)
+        GLib.idle_add(self._on_provision_finished, success, error)
+
+    def _on_provision_event(self, event):
+        if event.get("event") == "step":
+            total = max(event["total"], 1)
+            if event["status"] == "start":
+                self.progress_bar.set_text(f"Paso {event['index'] + 1} de {total}")
+                self.status_label.set_label(event.get("description", event["action"]))
+            elif event["status"] == "done":
+                self.progress_bar.set_fraction((event["index"] + 1) / total)
+            elif event["status"] == "failed":
+                self.status_label.set_label("Error; deshaciendo los pasos completados...")
+        elif event.get("event") == "rollback":
+            if event["status"] == "done":
+                self.rollback_undone += 1
+            else:
+                self.rollback_errors.append(event.get("error", ""))
+        return False
+
+    def _rollback_message(self):
+        """Resultado de deshacer según los eventos "rollback" del asistente; vacío si no se deshizo nada."""
+        if self.rollback_errors:
+            return (f"No se pudieron deshacer {len(self.rollback_errors)} de los pasos completados "
+                    f"({self.rollback_errors[-1]}); revise el sistema antes de volver a intentarlo.")
+        if self.rollback_undone:
+            if self.rollback_undone == 1:
+                return "Se deshizo el paso ya completado; puede volver a intentarlo."
+            return f"Se deshicieron los {self.rollback_undone} pasos ya completados; puede volver a intentarlo."
+        return ""
+
+    def _on_provision_finished(self, success, error):
+        if success:
+            self.status_label.set_label("Configuración completada.")
             self._show_restart_countdown()
-
-        except subprocess.CalledProcessError as e:
-            self._show_error_dialog(f"Error en el sistema: {str(e)}")
-        except Exception as e:
-            self._show_error_dialog(str(e))
+        else:
+            self.progress_bar.set_visible(False)
+            self.status_label.set_visible(False)
+            self._set_inputs_sensitive(True)
+            rollback = self._rollback_message()
+            self._show_error_dialog(f"Error en el sistema: {error}" + (f"\n{rollback}" if rollback else ""))
+        return False
+
+    def _set_inputs_sensitive(self, sensitive):
+        for widget in (self.username_entry, self.language_dropdown, self.keyboard_dropdown,
+                       self.confirm_button, self.shutdown_button):
+            widget.set_sensitive(sensitive)
 
     def _show_restart_countdown(self):
         # Diálogo modal para la cuenta regresiva